@@ -0,0 +1,88 @@
+"""Small JSON cache on Redis.
+
+Every helper fails open: when Redis is unreachable, reads miss and writes are
+dropped, so callers just fall back to the database.
+"""
+import json
+import logging
+import time
+from typing import Any
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_client: Redis | None = None
+_down_until = 0.0  # skip Redis for a while after a failure instead of timing out per call
+_RETRY_AFTER_SECONDS = 30
+
+
+def get_redis() -> Redis:
+    global _client
+    if _client is None:
+        _client = Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+    return _client
+
+
+def _available() -> bool:
+    return time.monotonic() >= _down_until
+
+
+def _mark_down(action: str, key: str) -> None:
+    global _down_until
+    _down_until = time.monotonic() + _RETRY_AFTER_SECONDS
+    logger.warning("Cache %s failed for %s", action, key)
+
+
+async def close_cache() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def cache_get(key: str) -> Any | None:
+    if not _available():
+        return None
+    try:
+        raw = await get_redis().get(key)
+    except (RedisError, OSError):
+        _mark_down("read", key)
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+async def cache_set(key: str, value: Any, ttl_seconds: int) -> None:
+    if not _available():
+        return
+    try:
+        await get_redis().set(key, json.dumps(value, default=str), ex=ttl_seconds)
+    except (RedisError, OSError):
+        _mark_down("write", key)
+
+
+async def get_generation(namespace: str) -> int:
+    """Current generation of a namespace; embed it in keys to invalidate them all at once."""
+    if not _available():
+        return 0
+    try:
+        value = await get_redis().get(f"{namespace}:gen")
+    except (RedisError, OSError):
+        _mark_down("read", f"{namespace}:gen")
+        return 0
+    return int(value or 0)
+
+
+async def bump_generation(namespace: str) -> None:
+    # Attempted even while marked down: a lost bump would leave stale entries behind
+    try:
+        await get_redis().incr(f"{namespace}:gen")
+    except (RedisError, OSError):
+        _mark_down("invalidation", namespace)
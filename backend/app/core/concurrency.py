@@ -0,0 +1,62 @@
+"""Run independent read queries in parallel.
+
+An AsyncSession executes one statement at a time, so independent reads issued
+on the request session add up. `run_concurrently` gives each read its own
+short-lived session from the pool and gathers them, capped per call so a single
+request cannot drain the pool.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+
+settings = get_settings()
+
+ReadFunc = Callable[[AsyncSession], Awaitable[Any]]
+
+
+async def run_concurrently(*reads: ReadFunc, limit: int | None = None) -> list[Any]:
+    """Run each `read(session)` on its own session; results come back in order.
+    Only for reads: nothing is committed, and ORM objects come back detached.
+    """
+    semaphore = asyncio.Semaphore(limit or settings.DB_FANOUT_LIMIT)
+
+    async def _run(read: ReadFunc) -> Any:
+        async with semaphore:
+            async with AsyncSessionLocal() as session:
+                return await read(session)
+
+    return list(await asyncio.gather(*(_run(read) for read in reads)))
+
+
+def scalar(query) -> ReadFunc:
+    return lambda session: session.scalar(query)
+
+
+def scalars(query) -> ReadFunc:
+    async def _read(session: AsyncSession) -> list:
+        return list((await session.scalars(query)).all())
+    return _read
+
+
+def rows(query) -> ReadFunc:
+    async def _read(session: AsyncSession) -> list:
+        return list((await session.execute(query)).all())
+    return _read
+
+
+def snapshot_rows(*queries) -> ReadFunc:
+    """Several queries on one session in a REPEATABLE READ transaction, so they all see
+    the same data (each statement of a READ COMMITTED transaction may see new commits)."""
+    async def _read(session: AsyncSession) -> list[list]:
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        return [list((await session.execute(query)).all()) for query in queries]
+    return _read
+
+
+def one(query) -> ReadFunc:
+    async def _read(session: AsyncSession):
+        return (await session.execute(query)).one()
+    return _read
@@ -10,16 +10,47 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "postgresql+asyncpg://rqos:rqos_secret@db:5432/rqos"
     DATABASE_URL_SYNC: str = "postgresql://rqos:rqos_secret@db:5432/rqos"
+    # Max parallel sessions a single request may open via run_concurrently
+    DB_FANOUT_LIMIT: int = 4
 
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
 
+    # Cached per-user scoping (member id, squads, allocated clients)
+    USER_SCOPE_CACHE_SECONDS: int = 300
+    # /team/capacity snapshot (open demands, allocations, design work per member)
+    TEAM_CAPACITY_CACHE_SECONDS: int = 30
+
     # JWT
     SECRET_KEY: str = "change-this-in-production-use-a-real-secret-key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Background jobs
+    SCHEDULER_ENABLED: bool = True
+    # Queued jobs (background_jobs): sweep interval and heartbeat age after which a
+    # running job is considered abandoned
+    JOBS_SWEEP_SECONDS: int = 60
+    JOB_STALE_SECONDS: int = 300
+    # Rows deleted per transaction by the client deletion job
+    DELETION_BATCH_SIZE: int = 500
+    # Rows upserted per transaction by the client import (POST /clients/import)
+    CLIENT_IMPORT_CHUNK_SIZE: int = 200
+
+    # History partitioning (demand_history / design_history)
+    HISTORY_RETENTION_MONTHS: int = 24
+    HISTORY_PARTITIONS_AHEAD: int = 3
+
+    # Analytics
+    FLOW_METRICS_REFRESH_MINUTES: int = 15
+    DASHBOARD_SNAPSHOT_MINUTES: int = 60
+    SNAPSHOT_BACKFILL_DAYS: int = 365
+    # Hour of day (server local time) of the nightly churn-risk scoring
+    CHURN_RISK_SCORE_HOUR: int = 3
+    # Closing demands for ending contracts and CHURNED → INACTIVE on the end date
+    CONTRACT_EXPIRY_CHECK_MINUTES: int = 60
+
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:5173"]
 
@@ -0,0 +1,241 @@
+"""Monthly range partitioning for append-only history tables.
+
+History tables are partitioned by ``created_at`` into ``<table>_pYYYYMM`` children.
+A ``<table>_default`` partition catches rows outside the pre-created months (the
+scheduler was down, a backdated row) so the write they belong to never fails;
+maintenance later moves them into their month's partition. Partitions older than the retention period are detached and re-attached under a
+parent table with the same name in the ``history_archive`` schema, so they leave the
+hot table but stay queryable.
+"""
+from datetime import date, datetime
+from sqlalchemy import Table, column, select, table as sql_table, text, union_all
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from app.core.config import get_settings
+from app.core.database import Base, engine
+
+settings = get_settings()
+
+ARCHIVE_SCHEMA = "history_archive"
+HISTORY_TABLES = ("demand_history", "design_history")
+
+
+def _add_months(d: date, months: int) -> date:
+    total = d.year * 12 + (d.month - 1) + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _partition_name(table_name: str, month_start: date) -> str:
+    return f"{table_name}_p{month_start:%Y%m}"
+
+
+def _default_partition(table_name: str) -> str:
+    return f"{table_name}_default"
+
+
+def _bound(d: date) -> str:
+    return f"'{d.isoformat()} 00:00:00+00'"
+
+
+def archive_table(table: Table):
+    """Lightweight construct for the archive parent of a partitioned history table."""
+    return sql_table(
+        table.name, *[column(c.name) for c in table.columns], schema=ARCHIVE_SCHEMA
+    )
+
+
+async def _relkind(conn: AsyncConnection, schema: str, table_name: str) -> str | None:
+    result = await conn.execute(
+        text(
+            "SELECT c.relkind FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :schema AND c.relname = :name"
+        ),
+        {"schema": schema, "name": table_name},
+    )
+    return result.scalar_one_or_none()
+
+
+async def _create_month_partition(
+    conn: AsyncConnection, table_name: str, month_start: date
+) -> None:
+    partition = _partition_name(table_name, month_start)
+    if await _relkind(conn, "public", partition):
+        return
+    start, end = _bound(month_start), _bound(_add_months(month_start, 1))
+    create = (
+        f"CREATE TABLE {partition} PARTITION OF {table_name} "
+        f"FOR VALUES FROM ({start}) TO ({end})"
+    )
+    default = _default_partition(table_name)
+    in_range = f"created_at >= {start} AND created_at < {end}"
+    has_rows = await _relkind(conn, "public", default) and await conn.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})")
+    )
+    if not has_rows:
+        await conn.execute(text(create))
+        return
+    # Postgres refuses a new partition while the default one holds rows for its range
+    await conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {default}"))
+    await conn.execute(text(create))
+    await conn.execute(text(f"INSERT INTO {partition} SELECT * FROM {default} WHERE {in_range}"))
+    await conn.execute(text(f"DELETE FROM {default} WHERE {in_range}"))
+    await conn.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {default} DEFAULT"))
+
+
+async def _ensure_default_partition(conn: AsyncConnection, table_name: str) -> None:
+    await conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_default_partition(table_name)} "
+        f"PARTITION OF {table_name} DEFAULT"
+    ))
+
+
+async def _drain_default_partition(conn: AsyncConnection, table_name: str) -> None:
+    """Move the rows that landed in the default partition into their monthly partitions."""
+    months = await conn.execute(text(
+        "SELECT DISTINCT CAST(date_trunc('month', created_at AT TIME ZONE 'UTC') AS date) "
+        f"FROM {_default_partition(table_name)}"
+    ))
+    for (month_start,) in months.all():
+        await _create_month_partition(conn, table_name, month_start)
+
+
+async def _convert_to_partitioned(conn: AsyncConnection, table_name: str) -> None:
+    """Rebuild a plain history table as a partitioned one, copying its rows."""
+    legacy = f"{table_name}_legacy"
+    await conn.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+    await conn.execute(text(f"ALTER INDEX IF EXISTS {table_name}_pkey RENAME TO {legacy}_pkey"))
+    await conn.execute(text(f"ALTER INDEX IF EXISTS ix_{table_name}_id RENAME TO ix_{legacy}_id"))
+    await conn.execute(text(f"ALTER SEQUENCE IF EXISTS {table_name}_id_seq RENAME TO {legacy}_id_seq"))
+
+    table = Base.metadata.tables[table_name]
+    await conn.run_sync(table.create)
+
+    bounds = await conn.execute(text(
+        f"SELECT MIN(COALESCE(created_at, now())), MAX(COALESCE(created_at, now())) FROM {legacy}"
+    ))
+    first, last = bounds.one()
+    if first is not None:
+        month = date(first.year, first.month, 1)
+        while month <= date(last.year, last.month, 1):
+            await _create_month_partition(conn, table_name, month)
+            month = _add_months(month, 1)
+
+    columns = ", ".join(c.name for c in table.columns)
+    select_columns = ", ".join(
+        "COALESCE(created_at, now())" if c.name == "created_at" else c.name
+        for c in table.columns
+    )
+    await conn.execute(text(
+        f"INSERT INTO {table_name} ({columns}) SELECT {select_columns} FROM {legacy}"
+    ))
+    await conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {table_name}), 0) + 1, false)"
+    ))
+    await conn.execute(text(f"DROP TABLE {legacy}"))
+
+
+async def ensure_monthly_partitions(
+    conn: AsyncConnection, table_name: str, months_ahead: int
+) -> None:
+    this_month = date.today().replace(day=1)
+    for offset in range(months_ahead + 1):
+        await _create_month_partition(conn, table_name, _add_months(this_month, offset))
+
+
+async def ensure_history_partitioning(conn: AsyncConnection) -> None:
+    """Convert history tables to partitioned tables (once) and create upcoming partitions."""
+    await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    for table_name in HISTORY_TABLES:
+        if await _relkind(conn, "public", table_name) == "r":
+            await _convert_to_partitioned(conn, table_name)
+        await _ensure_default_partition(conn, table_name)
+        await _drain_default_partition(conn, table_name)
+        await ensure_monthly_partitions(conn, table_name, settings.HISTORY_PARTITIONS_AHEAD)
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{table_name} "
+            f"(LIKE public.{table_name}) PARTITION BY RANGE (created_at)"
+        ))
+
+
+async def archive_expired_partitions(
+    conn: AsyncConnection, table_name: str, retention_months: int
+) -> list[str]:
+    """Move partitions entirely older than the retention window to the archive schema."""
+    cutoff = _add_months(date.today().replace(day=1), -retention_months)
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "JOIN pg_namespace n ON n.oid = parent.relnamespace "
+            "WHERE n.nspname = 'public' AND parent.relname = :name"
+        ),
+        {"name": table_name},
+    )
+    archived = []
+    for (partition,) in result.all():
+        suffix = partition.rsplit("_p", 1)[-1]
+        if len(suffix) != 6 or not suffix.isdigit():
+            continue
+        month_start = date(int(suffix[:4]), int(suffix[4:]), 1)
+        if _add_months(month_start, 1) > cutoff:
+            continue
+        await conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {partition}"))
+        if await _relkind(conn, ARCHIVE_SCHEMA, partition):
+            # Late rows (via the default partition) for a month archived earlier
+            await conn.execute(text(
+                f"INSERT INTO {ARCHIVE_SCHEMA}.{partition} SELECT * FROM {partition}"
+            ))
+            await conn.execute(text(f"DROP TABLE {partition}"))
+            archived.append(partition)
+            continue
+        # Archived rows must not block deletes of the demands they reference
+        fks = await conn.execute(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = CAST(:rel AS regclass) AND contype = 'f'"
+            ),
+            {"rel": f"public.{partition}"},
+        )
+        for (fk,) in fks.all():
+            await conn.execute(text(f'ALTER TABLE {partition} DROP CONSTRAINT "{fk}"'))
+        await conn.execute(text(f"ALTER TABLE {partition} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        await conn.execute(text(
+            f"ALTER TABLE {ARCHIVE_SCHEMA}.{table_name} "
+            f"ATTACH PARTITION {ARCHIVE_SCHEMA}.{partition} "
+            f"FOR VALUES FROM ({_bound(month_start)}) TO ({_bound(_add_months(month_start, 1))})"
+        ))
+        archived.append(partition)
+    return archived
+
+
+async def maintain_history_partitions() -> None:
+    """Scheduled job: pre-create upcoming partitions, file rows caught by the default
+    partition and archive expired ones."""
+    async with engine.begin() as conn:
+        for table_name in HISTORY_TABLES:
+            await _drain_default_partition(conn, table_name)
+            await ensure_monthly_partitions(conn, table_name, settings.HISTORY_PARTITIONS_AHEAD)
+            await archive_expired_partitions(
+                conn, table_name, settings.HISTORY_RETENTION_MONTHS
+            )
+
+
+async def fetch_history(
+    db: AsyncSession, table: Table, demand_id: int, since: datetime | None = None
+) -> list[dict]:
+    """Read a demand's history across live and archived partitions.
+    `since` (the demand's creation time) lets Postgres prune older partitions.
+    """
+    archived = archive_table(table)
+    live_q = select(*table.c).where(table.c.demand_id == demand_id)
+    archive_q = select(*[archived.c[c.name] for c in table.columns]).where(
+        archived.c.demand_id == demand_id
+    )
+    if since is not None:
+        live_q = live_q.where(table.c.created_at >= since)
+        archive_q = archive_q.where(archived.c.created_at >= since)
+    combined = union_all(live_q, archive_q).subquery()
+    result = await db.execute(select(combined).order_by(combined.c.created_at))
+    return [dict(row._mapping) for row in result.all()]
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app.core.config import get_settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+JobFunc = Callable[[], Awaitable[None]]
+
+# name -> (seconds to wait before a run, given whether it is the first one; func)
+_jobs: dict[str, tuple[Callable[[bool], float], JobFunc]] = {}
+_tasks: list[asyncio.Task] = []
+
+
+def register_job(name: str, interval_seconds: float, func: JobFunc) -> None:
+    """Register a periodic maintenance job (runs once at startup, then every interval)."""
+    _jobs[name] = (lambda first: 0 if first else interval_seconds, func)
+
+
+def register_daily_job(name: str, hour: int, func: JobFunc) -> None:
+    """Register a job that runs every day at hour:00 (server local time, like
+    date.today()); it does not run at startup."""
+    # After a run, skip the slot it just ran in even if the sleep woke a bit early
+    _jobs[name] = (lambda first: _seconds_until(hour, 0 if first else 3600), func)
+
+
+def _seconds_until(hour: int, min_seconds: float) -> float:
+    now = datetime.now()
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    while (run_at - now).total_seconds() < min_seconds or run_at <= now:
+        run_at += timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+async def run_job_exclusive(name: str, func: JobFunc) -> bool:
+    """Run a job guarded by a Postgres advisory lock so only one worker executes it.
+    Returns False when another worker already holds the lock.
+    """
+    async with engine.connect() as conn:
+        locked = await conn.scalar(
+            text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}
+        )
+        await conn.commit()
+        if not locked:
+            return False
+        try:
+            await func()
+        finally:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name}
+            )
+            await conn.commit()
+    return True
+
+
+async def _run_periodic(name: str, delay: Callable[[bool], float], func: JobFunc) -> None:
+    first = True
+    while True:
+        await asyncio.sleep(delay(first))
+        first = False
+        try:
+            await run_job_exclusive(name, func)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Scheduled job '%s' failed", name)
+
+
+def start_scheduler() -> None:
+    if not settings.SCHEDULER_ENABLED:
+        return
+    for name, (delay, func) in _jobs.items():
+        _tasks.append(asyncio.create_task(_run_periodic(name, delay, func)))
+
+
+async def stop_scheduler() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
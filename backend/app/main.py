@@ -4,26 +4,41 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from app.core.config import get_settings
 from app.core.database import engine, Base, AsyncSessionLocal
+from app.core.partitioning import ensure_history_partitioning, maintain_history_partitions
+from app.core.cache import close_cache
+from app.core.scheduler import register_daily_job, register_job, start_scheduler, stop_scheduler
 from app.modules.auth.routes import router as auth_router
 from app.modules.clients.routes import router as clients_router
+from app.modules.clients.services import process_contract_expiry
 from app.modules.team.routes import router as team_router
 from app.modules.demands.routes import router as demands_router
 from app.modules.financial.routes import router as financial_router
 from app.shared.dashboard import router as dashboard_router
 from app.modules.meetings.routes import router as meetings_router
 from app.modules.design.routes import router as design_router
+from app.modules.analytics.routes import router as analytics_router
+from app.modules.jobs.routes import router as jobs_router
+from app.modules.jobs.services import resume_jobs
+from app.modules.analytics.services import create_flow_metrics_view, refresh_flow_metrics
+from app.shared.snapshots import DashboardSnapshot, rollup_dashboard_snapshots  # noqa
+from app.shared.health import ClientRiskScore, score_churn_risk  # noqa
 
 # Import all models so they're registered with Base
 from app.modules.auth.models import User, ModulePermission  # noqa
-from app.modules.clients.models import Client  # noqa
-from app.modules.team.models import Squad, TeamMember, TeamAllocation, MemberSquad  # noqa
+from app.modules.clients.models import Client, CNPJ_DIGITS_SQL  # noqa
+from app.modules.team.models import (  # noqa
+    Squad, TeamMember, TeamAllocation, MemberSquad, ACTIVE_RANGE_SQL,
+)
 from app.modules.demands.models import Demand, KanbanColumn, DemandHistory, DemandComment  # noqa
 from app.modules.meetings.models import ClientMeeting  # noqa
-from app.modules.financial.models import MonthlyFinancials, ExtraExpense  # noqa
+from app.modules.financial.models import (  # noqa
+    MonthlyFinancials, ExtraExpense, FinancialMonthClose, FinancialCloseRow,
+)
 from app.modules.design.models import (  # noqa
     DesignColumn, DesignDemand, DesignAttachment, DesignComment as DesignCommentModel,
-    DesignHistory, DesignPayment, DesignMemberRate,
+    DesignHistory, DesignPayment, DesignMemberRate, DesignBlob,
 )
+from app.modules.jobs.models import BackgroundJob  # noqa
 
 settings = get_settings()
 
@@ -32,6 +47,8 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     # Startup: create tables and seed defaults
     async with engine.begin() as conn:
+        # team_allocations' exclusion constraint needs btree_gist for its = columns
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
         await conn.run_sync(Base.metadata.create_all)
         # Migrate: add new columns to existing tables (safe - IF NOT EXISTS)
         migrations = [
@@ -45,11 +62,77 @@ async def lifespan(app: FastAPI):
             "ALTER TABLE clients ADD COLUMN IF NOT EXISTS min_contract_months INTEGER",
             "ALTER TABLE clients ADD COLUMN IF NOT EXISTS operational_cost NUMERIC(10,2)",
             "ALTER TABLE clients ADD COLUMN IF NOT EXISTS health_score FLOAT",
+            "ALTER TABLE clients ADD COLUMN IF NOT EXISTS closing_demands_created_at TIMESTAMPTZ",
+            "CREATE INDEX IF NOT EXISTS ix_clients_end_date ON clients (end_date) WHERE end_date IS NOT NULL",
+            "ALTER TABLE clients ADD COLUMN IF NOT EXISTS cnpj_digits VARCHAR(20) "
+            f"GENERATED ALWAYS AS ({CNPJ_DIGITS_SQL}) STORED",
+            # Duplicate CNPJs must be merged by hand before the index can exist
+            "DO $$ BEGIN "
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_cnpj_digits ON clients (cnpj_digits); "
+            "EXCEPTION WHEN unique_violation THEN "
+            "RAISE WARNING 'uq_clients_cnpj_digits not created: duplicate CNPJs exist'; "
+            "END $$",
+            # Clients whose closing demands were created inline before the expiry job existed
+            "UPDATE clients c SET closing_demands_created_at = c.updated_at "
+            "WHERE c.closing_demands_created_at IS NULL AND c.end_date IS NOT NULL "
+            "AND EXISTS (SELECT 1 FROM demands d WHERE d.client_id = c.id "
+            "AND d.title ILIKE 'ENCERRAMENTO DO CONTRATO%')",
+            # One monthly_financials row per month: drop racing duplicates (keep the latest edit)
+            "DELETE FROM monthly_financials a USING monthly_financials b "
+            "WHERE a.month = b.month AND a.year = b.year "
+            "AND (COALESCE(a.updated_at, a.created_at, '-infinity'), a.id) "
+            "< (COALESCE(b.updated_at, b.created_at, '-infinity'), b.id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_monthly_financials_month_year ON monthly_financials (month, year)",
+            # Allocation period as an indexed range (start/end dates inclusive)
+            "ALTER TABLE team_allocations ADD COLUMN IF NOT EXISTS active_range daterange "
+            f"GENERATED ALWAYS AS ({ACTIVE_RANGE_SQL}) STORED",
+            "CREATE INDEX IF NOT EXISTS ix_team_allocations_active_range "
+            "ON team_allocations USING gist (active_range)",
+            # No overlapping allocations of a member to the same client (replaces the unique
+            # member/client index); legacy overlaps must be fixed by hand
+            "DO $$ BEGIN "
+            "IF NOT EXISTS (SELECT 1 FROM pg_constraint "
+            "WHERE conname = 'ex_team_allocations_member_client_overlap') THEN "
+            "ALTER TABLE team_allocations ADD CONSTRAINT ex_team_allocations_member_client_overlap "
+            "EXCLUDE USING gist (member_id WITH =, client_id WITH =, active_range WITH &&); "
+            "END IF; "
+            "DROP INDEX IF EXISTS uq_team_allocations_member_client; "
+            "EXCEPTION WHEN exclusion_violation THEN "
+            "RAISE WARNING 'ex_team_allocations_member_client_overlap not created: overlapping allocations exist'; "
+            "END $$",
+            # Content-addressed attachments (older rows keep their own file)
+            "ALTER TABLE design_attachments ADD COLUMN IF NOT EXISTS blob_sha256 VARCHAR(64) "
+            "REFERENCES design_blobs (sha256)",
+            "CREATE INDEX IF NOT EXISTS ix_design_attachments_blob_sha256 "
+            "ON design_attachments (blob_sha256)",
+            # One active job per kind/target; older duplicates are failed so the index can exist
+            "UPDATE background_jobs a SET status = 'FAILED', error = 'Tarefa duplicada', "
+            "finished_at = now() FROM background_jobs b "
+            "WHERE a.kind = b.kind AND a.target_id = b.target_id AND a.id > b.id "
+            "AND a.status IN ('PENDING', 'RUNNING') AND b.status IN ('PENDING', 'RUNNING')",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_background_jobs_active "
+            "ON background_jobs (kind, target_id) WHERE status IN ('PENDING', 'RUNNING')",
+            # Snapshots split by assigned member: widen the key and mark the old rows for
+            # re-derivation (snapshots.STALE)
+            "ALTER TABLE dashboard_snapshots ADD COLUMN IF NOT EXISTS member_id INTEGER NOT NULL DEFAULT 0",
+            "DO $$ BEGIN "
+            "IF NOT EXISTS (SELECT 1 FROM pg_constraint c JOIN pg_attribute a "
+            "ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey) "
+            "WHERE c.conrelid = 'dashboard_snapshots'::regclass AND c.contype = 'p' "
+            "AND a.attname = 'member_id') THEN "
+            "ALTER TABLE dashboard_snapshots DROP CONSTRAINT dashboard_snapshots_pkey, "
+            "ADD PRIMARY KEY (snapshot_date, client_id, member_id); "
+            "UPDATE dashboard_snapshots SET computed_at = '1970-01-01 00:00:00+00'; "
+            "END IF; END $$",
             # Enable financial read for non-admins (personal view)
             "UPDATE module_permissions SET can_read = true WHERE module = 'financial' AND role::text IN ('gerente', 'colaborador')",
         ]
         for stmt in migrations:
             await conn.execute(text(stmt))
+        # Monthly partitions for demand/design history (converts legacy tables once)
+        await ensure_history_partitioning(conn)
+        # Materialized view backing /analytics/flow (needs the history tables above)
+        await create_flow_metrics_view(conn)
 
     # Seed default kanban columns
     from app.modules.demands.services import seed_default_columns
@@ -134,8 +217,23 @@ async def lifespan(app: FastAPI):
                 ))
         await session.commit()
 
+    # Periodic maintenance jobs
+    register_job("history_partitions", 24 * 3600, maintain_history_partitions)
+    register_job("flow_metrics", settings.FLOW_METRICS_REFRESH_MINUTES * 60, refresh_flow_metrics)
+    register_job(
+        "dashboard_snapshots", settings.DASHBOARD_SNAPSHOT_MINUTES * 60, rollup_dashboard_snapshots
+    )
+    register_daily_job("churn_risk", settings.CHURN_RISK_SCORE_HOUR, score_churn_risk)
+    register_job("background_jobs", settings.JOBS_SWEEP_SECONDS, resume_jobs)
+    register_job(
+        "contract_expiry", settings.CONTRACT_EXPIRY_CHECK_MINUTES * 60, process_contract_expiry
+    )
+    start_scheduler()
+
     yield
 
+    await stop_scheduler()
+    await close_cache()
     await engine.dispose()
 
 
@@ -165,6 +263,8 @@ app.include_router(financial_router, prefix=API_PREFIX)
 app.include_router(dashboard_router, prefix=API_PREFIX)
 app.include_router(meetings_router, prefix=API_PREFIX)
 app.include_router(design_router, prefix=API_PREFIX)
+app.include_router(analytics_router, prefix=API_PREFIX)
+app.include_router(jobs_router, prefix=API_PREFIX)
 
 
 @app.get("/")
@@ -0,0 +1,84 @@
+from sqlalchemy import Date, Float, Integer, String, column, table
+
+# Daily flow facts per squad / member / client, aggregated from demands and their
+# column-move history. Refreshed concurrently by a scheduled job; never written by the API.
+# The member_client rows (dimension_id = member, client_id = client) let scoped users
+# aggregate only the facts of the members they may see; client_id is 0 elsewhere.
+FLOW_METRICS_VIEW = "flow_metrics_daily"
+
+FLOW_METRICS_VIEW_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {FLOW_METRICS_VIEW} AS
+WITH moves AS (
+    SELECT demand_id, to_column, created_at FROM demand_history
+    UNION ALL
+    SELECT demand_id, to_column, created_at FROM history_archive.demand_history
+),
+started AS (
+    SELECT demand_id, MIN(created_at) AS started_at
+    FROM moves
+    WHERE lower(to_column) LIKE '%progresso%'
+    GROUP BY demand_id
+),
+base AS (
+    SELECT d.id, d.client_id, d.assigned_to_id AS member_id, m.squad_id,
+           d.created_at, d.completed_at, s.started_at
+    FROM demands d
+    LEFT JOIN team_members m ON m.id = d.assigned_to_id
+    LEFT JOIN started s ON s.demand_id = d.id
+),
+facts AS (
+    SELECT completed_at::date AS day, client_id, member_id, squad_id,
+           1 AS completed,
+           EXTRACT(EPOCH FROM completed_at - created_at) / 3600.0 AS lead_hours,
+           CASE WHEN started_at <= completed_at
+                THEN EXTRACT(EPOCH FROM completed_at - started_at) / 3600.0 END AS cycle_hours,
+           0 AS wip
+    FROM base
+    WHERE completed_at IS NOT NULL
+    UNION ALL
+    SELECT g.day::date, client_id, member_id, squad_id, 0, NULL, NULL, 1
+    FROM base
+    CROSS JOIN LATERAL generate_series(
+        started_at::date, COALESCE(completed_at::date - 1, CURRENT_DATE), interval '1 day'
+    ) AS g(day)
+    WHERE started_at IS NOT NULL
+)
+SELECT day,
+       CASE WHEN GROUPING(squad_id) = 0 THEN 'squad'
+            WHEN GROUPING(member_id, client_id) = 0 THEN 'member_client'
+            WHEN GROUPING(member_id) = 0 THEN 'member'
+            ELSE 'client' END AS dimension,
+       COALESCE(CASE WHEN GROUPING(squad_id) = 0 THEN squad_id
+                     WHEN GROUPING(member_id) = 0 THEN member_id
+                     ELSE client_id END, 0) AS dimension_id,
+       CASE WHEN GROUPING(member_id, client_id) = 0
+            THEN COALESCE(client_id, 0) ELSE 0 END AS client_id,
+       SUM(completed) AS throughput,
+       COALESCE(SUM(lead_hours), 0) AS lead_time_hours_sum,
+       COALESCE(SUM(cycle_hours), 0) AS cycle_time_hours_sum,
+       COUNT(cycle_hours) AS cycle_count,
+       SUM(wip) AS wip
+FROM facts
+GROUP BY GROUPING SETS (
+    (day, squad_id), (day, member_id), (day, client_id), (day, member_id, client_id)
+)
+"""
+
+# REFRESH ... CONCURRENTLY requires a unique index covering every row
+FLOW_METRICS_INDEX_SQL = (
+    f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{FLOW_METRICS_VIEW} "
+    f"ON {FLOW_METRICS_VIEW} (dimension, dimension_id, client_id, day)"
+)
+
+flow_metrics_daily = table(
+    FLOW_METRICS_VIEW,
+    column("day", Date),
+    column("dimension", String),
+    column("dimension_id", Integer),
+    column("client_id", Integer),
+    column("throughput", Integer),
+    column("lead_time_hours_sum", Float),
+    column("cycle_time_hours_sum", Float),
+    column("cycle_count", Integer),
+    column("wip", Integer),
+)
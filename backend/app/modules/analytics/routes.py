@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.modules.auth.models import User
+from app.modules.analytics import schemas, services
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+@router.get("/flow", response_model=schemas.FlowMetricsResponse)
+async def flow_metrics(
+    dimension: schemas.FlowDimension = Query("squad"),
+    dimension_id: int | None = Query(None),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Admins see every squad/member/client; gerentes only their squad's members
+    and colaboradores only their own work (see services.get_flow_metrics)."""
+    # Default window: last 12 weeks
+    date_to = date_to or date.today()
+    date_from = date_from or (date_to - timedelta(weeks=12))
+    return await services.get_flow_metrics(
+        db, dimension, date_from, date_to, dimension_id, current_user
+    )
@@ -0,0 +1,22 @@
+from datetime import date
+from typing import Literal
+from pydantic import BaseModel
+
+FlowDimension = Literal["squad", "member", "client"]
+
+
+class FlowWeek(BaseModel):
+    week_start: date
+    dimension_id: int | None
+    dimension_name: str | None = None
+    throughput: int
+    avg_lead_time_hours: float | None
+    avg_cycle_time_hours: float | None
+    avg_wip: float
+
+
+class FlowMetricsResponse(BaseModel):
+    dimension: FlowDimension
+    date_from: date
+    date_to: date
+    weeks: list[FlowWeek]
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, cast, exists, text, Date
+from app.core.database import engine
+from app.modules.analytics.models import (
+    FLOW_METRICS_VIEW, FLOW_METRICS_VIEW_SQL, FLOW_METRICS_INDEX_SQL, flow_metrics_daily,
+)
+from app.modules.clients.models import Client
+from app.modules.auth.models import UserRole
+from app.modules.team.models import MemberSquad, Squad, TeamMember
+from app.shared.scope import get_colaborador_member_id, get_user_scope
+
+_DIMENSION_MODELS = {"squad": Squad, "member": TeamMember, "client": Client}
+
+
+async def create_flow_metrics_view(conn) -> None:
+    # Views created before the member_client rows lack client_id: rebuild them
+    outdated = await conn.scalar(text(
+        "SELECT to_regclass(:view) IS NOT NULL AND NOT EXISTS ("
+        "SELECT 1 FROM pg_attribute WHERE attrelid = to_regclass(:view) "
+        "AND attname = 'client_id' AND NOT attisdropped)"
+    ), {"view": FLOW_METRICS_VIEW})
+    if outdated:
+        await conn.execute(text(f"DROP MATERIALIZED VIEW {FLOW_METRICS_VIEW}"))
+    await conn.execute(text(FLOW_METRICS_VIEW_SQL))
+    await conn.execute(text(FLOW_METRICS_INDEX_SQL))
+
+
+async def refresh_flow_metrics() -> None:
+    """Scheduled job: rebuild the daily flow facts without blocking readers."""
+    async with engine.begin() as conn:
+        await conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {FLOW_METRICS_VIEW}"))
+
+
+async def _visible_member_ids(db: AsyncSession, current_user):
+    """Members whose flow a non-admin may see (None = everyone), following the
+    team scoping: a gerente's squad (themselves without one), a colaborador's own member.
+    """
+    if current_user is None or current_user.role == UserRole.ADMIN:
+        return None
+    if current_user.role == UserRole.GERENTE:
+        scope = await get_user_scope(db, current_user)
+        if scope["squad_id"]:
+            shares_squad = exists().where(
+                MemberSquad.member_id == TeamMember.id,
+                MemberSquad.squad_id == scope["squad_id"],
+            )
+            return select(TeamMember.id).where(
+                (TeamMember.squad_id == scope["squad_id"]) | shares_squad
+            )
+        return [scope["member_id"]] if scope["member_id"] else []
+    member_id = await get_colaborador_member_id(db, current_user)
+    return [member_id] if member_id else []
+
+
+async def get_flow_metrics(
+    db: AsyncSession,
+    dimension: str,
+    date_from: date,
+    date_to: date,
+    dimension_id: int | None = None,
+    current_user=None,
+) -> dict:
+    """Weekly throughput, lead/cycle time and WIP read from the materialized view.
+
+    Scoped users only get the facts of their visible members, summed from the
+    member_client rows and grouped by the requested dimension.
+    """
+    fm = flow_metrics_daily
+    model = _DIMENSION_MODELS[dimension]
+    week = cast(func.date_trunc("week", fm.c.day), Date).label("week_start")
+    member_ids = await _visible_member_ids(db, current_user)
+    response = {"dimension": dimension, "date_from": date_from, "date_to": date_to}
+    if member_ids == []:
+        return {**response, "weeks": []}
+
+    if member_ids is None:
+        key = fm.c.dimension_id
+        source, row_filter = fm, [fm.c.dimension == dimension]
+    else:
+        row_filter = [fm.c.dimension == "member_client", fm.c.dimension_id.in_(member_ids)]
+        if dimension == "squad":
+            key = func.coalesce(TeamMember.squad_id, 0)
+            source = fm.outerjoin(TeamMember, TeamMember.id == fm.c.dimension_id)
+        else:
+            key = fm.c.dimension_id if dimension == "member" else fm.c.client_id
+            source = fm
+    key = key.label("dimension_id")
+    query = (
+        select(
+            key,
+            model.name.label("dimension_name"),
+            week,
+            func.sum(fm.c.throughput).label("throughput"),
+            func.sum(fm.c.lead_time_hours_sum).label("lead_sum"),
+            func.sum(fm.c.cycle_time_hours_sum).label("cycle_sum"),
+            func.sum(fm.c.cycle_count).label("cycle_count"),
+            func.sum(fm.c.wip).label("wip_days"),
+        )
+        .select_from(source)
+        .outerjoin(model, model.id == key)
+        .where(*row_filter, fm.c.day >= date_from, fm.c.day <= date_to)
+        .group_by(key, model.name, week)
+        .order_by(week, key)
+    )
+    if dimension_id is not None:
+        query = query.where(key == dimension_id)
+    result = await db.execute(query)
+
+    weeks = []
+    for row in result.all():
+        throughput = int(row.throughput or 0)
+        cycle_count = int(row.cycle_count or 0)
+        # Days of this week that fall inside the requested range (days without WIP have no rows)
+        bucket_start = max(row.week_start, date_from)
+        bucket_end = min(row.week_start + timedelta(days=6), date_to)
+        days = (bucket_end - bucket_start).days + 1
+        weeks.append({
+            "week_start": row.week_start,
+            "dimension_id": row.dimension_id or None,
+            "dimension_name": row.dimension_name,
+            "throughput": throughput,
+            "avg_lead_time_hours": round(float(row.lead_sum) / throughput, 2) if throughput else None,
+            "avg_cycle_time_hours": round(float(row.cycle_sum) / cycle_count, 2) if cycle_count else None,
+            "avg_wip": round(float(row.wip_days or 0) / days, 2),
+        })
+    return {**response, "weeks": weeks}
@@ -3,6 +3,7 @@ from sqlalchemy import select
 from fastapi import HTTPException, status
 from app.modules.auth.models import User
 from app.modules.auth.schemas import UserCreate, UserUpdate
+from app.shared.scope import invalidate_user_scopes
 from app.core.security import (
     get_password_hash,
     verify_password,
@@ -64,6 +65,9 @@ async def update_user(db: AsyncSession, user_id: int, data: UserUpdate) -> User:
     if new_password:
         user.hashed_password = get_password_hash(new_password)
     await db.commit()
+    if "email" in update_data:
+        # Members may be linked to users by email
+        await invalidate_user_scopes()
     await db.refresh(user)
     return user
 
@@ -0,0 +1,321 @@
+"""Bulk client import from CSV/XLSX (POST /clients/import).
+
+The upload is read row by row (csv module / openpyxl read-only mode), each row
+is validated against ClientCreate and valid rows are upserted in chunks of
+CLIENT_IMPORT_CHUNK_SIZE keyed by the normalized CNPJ. The report goes out as
+NDJSON while the file is being read, so neither the file nor the results are
+held in memory.
+
+Only the columns present in the file are written on update, and blank cells
+keep the current value. End dates follow update_client: a row that sets one
+without a status gets end_date_status, and the expiry job runs once the import
+is done. Blank cells keep the current end date, so an import can't clear it (and
+reset the closing demands); that takes an edit of the client.
+
+The upsert needs uq_clients_cnpj_digits, which is not created while duplicate
+CNPJs exist (see main.py); ensure_upsert_index rejects the import up front.
+"""
+import codecs
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unicodedata
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timezone
+from itertools import islice
+from fastapi import HTTPException, UploadFile
+from openpyxl import load_workbook
+from pydantic import ValidationError
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import DBAPIError
+from starlette.concurrency import run_in_threadpool
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.modules.clients.models import Client
+from app.modules.clients.schemas import ClientCreate
+from app.modules.clients.services import cnpj_digits, end_date_status, process_contract_expiry
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+EXTENSIONS = (".csv", ".xlsx")
+_SNIFF_BYTES = 64 * 1024
+
+# Normalized header (lowercase, no accents) -> ClientCreate field
+HEADER_ALIASES = {
+    **{field.replace("_", " "): field for field in ClientCreate.model_fields},
+    "nome": "name",
+    "nome fantasia": "name",
+    "cliente": "name",
+    "razao social": "company",
+    "empresa": "company",
+    "responsavel": "responsible_name",
+    "nome do responsavel": "responsible_name",
+    "celular": "phone",
+    "celular responsavel": "phone",
+    "telefone": "phone",
+    "nicho": "segment",
+    "segmento": "segment",
+    "observacoes": "notes",
+    "site": "website",
+    "inicio do contrato": "start_date",
+    "data inicio": "start_date",
+    "fim do contrato": "end_date",
+    "data fim": "end_date",
+    "valor mensal": "monthly_value",
+    "fidelidade": "min_contract_months",
+    "fidelidade meses": "min_contract_months",
+    "custo operacional": "operational_cost",
+    "saude": "health_score",
+}
+STATUS_ALIASES = {
+    "ativo": "active",
+    "inativo": "inactive",
+    "encerrado": "inactive",
+    "em onboarding": "onboarding",
+    "encerrando": "churned",
+}
+_DATE_FIELDS = {"start_date", "end_date"}
+_DECIMAL_FIELDS = {"monthly_value", "operational_cost", "health_score"}
+_TEXT_FIELDS = {
+    "name", "company", "cnpj", "responsible_name", "phone", "email", "segment",
+    "instagram", "website", "notes",
+}
+
+
+def _normalize_header(value) -> str:
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode()
+    for char in "_-/().:":
+        text = text.replace(char, " ")
+    return " ".join(text.lower().split())
+
+
+def _cell(field: str, value):
+    """Spreadsheet cell -> value ClientCreate accepts (None for blanks)."""
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+    if value is None:
+        return None
+    if field in _TEXT_FIELDS:
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if field == "cnpj" and isinstance(value, int):
+            return str(value).zfill(14)  # Excel drops the leading zeros
+        return str(value)
+    if field in _DATE_FIELDS:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str) and "/" in value:
+            try:
+                return datetime.strptime(value, "%d/%m/%Y").date()
+            except ValueError:
+                return value  # let validation report it
+    if field in _DECIMAL_FIELDS and isinstance(value, str):
+        value = value.replace("R$", "").replace(" ", "")
+        if "," in value:
+            value = value.replace(".", "").replace(",", ".")
+    if field == "status" and isinstance(value, str):
+        value = value.lower()
+        return STATUS_ALIASES.get(value, value)
+    return value
+
+
+def _csv_rows(path: str) -> Iterator[list]:
+    with open(path, "rb") as raw:
+        sample = raw.read(_SNIFF_BYTES)
+    try:
+        # Incremental: the sample may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(sample)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        encoding = "cp1252"  # Excel "CSV" on Windows
+    text = sample.decode(encoding, errors="ignore")
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    with open(path, newline="", encoding=encoding, errors="replace") as f:
+        yield from csv.reader(f, dialect)
+
+
+def _xlsx_rows(path: str) -> Iterator[list]:
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+async def ensure_upsert_index(db: AsyncSession) -> None:
+    """409 when the CNPJ unique index the upsert relies on is missing."""
+    exists = await db.scalar(text("SELECT to_regclass('uq_clients_cnpj_digits') IS NOT NULL"))
+    if not exists:
+        raise HTTPException(
+            status_code=409,
+            detail="Importação indisponível: existem clientes com CNPJ duplicado",
+        )
+
+
+async def spool_upload(file: UploadFile) -> str:
+    """Copy the upload to a temp file owned by the import (the UploadFile is closed
+    before a streamed response runs). Returns its path."""
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Formato não suportado (use CSV ou XLSX)")
+
+    def _copy() -> str:
+        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
+            shutil.copyfileobj(file.file, tmp)
+        return tmp.name
+
+    return await run_in_threadpool(_copy)
+
+
+def _line(data: dict) -> str:
+    return json.dumps(data, default=str) + "\n"
+
+
+async def _upsert_chunk(
+    pending: list[tuple[int, ClientCreate, str]], fields: list[str], user_id: int
+) -> list[dict]:
+    """Upsert one chunk in its own transaction; the row reports, in file order."""
+    now = datetime.now(timezone.utc)
+    # Status has no blank value to coalesce, so rows without it are written separately
+    groups = (
+        ([p for p in pending if "status" in p[1].model_fields_set],
+         list(dict.fromkeys([*fields, "status"]))),
+        ([p for p in pending if "status" not in p[1].model_fields_set],
+         [f for f in fields if f != "status"]),
+    )
+    results: dict[str, tuple[int, bool]] = {}
+    async with AsyncSessionLocal() as db:
+        try:
+            for group, columns in groups:
+                if not group:
+                    continue
+                stmt = insert(Client).values([
+                    {
+                        **{f: getattr(data, f) for f in columns},
+                        "created_by_id": user_id,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for _, data, _ in group
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Client.cnpj_digits],
+                    set_={
+                        **{
+                            f: func.coalesce(stmt.excluded[f], getattr(Client, f))
+                            for f in columns if f != "status"
+                        },
+                        **({"status": stmt.excluded.status} if "status" in columns else {}),
+                        "updated_at": now,
+                    },
+                ).returning(
+                    Client.id, Client.cnpj_digits, literal_column("xmax = 0").label("created")
+                )
+                result = await db.execute(stmt)
+                results.update({row.cnpj_digits: (row.id, row.created) for row in result.all()})
+            await db.commit()
+        except DBAPIError:
+            await db.rollback()
+            logger.exception("Client import chunk failed")
+            return [
+                {"row": row, "status": "error", "client_id": None, "cnpj": digits,
+                 "errors": ["Falha ao gravar o lote"]}
+                for row, _, digits in pending
+            ]
+    reports = []
+    for row, _, digits in pending:
+        client_id, created = results[digits]
+        reports.append({
+            "row": row, "status": "created" if created else "updated",
+            "client_id": client_id, "cnpj": digits, "errors": [],
+        })
+    return reports
+
+
+async def import_clients(path: str, user_id: int) -> AsyncIterator[str]:
+    """NDJSON report: one line per data row (row = spreadsheet line number), then
+    {"summary": {...}}. Removes the spooled file when done."""
+    totals = {"created": 0, "updated": 0, "invalid": 0, "error": 0}
+    try:
+        rows = _xlsx_rows(path) if path.endswith(".xlsx") else _csv_rows(path)
+        header = await run_in_threadpool(next, rows, None)
+        columns = [HEADER_ALIASES.get(_normalize_header(h)) for h in header or []]
+        fields = [f for f in dict.fromkeys(columns) if f]
+        missing = [f for f in ("name", "cnpj") if f not in fields]
+        if missing:
+            yield _line({"summary": {
+                **totals, "errors": [f"Coluna obrigatória ausente: {f}" for f in missing],
+            }})
+            return
+
+        line_number = 1
+        has_end_dates = False
+        pending: list[tuple[int, ClientCreate, str]] = []
+        pending_cnpjs: set[str] = set()
+
+        async def flush() -> AsyncIterator[str]:
+            for report in await _upsert_chunk(pending, fields, user_id):
+                totals[report["status"]] += 1
+                yield _line(report)
+            pending.clear()
+            pending_cnpjs.clear()
+
+        while batch := await run_in_threadpool(
+            lambda: list(islice(rows, settings.CLIENT_IMPORT_CHUNK_SIZE))
+        ):
+            for values in batch:
+                line_number += 1
+                if all(v is None or v == "" for v in values):
+                    continue
+                raw = {}
+                for field, value in zip(columns, values):
+                    if field and field not in raw:
+                        value = _cell(field, value)
+                        if value is not None:
+                            raw[field] = value
+                digits = cnpj_digits(raw.get("cnpj"))
+                try:
+                    data = ClientCreate.model_validate(raw)
+                    errors = [] if digits else ["cnpj: obrigatório na importação"]
+                except ValidationError as exc:
+                    errors = [
+                        f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()
+                    ]
+                if errors:
+                    totals["invalid"] += 1
+                    yield _line({"row": line_number, "status": "invalid", "client_id": None,
+                                 "cnpj": digits, "errors": errors})
+                    continue
+                if data.end_date:
+                    has_end_dates = True
+                    if "status" not in data.model_fields_set:
+                        data.status = end_date_status(data.end_date)
+                # The same CNPJ can't be upserted twice by one statement
+                if digits in pending_cnpjs:
+                    async for line in flush():
+                        yield line
+                pending.append((line_number, data, digits))
+                pending_cnpjs.add(digits)
+                if len(pending) >= settings.CLIENT_IMPORT_CHUNK_SIZE:
+                    async for line in flush():
+                        yield line
+        async for line in flush():
+            yield line
+        if has_end_dates:
+            # Closing demands without waiting for the next scheduled run
+            await process_contract_expiry()
+        yield _line({"summary": {**totals, "errors": []}})
+    finally:
+        os.remove(path)
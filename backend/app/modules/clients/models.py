@@ -1,6 +1,9 @@
 import enum
 from datetime import datetime, date, timezone
-from sqlalchemy import String, Text, Enum, DateTime, Date, Integer, ForeignKey, Numeric, Float
+from sqlalchemy import (
+    String, Text, Enum, DateTime, Date, Integer, ForeignKey, Numeric, Float, Index, Computed,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 
@@ -12,14 +15,27 @@ class ClientStatus(str, enum.Enum):
     CHURNED = "churned"
 
 
+# CNPJ without punctuation; NULL when there are no digits
+CNPJ_DIGITS_SQL = "NULLIF(regexp_replace(cnpj, '[^0-9]', '', 'g'), '')"
+
+
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Contract-expiry job: only clients with an end date
+        Index("ix_clients_end_date", "end_date", postgresql_where=text("end_date IS NOT NULL")),
+        # One client per CNPJ, however it was typed (imports upsert on it)
+        Index("uq_clients_cnpj_digits", "cnpj_digits", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     # Core identity
     name: Mapped[str] = mapped_column(String(255), index=True)         # Nome Fantasia
     company: Mapped[str] = mapped_column(String(255), nullable=True)   # Razao Social
     cnpj: Mapped[str] = mapped_column(String(20), nullable=True)
+    cnpj_digits: Mapped[str] = mapped_column(
+        String(20), Computed(CNPJ_DIGITS_SQL, persisted=True), nullable=True
+    )
     responsible_name: Mapped[str] = mapped_column(String(255), nullable=True)
     # Contact
     phone: Mapped[str] = mapped_column(String(50), nullable=True)      # Celular Responsavel
@@ -37,6 +53,10 @@ class Client(Base):
     # Contract dates
     start_date: Mapped[date] = mapped_column(Date, nullable=True)
     end_date: Mapped[date] = mapped_column(Date, nullable=True)
+    # Set by the contract-expiry job once the closing demands exist
+    closing_demands_created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
     # Financial (admin only)
     monthly_value: Mapped[float] = mapped_column(Numeric(10, 2), nullable=True)
     min_contract_months: Mapped[int] = mapped_column(Integer, nullable=True)
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import get_current_user, require_role
-from app.modules.auth.models import User
-from app.modules.clients import schemas, services
+from app.modules.auth.models import User, UserRole
+from app.modules.clients import importer, schemas, services
+from app.modules.jobs.schemas import JobResponse
+from app.modules.jobs.services import run_job
+from app.shared.etag import etag_response
+from app.shared.health import get_health_series
 
 router = APIRouter(prefix="/clients", tags=["Clientes"])
 
@@ -25,6 +30,21 @@ async def create_client(
     return await services.create_client(db, data, current_user.id)
 
 
+@router.post("/import")
+async def import_clients(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin", "gerente")),
+):
+    """Upsert clients from a CSV/XLSX, matched by CNPJ. The report is streamed as
+    NDJSON: one line per row, then a summary line."""
+    await importer.ensure_upsert_index(db)
+    path = await importer.spool_upload(file)
+    return StreamingResponse(
+        importer.import_clients(path, current_user.id), media_type="application/x-ndjson"
+    )
+
+
 @router.get("", response_model=list[schemas.ClientResponse])
 async def list_clients(
     status: str | None = Query(None),
@@ -45,20 +65,51 @@ async def get_client(
     return await services.get_client_detail(db, client_id)
 
 
+@router.get("/{client_id}/overview", response_model=schemas.ClientOverview)
+async def get_client_overview(
+    client_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    # Costs follow GET /financial/clients/{id}; the ETag is per payload, so it varies too
+    include_costs = current_user.role in (UserRole.ADMIN, UserRole.GERENTE)
+    data = await services.get_client_overview(client_id, include_costs)
+    return etag_response(request, schemas.ClientOverview.model_validate(data))
+
+
+@router.get("/{client_id}/health", response_model=list[schemas.HealthSeriesPoint])
+async def get_client_health(
+    client_id: int,
+    days: int = Query(180, ge=1, le=730),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await get_health_series(db, client_id, days)
+
+
 @router.patch("/{client_id}", response_model=schemas.ClientResponse)
 async def update_client(
     client_id: int,
     data: schemas.ClientUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_role("admin", "gerente")),
 ):
-    return await services.update_client(db, client_id, data)
+    client = await services.update_client(db, client_id, data)
+    if data.end_date:
+        # Closing demands without waiting for the next scheduled run
+        background_tasks.add_task(services.process_contract_expiry)
+    return client
 
 
-@router.delete("/{client_id}", status_code=204)
+@router.delete("/{client_id}", response_model=JobResponse, status_code=202)
 async def delete_client(
     client_id: int,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_role("admin")),
 ):
-    await services.delete_client(db, client_id)
+    """Deletion runs in the background; follow it at GET /jobs/{id}."""
+    job = await services.delete_client(db, client_id, current_user.id)
+    background_tasks.add_task(run_job, job.id)
+    return job
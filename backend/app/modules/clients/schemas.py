@@ -1,6 +1,7 @@
 from datetime import datetime, date
 from pydantic import BaseModel
 from app.modules.clients.models import ClientStatus
+from app.modules.financial.schemas import ClientCostSummary
 
 
 class ClientCreate(BaseModel):
@@ -85,3 +86,36 @@ class ClientDetail(ClientResponse):
     demands_count: int = 0
     active_demands_count: int = 0
     active_days: int | None = None
+
+
+class MeetingSummary(BaseModel):
+    id: int
+    meeting_type: str
+    member_name: str | None = None
+    health_score: float | None
+    notes: str | None
+    created_at: datetime
+
+
+class HealthPoint(BaseModel):
+    date: datetime
+    health_score: float
+
+
+class HealthSeriesPoint(BaseModel):
+    day: date
+    health_score: float
+    avg_7d: float
+    avg_30d: float
+    avg_90d: float
+    slope_30d: float | None = None  # points per day
+
+
+class ClientOverview(BaseModel):
+    client: ClientResponse
+    active_allocations: list[AllocationInClient] = []
+    open_demands_by_status: dict[str, int] = {}
+    recent_meetings: list[MeetingSummary] = []
+    health_trend: list[HealthPoint] = []
+    current_month_costs: ClientCostSummary | None = None  # admin/gerente only
+    approved_designs: int = 0
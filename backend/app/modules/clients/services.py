@@ -1,15 +1,54 @@
+import asyncio
+import os
+import re
+import shutil
 from datetime import date, datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, delete as sa_delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, insert, or_, update, delete as sa_delete
 from fastapi import HTTPException
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.concurrency import one, rows, run_concurrently, scalar
+from app.core.partitioning import archive_table
 from app.modules.clients.models import Client, ClientStatus
 from app.modules.clients.schemas import ClientCreate, ClientUpdate
-from app.modules.demands.models import Demand, DemandHistory, DemandStatus, DemandPriority, KanbanColumn
+from app.modules.demands.models import (
+    Demand, DemandComment, DemandHistory, DemandStatus, DemandPriority, KanbanColumn,
+)
+from app.modules.design.models import (
+    DesignAttachment, DesignComment, DesignDemand, DesignHistory, DesignPayment,
+)
+from app.modules.design.services import UPLOAD_DIR, release_blobs
+from app.modules.financial.services import get_client_costs
+from app.modules.jobs.models import BackgroundJob
+from app.modules.jobs.services import enqueue_job, progress_update, register_handler
+from app.modules.meetings.models import ClientMeeting
 from app.modules.team.models import TeamAllocation, TeamMember
+from app.shared.scope import invalidate_user_scopes
+
+settings = get_settings()
+
+
+def cnpj_digits(cnpj: str | None) -> str | None:
+    """CNPJ as stored in clients.cnpj_digits (see CNPJ_DIGITS_SQL)."""
+    return re.sub(r"[^0-9]", "", cnpj or "") or None
+
+
+async def _check_cnpj_available(
+    db: AsyncSession, cnpj: str | None, exclude_id: int | None = None
+) -> None:
+    digits = cnpj_digits(cnpj)
+    if not digits:
+        return
+    query = select(Client.id).where(Client.cnpj_digits == digits)
+    if exclude_id is not None:
+        query = query.where(Client.id != exclude_id)
+    if await db.scalar(query.limit(1)):
+        raise HTTPException(status_code=400, detail="CNPJ já cadastrado")
 
 
 async def create_client(db: AsyncSession, data: ClientCreate, user_id: int) -> Client:
+    await _check_cnpj_available(db, data.cnpj)
     client = Client(**data.model_dump(), created_by_id=user_id)
     db.add(client)
     await db.commit()
@@ -44,46 +83,58 @@ async def get_niches(db: AsyncSession) -> list[str]:
 
 
 async def get_client_by_id(db: AsyncSession, client_id: int) -> Client:
-    result = await db.execute(
-        select(Client)
-        .where(Client.id == client_id)
-        .options(selectinload(Client.allocations), selectinload(Client.demands))
-    )
+    result = await db.execute(select(Client).where(Client.id == client_id))
     client = result.scalar_one_or_none()
     if not client:
         raise HTTPException(status_code=404, detail="Cliente nao encontrado")
     return client
 
 
-async def get_client_detail(db: AsyncSession, client_id: int) -> dict:
-    client = await get_client_by_id(db, client_id)
+def _client_to_dict(client: Client) -> dict:
+    client_dict = {c.key: getattr(client, c.key) for c in Client.__table__.columns}
+    # Convert Decimal to float for financial fields
+    for field in ("monthly_value", "operational_cost"):
+        if client_dict.get(field) is not None:
+            client_dict[field] = float(client_dict[field])
+    return client_dict
 
-    # Enrich allocations with member info (fixes crash)
-    enriched_allocations = []
-    for alloc in client.allocations:
-        member_result = await db.execute(
-            select(TeamMember).where(TeamMember.id == alloc.member_id)
+
+def _client_allocations_query(client_id: int):
+    """Allocations of a client joined with member name/role."""
+    return (
+        select(
+            TeamAllocation.id,
+            TeamAllocation.member_id,
+            func.coalesce(TeamMember.name, "").label("member_name"),
+            func.coalesce(TeamMember.role_title, "").label("role_title"),
+            func.coalesce(TeamAllocation.monthly_value, 0).label("monthly_value"),
+            TeamAllocation.start_date,
+            TeamAllocation.end_date,
         )
-        member = member_result.scalar_one_or_none()
-        enriched_allocations.append({
-            "id": alloc.id,
-            "member_id": alloc.member_id,
-            "member_name": member.name if member else "",
-            "role_title": member.role_title if member else "",
-            "monthly_value": float(alloc.monthly_value or 0),
-            "start_date": alloc.start_date,
-            "end_date": alloc.end_date,
-        })
-
-    demands_count = await db.execute(
-        select(func.count(Demand.id)).where(Demand.client_id == client_id)
+        .outerjoin(TeamMember, TeamMember.id == TeamAllocation.member_id)
+        .where(TeamAllocation.client_id == client_id)
+        .order_by(TeamAllocation.start_date, TeamAllocation.id)
     )
-    active_demands = await db.execute(
-        select(func.count(Demand.id)).where(
-            Demand.client_id == client_id,
-            Demand.status.not_in([DemandStatus.DONE]),
-        )
+
+
+def _allocation_rows_to_dicts(allocation_rows) -> list[dict]:
+    return [
+        {**row._mapping, "monthly_value": float(row.monthly_value)} for row in allocation_rows
+    ]
+
+
+async def get_client_detail(db: AsyncSession, client_id: int) -> dict:
+    demand_counts_q = select(
+        func.count(Demand.id).label("total"),
+        func.count(Demand.id).filter(Demand.status != DemandStatus.DONE).label("active"),
+    ).where(Demand.client_id == client_id)
+    # Client, allocations (with member fields) and demand counts are independent reads
+    client, allocation_rows, demand_counts = await run_concurrently(
+        lambda session: get_client_by_id(session, client_id),
+        rows(_client_allocations_query(client_id)),
+        one(demand_counts_q),
     )
+    allocations = _allocation_rows_to_dicts(allocation_rows)
 
     # Calculate active project days
     active_days = None
@@ -92,65 +143,155 @@ async def get_client_detail(db: AsyncSession, client_id: int) -> dict:
         end = client.end_date if client.end_date and client.end_date < today else today
         active_days = (end - client.start_date).days
 
-    client_dict = {c.key: getattr(client, c.key) for c in Client.__table__.columns}
-    # Convert Decimal to float for financial fields
-    for field in ("monthly_value", "operational_cost"):
-        if client_dict.get(field) is not None:
-            client_dict[field] = float(client_dict[field])
-
     return {
-        **client_dict,
-        "allocations": enriched_allocations,
-        "demands_count": demands_count.scalar() or 0,
-        "active_demands_count": active_demands.scalar() or 0,
+        **_client_to_dict(client),
+        "allocations": allocations,
+        "demands_count": demand_counts.total,
+        "active_demands_count": demand_counts.active,
         "active_days": active_days,
     }
 
 
-async def _create_encerramento_demands(
-    db: AsyncSession, client: Client
-) -> None:
-    """Create ENCERRAMENTO DO CONTRATO demands for all active allocations."""
-    # Avoid duplicates: skip if already exists
-    existing = await db.execute(
-        select(func.count(Demand.id)).where(
-            Demand.client_id == client.id,
-            Demand.title.ilike("ENCERRAMENTO DO CONTRATO%"),
+RECENT_MEETINGS = 10
+
+
+async def get_client_overview(client_id: int, include_costs: bool = False) -> dict:
+    """Everything the client screen shows, gathered concurrently: core fields, active
+    allocations, open demands by status, recent meetings with their health scores,
+    current-month costs and the number of approved design pieces.
+
+    Costs are financial data (GET /financial/clients/{id} is admin/gerente only), so
+    they are None unless include_costs.
+    """
+    today = date.today()
+    open_by_status_q = (
+        select(Demand.status, func.count(Demand.id))
+        .where(Demand.client_id == client_id, Demand.status != DemandStatus.DONE)
+        .group_by(Demand.status)
+    )
+    meetings_q = (
+        select(
+            ClientMeeting.id, ClientMeeting.meeting_type, TeamMember.name.label("member_name"),
+            ClientMeeting.health_score, ClientMeeting.notes, ClientMeeting.created_at,
         )
+        .outerjoin(TeamMember, TeamMember.id == ClientMeeting.member_id)
+        .where(ClientMeeting.client_id == client_id)
+        .order_by(ClientMeeting.created_at.desc())
+        .limit(RECENT_MEETINGS)
     )
-    if (existing.scalar() or 0) > 0:
-        return
+    approved_designs_q = select(func.count(DesignDemand.id)).where(
+        DesignDemand.client_id == client_id, DesignDemand.approved_at.isnot(None)
+    )
+    reads = [
+        lambda session: get_client_by_id(session, client_id),
+        rows(_client_allocations_query(client_id).where(TeamAllocation.active_on(today))),
+        rows(open_by_status_q),
+        rows(meetings_q),
+        scalar(approved_designs_q),
+    ]
+    if include_costs:
+        reads.append(
+            lambda session: get_client_costs(session, client_id, today.month, today.year)
+        )
+    client, allocation_rows, status_rows, meeting_rows, approved_designs, *costs = (
+        await run_concurrently(*reads)
+    )
+
+    meetings = [
+        {**row._mapping, "meeting_type": row.meeting_type.value} for row in meeting_rows
+    ]
+    return {
+        "client": _client_to_dict(client),
+        "active_allocations": _allocation_rows_to_dicts(allocation_rows),
+        "open_demands_by_status": {status.value: count for status, count in status_rows},
+        "recent_meetings": meetings,
+        # Oldest first, meetings that recorded a score only
+        "health_trend": [
+            {"date": m["created_at"], "health_score": m["health_score"]}
+            for m in reversed(meetings) if m["health_score"] is not None
+        ],
+        "current_month_costs": costs[0] if costs else None,
+        "approved_designs": approved_designs or 0,
+    }
 
-    # Get default column ("A Fazer" or first available)
-    col_result = await db.execute(
-        select(KanbanColumn).order_by(KanbanColumn.order).limit(2)
+
+CLOSING_DEMAND_TITLE = "ENCERRAMENTO DO CONTRATO - {name}"
+
+
+async def expire_contracts(db: AsyncSession) -> dict:
+    """Create the closing demands of clients that got an end date (one per active
+    allocation, in bulk) and move CHURNED clients to INACTIVE once the end date arrives.
+    Clients are claimed through their flag, so concurrent runs never duplicate demands.
+    """
+    now = datetime.now(timezone.utc)
+    today = now.date()
+    claimed = await db.execute(
+        update(Client)
+        .where(Client.end_date.isnot(None), Client.closing_demands_created_at.is_(None))
+        # Bookkeeping only: keep updated_at as the last user edit
+        .values(closing_demands_created_at=now, updated_at=Client.updated_at)
+        .returning(Client.id, Client.name)
+        .execution_options(synchronize_session=False)
     )
-    cols = col_result.scalars().all()
-    col = next((c for c in cols if "fazer" in c.name.lower()), cols[0] if cols else None)
+    closing = {row.id: row.name for row in claimed.all()}
 
-    # Get active allocations
-    today = date.today()
-    alloc_result = await db.execute(
-        select(TeamAllocation).where(
-            TeamAllocation.client_id == client.id,
-            or_(TeamAllocation.end_date.is_(None), TeamAllocation.end_date >= today),
+    created = 0
+    if closing:
+        # Default column ("A Fazer" or first available)
+        col_result = await db.execute(
+            select(KanbanColumn.id, KanbanColumn.name).order_by(KanbanColumn.order).limit(2)
         )
-    )
-    allocs = alloc_result.scalars().all()
-
-    for alloc in allocs:
-        demand = Demand(
-            title=f"ENCERRAMENTO DO CONTRATO - {client.name}",
-            priority=DemandPriority.URGENT,
-            status=DemandStatus.TODO,
-            client_id=client.id,
-            assigned_to_id=alloc.member_id,
-            column_id=col.id if col else None,
-            created_at=datetime.now(timezone.utc),
-            updated_at=datetime.now(timezone.utc),
+        cols = col_result.all()
+        col = next((c for c in cols if "fazer" in c.name.lower()), cols[0] if cols else None)
+        allocs = await db.execute(
+            select(TeamAllocation.client_id, TeamAllocation.member_id).where(
+                TeamAllocation.client_id.in_(list(closing)),
+                TeamAllocation.overlapping(today),
+            )
         )
-        db.add(demand)
+        demands = [
+            {
+                "title": CLOSING_DEMAND_TITLE.format(name=closing[client_id]),
+                "priority": DemandPriority.URGENT,
+                "status": DemandStatus.TODO,
+                "client_id": client_id,
+                "assigned_to_id": member_id,
+                "column_id": col.id if col else None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for client_id, member_id in allocs.all()
+        ]
+        if demands:
+            await db.execute(insert(Demand).values(demands))
+        created = len(demands)
+
+    ended = await db.execute(
+        update(Client)
+        .where(
+            Client.end_date.isnot(None),
+            Client.end_date <= today,
+            Client.status == ClientStatus.CHURNED,
+        )
+        .values(status=ClientStatus.INACTIVE)
+        .returning(Client.id)
+        .execution_options(synchronize_session=False)
+    )
+    inactivated = len(ended.all())
     await db.commit()
+    return {"clients_closing": len(closing), "demands_created": created, "inactivated": inactivated}
+
+
+async def process_contract_expiry() -> None:
+    """Scheduled job; also kicked after a PATCH that sets an end date."""
+    async with AsyncSessionLocal() as db:
+        await expire_contracts(db)
+
+
+def end_date_status(end_date: date) -> ClientStatus:
+    """Auto-status when an end date is set without a status: CHURNED (notice period)
+    until the end date, INACTIVE from then on (closing demands: see expire_contracts)."""
+    return ClientStatus.CHURNED if end_date > date.today() else ClientStatus.INACTIVE
 
 
 async def update_client(
@@ -158,42 +299,116 @@ async def update_client(
 ) -> Client:
     client = await get_client_by_id(db, client_id)
     update_data = data.model_dump(exclude_unset=True)
+    if update_data.get("cnpj"):
+        await _check_cnpj_available(db, update_data["cnpj"], exclude_id=client_id)
 
     end_date_set = "end_date" in update_data and update_data["end_date"]
 
-    # Auto-status logic: when end_date is set, status becomes CHURNED (notice period)
     if end_date_set:
-        today = date.today()
         if "status" not in update_data:
-            if update_data["end_date"] >= today:
-                update_data["status"] = ClientStatus.CHURNED
-            else:
-                update_data["status"] = ClientStatus.INACTIVE
+            update_data["status"] = end_date_status(update_data["end_date"])
+    elif "end_date" in update_data:
+        # Contract renewed: a future end date gets its own closing demands
+        update_data["closing_demands_created_at"] = None
 
     for field, value in update_data.items():
         setattr(client, field, value)
     await db.commit()
     await db.refresh(client)
 
-    # Auto-create encerramento demands after commit (so client.name is updated)
-    if end_date_set:
-        await _create_encerramento_demands(db, client)
-
     return client
 
 
-async def delete_client(db: AsyncSession, client_id: int) -> None:
-    # Load WITHOUT selectinload to avoid SQLAlchemy trying to nullify FK on in-memory objects
-    result = await db.execute(select(Client).where(Client.id == client_id))
-    client = result.scalar_one_or_none()
-    if not client:
-        raise HTTPException(status_code=404, detail="Cliente nao encontrado")
-    # Delete child records in dependency order (FK NO ACTION constraints)
-    # 1. DemandHistory → Demand → Client
-    demand_ids = select(Demand.id).where(Demand.client_id == client_id).scalar_subquery()
-    await db.execute(sa_delete(DemandHistory).where(DemandHistory.demand_id.in_(demand_ids)))
-    await db.execute(sa_delete(Demand).where(Demand.client_id == client_id))
-    await db.execute(sa_delete(TeamAllocation).where(TeamAllocation.client_id == client_id))
-    await db.flush()
-    await db.delete(client)
+CLIENT_DELETION = "client_deletion"
+
+
+async def delete_client(db: AsyncSession, client_id: int, user_id: int) -> BackgroundJob:
+    """Queue the removal of a client and everything attached to it (see _purge_client)."""
+    await get_client_by_id(db, client_id)
+    return await enqueue_job(db, CLIENT_DELETION, client_id, user_id)
+
+
+def _remove_files(paths: list[str], dirs: list[str] = ()) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    for directory in dirs:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+async def _purge_client(db: AsyncSession, job_id: int, client_id: int) -> None:
+    """Delete a client's dependents in FK order, DELETION_BATCH_SIZE rows per transaction,
+    then the client itself. Safe to re-run: every step deletes whatever is left.
+    """
+    design_ids = select(DesignDemand.id).where(DesignDemand.client_id == client_id)
+    demand_ids = select(Demand.id).where(Demand.client_id == client_id)
+    design_history = archive_table(DesignHistory.__table__)
+    demand_history = archive_table(DemandHistory.__table__)
+    attachments = DesignAttachment.__table__
+
+    # (step, table, filter); attachments and design demands also clean files on disk
+    steps = [
+        ("design_attachments", attachments, attachments.c.demand_id.in_(design_ids)),
+        ("design_comments", DesignComment.__table__, DesignComment.demand_id.in_(design_ids)),
+        ("design_history", DesignHistory.__table__, DesignHistory.demand_id.in_(design_ids)),
+        ("design_history_archive", design_history, design_history.c.demand_id.in_(design_ids)),
+        ("design_payments", DesignPayment.__table__, or_(
+            DesignPayment.client_id == client_id, DesignPayment.demand_id.in_(design_ids)
+        )),
+        ("design_demands", DesignDemand.__table__, DesignDemand.client_id == client_id),
+        ("demand_comments", DemandComment.__table__, DemandComment.demand_id.in_(demand_ids)),
+        ("demand_history", DemandHistory.__table__, DemandHistory.demand_id.in_(demand_ids)),
+        ("demand_history_archive", demand_history, demand_history.c.demand_id.in_(demand_ids)),
+        ("demands", Demand.__table__, Demand.client_id == client_id),
+        ("team_allocations", TeamAllocation.__table__, TeamAllocation.client_id == client_id),
+        ("client_meetings", ClientMeeting.__table__, ClientMeeting.client_id == client_id),
+    ]
+
+    totals = await db.execute(select(*[
+        select(func.count()).select_from(table).where(where).scalar_subquery().label(name)
+        for name, table, where in steps
+    ]))
+    counts = totals.one()._mapping
+    progress = {
+        "current": None,
+        "steps": {name: {"total": counts[name], "deleted": 0} for name, _, _ in steps},
+    }
+
+    for name, table, where in steps:
+        progress["current"] = name
+        returning = [table.c.id]
+        if table is attachments:
+            returning += [attachments.c.file_path, attachments.c.blob_sha256]
+        while True:
+            batch = select(table.c.id).where(where).limit(settings.DELETION_BATCH_SIZE)
+            result = await db.execute(
+                sa_delete(table).where(table.c.id.in_(batch.scalar_subquery())).returning(*returning)
+            )
+            deleted = result.all()
+            if not deleted:
+                break
+            progress["steps"][name]["deleted"] += len(deleted)
+            if table is attachments:
+                # Shared content stays while other attachments still use it
+                unused = await release_blobs(db, [row.blob_sha256 for row in deleted])
+                unused += [row.file_path for row in deleted if not row.blob_sha256]
+            await db.execute(progress_update(job_id, progress))
+            await db.commit()
+            # Files go only once their rows are gone for good
+            if table is attachments:
+                await asyncio.to_thread(_remove_files, unused)
+            elif name == "design_demands":
+                await asyncio.to_thread(
+                    _remove_files, [], [os.path.join(UPLOAD_DIR, str(row.id)) for row in deleted]
+                )
+
+    progress["current"] = "client"
+    await db.execute(sa_delete(Client.__table__).where(Client.id == client_id))
+    await db.execute(progress_update(job_id, progress))
     await db.commit()
+    await invalidate_user_scopes()
+
+
+register_handler(CLIENT_DELETION, _purge_client)
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
-    String, Text, Enum, DateTime, Integer, ForeignKey, JSON
+    String, Text, Enum, DateTime, Integer, ForeignKey, JSON, Index
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
@@ -104,9 +104,10 @@ class Demand(Base):
 
 
 class DemandHistory(Base):
+    """Column moves, range-partitioned by month on created_at (see core.partitioning)."""
     __tablename__ = "demand_history"
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
     demand_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("demands.id")
     )
@@ -117,11 +118,17 @@ class DemandHistory(Base):
     )
     note: Mapped[str] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+        DateTime(timezone=True), primary_key=True,
+        default=lambda: datetime.now(timezone.utc),
     )
 
     demand = relationship("Demand", back_populates="history")
 
+    __table_args__ = (
+        Index("ix_demand_history_demand_created", "demand_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
 
 class DemandComment(Base):
     __tablename__ = "demand_comments"
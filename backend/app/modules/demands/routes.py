@@ -1,32 +1,15 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.core.database import get_db
 from app.core.security import get_current_user, require_role
 from app.modules.auth.models import User
 from app.modules.demands import schemas, services
-from app.modules.team.models import TeamMember
+from app.shared.fieldsets import parse_fields, sparse_response
+from app.shared.scope import get_colaborador_member_id
 
 router = APIRouter(prefix="/demands", tags=["Demandas"])
 
 
-async def _get_member_id_for_colaborador(db: AsyncSession, user: User) -> int | None:
-    """For colaborador role, find their team member ID by user_id or email."""
-    if user.role != "colaborador":
-        return None
-    result = await db.execute(
-        select(TeamMember).where(TeamMember.user_id == user.id)
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        # Try matching by email as fallback
-        result2 = await db.execute(
-            select(TeamMember).where(TeamMember.email == user.email)
-        )
-        member = result2.scalar_one_or_none()
-    return member.id if member else None
-
-
 # === Kanban Columns ===
 @router.post("/columns", response_model=schemas.KanbanColumnResponse, status_code=201)
 async def create_column(
@@ -67,13 +50,37 @@ async def delete_column(
 # === Board ===
 @router.get("/board", response_model=schemas.KanbanBoardResponse)
 async def get_board(
-    client_id: int | None = Query(None),
+    filters: schemas.BoardFilters = Depends(),
+    limit: int = Query(services.BOARD_PAGE_SIZE, ge=1, le=200),
+    fields: str | None = Query(None, description="Sparse fieldset, or 'card'"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    field_list = parse_fields(fields, services.SPARSE_FIELDS, services.CARD_FIELDS)
     # Colaborador only sees their own demands on the board
-    member_id = await _get_member_id_for_colaborador(db, current_user)
-    return await services.get_kanban_board(db, client_id, assigned_to_id=member_id)
+    member_id = await get_colaborador_member_id(db, current_user)
+    board = await services.get_kanban_board(
+        db, filters, assigned_to_id=member_id, limit=limit, fields=field_list
+    )
+    return sparse_response(board) if field_list else board
+
+
+@router.get("/board/columns/{column_id}", response_model=schemas.BoardColumnPage)
+async def get_board_column(
+    column_id: int,
+    cursor: str | None = Query(None),
+    limit: int = Query(services.BOARD_PAGE_SIZE, ge=1, le=200),
+    filters: schemas.BoardFilters = Depends(),
+    fields: str | None = Query(None, description="Sparse fieldset, or 'card'"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    field_list = parse_fields(fields, services.SPARSE_FIELDS, services.CARD_FIELDS)
+    member_id = await get_colaborador_member_id(db, current_user)
+    page = await services.get_board_column_page(
+        db, column_id, cursor, limit, filters, assigned_to_id=member_id, fields=field_list
+    )
+    return sparse_response(page) if field_list else page
 
 
 # === Demands ===
@@ -92,15 +99,20 @@ async def list_demands(
     assigned_to_id: int | None = Query(None),
     status: str | None = Query(None),
     priority: str | None = Query(None),
+    fields: str | None = Query(None, description="Sparse fieldset, or 'card'"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    field_list = parse_fields(fields, services.SPARSE_FIELDS, services.CARD_FIELDS)
     # Colaborador only sees their own demands
     if current_user.role == "colaborador" and assigned_to_id is None:
-        member_id = await _get_member_id_for_colaborador(db, current_user)
+        member_id = await get_colaborador_member_id(db, current_user)
         if member_id:
             assigned_to_id = member_id
-    return await services.get_all_demands(db, client_id, assigned_to_id, status, priority)
+    demands = await services.get_all_demands(
+        db, client_id, assigned_to_id, status, priority, fields=field_list
+    )
+    return sparse_response(demands) if field_list else demands
 
 
 @router.get("/{demand_id}", response_model=schemas.DemandResponse)
@@ -111,6 +111,25 @@ class DemandHistoryResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class BoardFilters(BaseModel):
+    """Board/column query filters (applied before pagination)."""
+    client_id: int | None = None
+    assigned_to_id: int | None = None
+    squad_id: int | None = None         # assignee's main squad
+    role_title: str | None = None       # assignee's role
+    demand_type: str | None = None
+    created_after: datetime | None = None
+
+
 class KanbanBoardResponse(BaseModel):
     columns: list[KanbanColumnResponse]
     demands: dict[str, list[DemandResponse]]
+    totals: dict[str, int] = {}
+    cursors: dict[str, str | None] = {}
+
+
+class BoardColumnPage(BaseModel):
+    column_id: int
+    demands: list[DemandResponse]
+    total: int
+    next_cursor: str | None = None
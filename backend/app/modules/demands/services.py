@@ -1,14 +1,16 @@
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete as sa_delete
+from sqlalchemy import select, func, tuple_, delete as sa_delete
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException
+from app.core.partitioning import archive_table, fetch_history
+from app.shared.pagination import encode_cursor, decode_cursor
 from app.modules.demands.models import (
     Demand, DemandStatus, KanbanColumn, DemandHistory, SLAStatus, DemandComment,
 )
 from app.modules.demands.schemas import (
     DemandCreate, DemandUpdate, DemandMove, KanbanColumnCreate, KanbanColumnUpdate,
-    CommentCreate,
+    CommentCreate, BoardFilters,
 )
 from app.modules.clients.models import Client
 from app.modules.team.models import TeamMember
@@ -107,20 +109,17 @@ def _compute_sla_status(demand: Demand) -> str:
     return SLAStatus.ON_TIME.value
 
 
-async def _compute_in_progress_hours(db: AsyncSession, demand_id: int) -> float | None:
-    """Calculate hours from 'Em Progresso' to 'Concluído' using DemandHistory."""
-    result = await db.execute(
-        select(DemandHistory)
-        .where(DemandHistory.demand_id == demand_id)
-        .order_by(DemandHistory.created_at)
-    )
-    history = list(result.scalars().all())
+async def _compute_in_progress_hours(db: AsyncSession, demand: Demand) -> float | None:
+    """Calculate hours from 'Em Progresso' to 'Concluído' using the demand history
+    (live and archived partitions, as in get_demand_history)."""
+    history = await fetch_history(db, DemandHistory.__table__, demand.id, since=demand.created_at)
     prog_time = None
     for h in history:
-        if h.to_column and "progresso" in h.to_column.lower():
-            prog_time = h.created_at
-        if h.to_column and "conclu" in h.to_column.lower() and prog_time:
-            done_time = h.created_at
+        to_column = (h["to_column"] or "").lower()
+        if "progresso" in to_column:
+            prog_time = h["created_at"]
+        if "conclu" in to_column and prog_time:
+            done_time = h["created_at"]
             if done_time.tzinfo is None:
                 done_time = done_time.replace(tzinfo=timezone.utc)
             if prog_time.tzinfo is None:
@@ -150,7 +149,7 @@ async def _enrich_demand(db: AsyncSession, demand: Demand) -> dict:
         select(func.count(DemandComment.id)).where(DemandComment.demand_id == demand.id)
     )
     comments_count = count_res.scalar() or 0
-    in_progress_hours = await _compute_in_progress_hours(db, demand.id)
+    in_progress_hours = await _compute_in_progress_hours(db, demand)
     return {
         **{c.key: getattr(demand, c.key) for c in Demand.__table__.columns},
         "sla_status": _compute_sla_status(demand),
@@ -162,6 +161,52 @@ async def _enrich_demand(db: AsyncSession, demand: Demand) -> dict:
     }
 
 
+# === Sparse card representation ===
+# Board cards only need these; `fields=card` selects them without the Text columns.
+CARD_FIELDS = (
+    "id", "title", "priority", "column_id", "position",
+    "assigned_to_name", "due_date", "sla_status",
+)
+_CARD_COLUMNS = {
+    "id": Demand.id,
+    "title": Demand.title,
+    "priority": Demand.priority,
+    "status": Demand.status,
+    "demand_type": Demand.demand_type,
+    "column_id": Demand.column_id,
+    "position": Demand.position,
+    "client_id": Demand.client_id,
+    "client_name": Client.name,
+    "assigned_to_id": Demand.assigned_to_id,
+    "assigned_to_name": TeamMember.name,
+    "due_date": Demand.due_date,
+    "completed_at": Demand.completed_at,
+    "created_at": Demand.created_at,
+}
+SPARSE_FIELDS = (*_CARD_COLUMNS, "sla_status")
+
+
+def _card_select(fields: list[str]):
+    """SELECT only the requested card columns (plus id/column/position for paging)."""
+    names = {"id", "column_id", "position", *fields}
+    if "sla_status" in names:
+        names.update({"status", "due_date", "completed_at"})
+    names.discard("sla_status")
+    query = select(*[_CARD_COLUMNS[n].label(n) for n in sorted(names)]).select_from(Demand)
+    if "assigned_to_name" in names:
+        query = query.outerjoin(TeamMember, TeamMember.id == Demand.assigned_to_id)
+    if "client_name" in names:
+        query = query.outerjoin(Client, Client.id == Demand.client_id)
+    return query
+
+
+def _card_to_dict(row, fields: list[str]) -> dict:
+    return {
+        f: _compute_sla_status(row) if f == "sla_status" else getattr(row, f)
+        for f in fields
+    }
+
+
 async def get_comments(db: AsyncSession, demand_id: int) -> list[dict]:
     result = await db.execute(
         select(DemandComment)
@@ -218,8 +263,10 @@ async def get_all_demands(
     assigned_to_id: int | None = None,
     status: str | None = None,
     priority: str | None = None,
+    fields: list[str] | None = None,
 ) -> list[dict]:
-    query = select(Demand).order_by(Demand.position)
+    base = _card_select(fields) if fields else select(Demand)
+    query = base.order_by(Demand.position)
     if client_id:
         query = query.where(Demand.client_id == client_id)
     if assigned_to_id:
@@ -229,6 +276,8 @@ async def get_all_demands(
     if priority:
         query = query.where(Demand.priority == priority)
     result = await db.execute(query)
+    if fields:
+        return [_card_to_dict(row, fields) for row in result.all()]
     demands = result.scalars().all()
     return [await _enrich_demand(db, d) for d in demands]
 
@@ -301,13 +350,10 @@ async def move_demand(
     return await _enrich_demand(db, demand)
 
 
-async def get_demand_history(db: AsyncSession, demand_id: int) -> list[DemandHistory]:
-    result = await db.execute(
-        select(DemandHistory)
-        .where(DemandHistory.demand_id == demand_id)
-        .order_by(DemandHistory.created_at)
-    )
-    return list(result.scalars().all())
+async def get_demand_history(db: AsyncSession, demand_id: int) -> list[dict]:
+    """History across live and archived partitions, bounded by the demand's creation."""
+    created_at = await db.scalar(select(Demand.created_at).where(Demand.id == demand_id))
+    return await fetch_history(db, DemandHistory.__table__, demand_id, since=created_at)
 
 
 async def delete_demand(db: AsyncSession, demand_id: int) -> None:
@@ -317,35 +363,133 @@ async def delete_demand(db: AsyncSession, demand_id: int) -> None:
         raise HTTPException(status_code=404, detail="Demanda não encontrada")
     # Delete history first to avoid FK NOT NULL violation
     await db.execute(sa_delete(DemandHistory).where(DemandHistory.demand_id == demand_id))
+    archived = archive_table(DemandHistory.__table__)
+    await db.execute(sa_delete(archived).where(archived.c.demand_id == demand_id))
     await db.flush()
     await db.delete(demand)
     await db.commit()
 
 
+BOARD_PAGE_SIZE = 30
+
+
+def _board_scope(query, filters: BoardFilters | None, assigned_to_id: int | None):
+    """Board filters chosen by the user, plus the colaborador restriction (assigned_to_id)."""
+    if assigned_to_id:
+        query = query.where(Demand.assigned_to_id == assigned_to_id)
+    if not filters:
+        return query
+    if filters.client_id:
+        query = query.where(Demand.client_id == filters.client_id)
+    if filters.assigned_to_id:
+        query = query.where(Demand.assigned_to_id == filters.assigned_to_id)
+    if filters.demand_type:
+        query = query.where(Demand.demand_type == filters.demand_type)
+    if filters.squad_id:
+        query = query.where(Demand.assigned_to_id.in_(
+            select(TeamMember.id).where(TeamMember.squad_id == filters.squad_id)
+        ))
+    if filters.role_title:
+        query = query.where(Demand.assigned_to_id.in_(
+            select(TeamMember.id).where(TeamMember.role_title == filters.role_title)
+        ))
+    if filters.created_after:
+        query = query.where(Demand.created_at >= filters.created_after)
+    return query
+
+
 async def get_kanban_board(
     db: AsyncSession,
-    client_id: int | None = None,
+    filters: BoardFilters | None = None,
     assigned_to_id: int | None = None,
+    limit: int = BOARD_PAGE_SIZE,
+    fields: list[str] | None = None,
 ) -> dict:
+    """First `limit` cards of every column, plus per-column totals and cursors."""
     columns = await get_all_columns(db)
 
-    query = select(Demand).order_by(Demand.position)
-    if client_id:
-        query = query.where(Demand.client_id == client_id)
-    if assigned_to_id:
-        query = query.where(Demand.assigned_to_id == assigned_to_id)
-    result = await db.execute(query)
-    demands = result.scalars().all()
+    position = func.coalesce(Demand.position, 0)
+    ranked = _board_scope(
+        select(
+            Demand.id,
+            func.row_number().over(
+                partition_by=Demand.column_id, order_by=(position, Demand.id)
+            ).label("rank"),
+            func.count().over(partition_by=Demand.column_id).label("column_total"),
+        ),
+        filters, assigned_to_id,
+    ).subquery()
+    base = _card_select(fields) if fields else select(Demand)
+    result = await db.execute(
+        base.add_columns(ranked.c.column_total)
+        .join(ranked, ranked.c.id == Demand.id)
+        .where(ranked.c.rank <= limit)
+        .order_by(Demand.column_id, position, Demand.id)
+    )
 
     board: dict[str, list] = {}
+    totals: dict[str, int] = {}
+    cursors: dict[str, str | None] = {}
     for col in columns:
         board[str(col["id"])] = []
-
-    for demand in demands:
-        enriched = await _enrich_demand(db, demand)
-        col_key = str(demand.column_id) if demand.column_id else "unassigned"
+        totals[str(col["id"])] = 0
+        cursors[str(col["id"])] = None
+
+    for row in result.all():
+        if fields:
+            card, item = _card_to_dict(row, fields), row
+        else:
+            item = row[0]
+            card = await _enrich_demand(db, item)
+        col_key = str(item.column_id) if item.column_id else "unassigned"
         if col_key not in board:
             board[col_key] = []
-        board[col_key].append(enriched)
+        board[col_key].append(card)
+        totals[col_key] = row.column_total
+        cursors[col_key] = (
+            encode_cursor(item.position, item.id)
+            if row.column_total > len(board[col_key]) else None
+        )
+
+    return {"columns": columns, "demands": board, "totals": totals, "cursors": cursors}
+
 
-    return {"columns": columns, "demands": board}
+async def get_board_column_page(
+    db: AsyncSession,
+    column_id: int,
+    cursor: str | None = None,
+    limit: int = BOARD_PAGE_SIZE,
+    filters: BoardFilters | None = None,
+    assigned_to_id: int | None = None,
+    fields: list[str] | None = None,
+) -> dict:
+    """Next page of a board column, keyset-paginated on (position, id)."""
+    position = func.coalesce(Demand.position, 0)
+    base = _card_select(fields) if fields else select(Demand)
+    query = _board_scope(
+        base.where(Demand.column_id == column_id), filters, assigned_to_id
+    )
+    total_res = await db.execute(
+        _board_scope(
+            select(func.count(Demand.id)).where(Demand.column_id == column_id),
+            filters, assigned_to_id,
+        )
+    )
+    if cursor:
+        query = query.where(tuple_(position, Demand.id) > tuple_(*decode_cursor(cursor)))
+    result = await db.execute(query.order_by(position, Demand.id).limit(limit + 1))
+    items = list(result.all() if fields else result.scalars().all())
+    has_more = len(items) > limit
+    items = items[:limit]
+    if fields:
+        cards = [_card_to_dict(row, fields) for row in items]
+    else:
+        cards = [await _enrich_demand(db, d) for d in items]
+    return {
+        "column_id": column_id,
+        "demands": cards,
+        "total": total_res.scalar() or 0,
+        "next_cursor": (
+            encode_cursor(items[-1].position, items[-1].id) if has_more else None
+        ),
+    }
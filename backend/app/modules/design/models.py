@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from sqlalchemy import (
     String, Text, DateTime, Integer, Float, Boolean, Numeric,
-    ForeignKey, Enum,
+    ForeignKey, Enum, Index,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
@@ -14,6 +14,10 @@ class DesignDemandType(str, enum.Enum):
     VIDEO = "video"
 
 
+# Column new demands land in; work starts when a demand leaves it
+INTAKE_COLUMN = "Demandas Diárias"
+
+
 class DesignColumn(Base):
     __tablename__ = "design_columns"
 
@@ -99,6 +103,19 @@ class DesignDemand(Base):
     )
 
 
+class DesignBlob(Base):
+    """Attachment content stored once per SHA-256 and shared by every attachment with it."""
+    __tablename__ = "design_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    file_path: Mapped[str] = mapped_column(String(1000))
+    file_size: Mapped[int] = mapped_column(Integer, default=0)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
 class DesignAttachment(Base):
     __tablename__ = "design_attachments"
 
@@ -110,6 +127,10 @@ class DesignAttachment(Base):
     file_path: Mapped[str] = mapped_column(String(1000))
     file_type: Mapped[str] = mapped_column(String(100), nullable=True)
     file_size: Mapped[int] = mapped_column(Integer, default=0)
+    # NULL for files uploaded before deduplication (file_path is then owned by the row)
+    blob_sha256: Mapped[str] = mapped_column(
+        String(64), ForeignKey("design_blobs.sha256"), nullable=True, index=True
+    )
     uploaded_by_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
     )
@@ -137,9 +158,10 @@ class DesignComment(Base):
 
 
 class DesignHistory(Base):
+    """Column moves, range-partitioned by month on created_at (see core.partitioning)."""
     __tablename__ = "design_history"
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
     demand_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("design_demands.id")
     )
@@ -150,11 +172,17 @@ class DesignHistory(Base):
     )
     note: Mapped[str] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+        DateTime(timezone=True), primary_key=True,
+        default=lambda: datetime.now(timezone.utc),
     )
 
     demand = relationship("DesignDemand", back_populates="history")
 
+    __table_args__ = (
+        Index("ix_design_history_demand_created", "demand_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
 
 class DesignPayment(Base):
     __tablename__ = "design_payments"
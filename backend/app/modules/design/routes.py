@@ -7,22 +7,12 @@ from app.core.database import get_db
 from app.core.security import get_current_user, require_role
 from app.modules.auth.models import User
 from app.modules.design import schemas, services
-from app.modules.team.models import TeamMember
+from app.shared.fieldsets import parse_fields, sparse_response
+from app.shared.scope import get_colaborador_member_id
 
 router = APIRouter(prefix="/design", tags=["Design"])
 
 
-async def _get_member_id_for_colaborador(db: AsyncSession, user: User) -> int | None:
-    if user.role.value not in ("admin", "gerente"):
-        result = await db.execute(select(TeamMember).where(TeamMember.user_id == user.id))
-        member = result.scalar_one_or_none()
-        if not member:
-            result2 = await db.execute(select(TeamMember).where(TeamMember.email == user.email))
-            member = result2.scalar_one_or_none()
-        return member.id if member else None
-    return None
-
-
 # === Columns ===
 @router.post("/columns", response_model=schemas.DesignColumnResponse, status_code=201)
 async def create_column(
@@ -63,12 +53,36 @@ async def delete_column(
 # === Board ===
 @router.get("/board", response_model=schemas.DesignBoardResponse)
 async def get_board(
-    client_id: int | None = Query(None),
+    filters: schemas.DesignBoardFilters = Depends(),
+    limit: int = Query(services.BOARD_PAGE_SIZE, ge=1, le=200),
+    fields: str | None = Query(None, description="Sparse fieldset, or 'card'"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    member_id = await _get_member_id_for_colaborador(db, current_user)
-    return await services.get_kanban_board(db, client_id, assigned_to_id=member_id)
+    field_list = parse_fields(fields, services.SPARSE_FIELDS, services.CARD_FIELDS)
+    member_id = await get_colaborador_member_id(db, current_user)
+    board = await services.get_kanban_board(
+        db, filters, assigned_to_id=member_id, limit=limit, fields=field_list
+    )
+    return sparse_response(board) if field_list else board
+
+
+@router.get("/board/columns/{column_id}", response_model=schemas.DesignBoardColumnPage)
+async def get_board_column(
+    column_id: int,
+    cursor: str | None = Query(None),
+    limit: int = Query(services.BOARD_PAGE_SIZE, ge=1, le=200),
+    filters: schemas.DesignBoardFilters = Depends(),
+    fields: str | None = Query(None, description="Sparse fieldset, or 'card'"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    field_list = parse_fields(fields, services.SPARSE_FIELDS, services.CARD_FIELDS)
+    member_id = await get_colaborador_member_id(db, current_user)
+    page = await services.get_board_column_page(
+        db, column_id, cursor, limit, filters, assigned_to_id=member_id, fields=field_list
+    )
+    return sparse_response(page) if field_list else page
 
 
 # === Demands CRUD ===
@@ -85,10 +99,13 @@ async def create_demand(
 async def list_demands(
     client_id: int | None = Query(None),
     assigned_to_id: int | None = Query(None),
+    fields: str | None = Query(None, description="Sparse fieldset, or 'card'"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await services.get_all_demands(db, client_id, assigned_to_id)
+    field_list = parse_fields(fields, services.SPARSE_FIELDS, services.CARD_FIELDS)
+    demands = await services.get_all_demands(db, client_id, assigned_to_id, fields=field_list)
+    return sparse_response(demands) if field_list else demands
 
 
 @router.get("/demands/{demand_id}", response_model=schemas.DesignDemandResponse)
@@ -169,6 +186,20 @@ async def upload_attachment(
     return await services.upload_attachment(db, demand_id, file, current_user.id)
 
 
+@router.post(
+    "/demands/{demand_id}/attachments/by-hash",
+    response_model=schemas.DesignAttachmentResponse, status_code=201,
+)
+async def link_attachment(
+    demand_id: int,
+    data: schemas.DesignAttachmentLink,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Attach a file the server already stores (404: upload it instead)."""
+    return await services.link_attachment(db, demand_id, data, current_user.id)
+
+
 @router.get("/demands/{demand_id}/attachments", response_model=list[schemas.DesignAttachmentResponse])
 async def list_attachments(
     demand_id: int,
@@ -1,6 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from app.modules.design.models import DesignDemandType
 
 
 # --- Columns ---
@@ -78,9 +79,25 @@ class DesignDemandResponse(BaseModel):
 
 
 # --- Board ---
+class DesignBoardFilters(BaseModel):
+    """Board/column query filters (applied before pagination)."""
+    client_id: int | None = None
+    assigned_to_id: int | None = None
+    demand_type: DesignDemandType | None = None
+
+
 class DesignBoardResponse(BaseModel):
     columns: list[DesignColumnResponse]
     demands: dict[str, list[DesignDemandResponse]]
+    totals: dict[str, int] = {}
+    cursors: dict[str, str | None] = {}
+
+
+class DesignBoardColumnPage(BaseModel):
+    column_id: int
+    demands: list[DesignDemandResponse]
+    total: int
+    next_cursor: str | None = None
 
 
 # --- Comments ---
@@ -106,11 +123,19 @@ class DesignAttachmentResponse(BaseModel):
     file_path: str
     file_type: str | None
     file_size: int
+    blob_sha256: str | None = None
     uploaded_by_id: int | None
     created_at: datetime
     model_config = {"from_attributes": True}
 
 
+class DesignAttachmentLink(BaseModel):
+    """Attach content the server already has, by its SHA-256 (hex)."""
+    sha256: str = Field(pattern=r"^[0-9a-f]{64}$")
+    filename: str
+    file_type: str | None = None
+
+
 # --- History ---
 class DesignHistoryResponse(BaseModel):
     id: int
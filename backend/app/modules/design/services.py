@@ -1,26 +1,35 @@
+import hashlib
 import os
+import tempfile
 import uuid
+from collections import Counter
 from datetime import datetime, timezone
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete as sa_delete
+from sqlalchemy import select, func, tuple_, case, literal_column, update, delete as sa_delete
+from sqlalchemy.dialects.postgresql import insert
 from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.core.partitioning import archive_table, fetch_history
+from app.shared.pagination import encode_cursor, decode_cursor
 
 from app.modules.design.models import (
     DesignColumn, DesignDemand, DesignAttachment, DesignComment,
-    DesignHistory, DesignPayment, DesignDemandType, DesignMemberRate,
+    DesignHistory, DesignPayment, DesignDemandType, DesignMemberRate, DesignBlob, INTAKE_COLUMN,
 )
 from app.modules.design.schemas import (
     DesignColumnCreate, DesignColumnUpdate,
     DesignDemandCreate, DesignDemandUpdate, DesignDemandMove,
-    DesignCommentCreate,
+    DesignCommentCreate, DesignAttachmentLink, DesignBoardFilters,
 )
 from app.modules.clients.models import Client
 from app.modules.team.models import TeamMember
 from app.modules.auth.models import User
 
 UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "/app/uploads/design")
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 ALLOWED_TYPES = {
     "image/png", "image/jpeg", "image/gif", "image/webp", "image/svg+xml",
     "video/mp4", "video/quicktime", "video/webm",
@@ -38,7 +47,7 @@ async def seed_default_design_columns(db: AsyncSession) -> None:
     if result.scalar() > 0:
         return
     defaults = [
-        DesignColumn(name="Demandas Diárias", order=0, color="#6B7280", is_default=True),
+        DesignColumn(name=INTAKE_COLUMN, order=0, color="#6B7280", is_default=True),
         DesignColumn(name="Para Aprovação", order=1, color="#F59E0B", is_default=True),
         DesignColumn(name="Produzir Story", order=2, color="#3B82F6", is_default=True),
         DesignColumn(name="Alteração", order=3, color="#EF4444", is_default=True),
@@ -134,13 +143,54 @@ async def _enrich_demand(db: AsyncSession, demand: DesignDemand) -> dict:
     }
 
 
+# ========== Sparse Cards ==========
+
+# Board cards only need these; `fields=card` selects them without the Text columns.
+CARD_FIELDS = (
+    "id", "title", "demand_type", "column_id", "position",
+    "assigned_to_name", "due_date", "payment_registered",
+)
+_CARD_COLUMNS = {
+    "id": DesignDemand.id,
+    "title": DesignDemand.title,
+    "demand_type": DesignDemand.demand_type,
+    "column_id": DesignDemand.column_id,
+    "position": DesignDemand.position,
+    "client_id": DesignDemand.client_id,
+    "client_name": Client.name,
+    "assigned_to_id": DesignDemand.assigned_to_id,
+    "assigned_to_name": TeamMember.name,
+    "due_date": DesignDemand.due_date,
+    "completed_at": DesignDemand.completed_at,
+    "approved_at": DesignDemand.approved_at,
+    "payment_registered": DesignDemand.payment_registered,
+    "created_at": DesignDemand.created_at,
+}
+SPARSE_FIELDS = tuple(_CARD_COLUMNS)
+
+
+def _card_select(fields: list[str]):
+    """SELECT only the requested card columns (plus id/column/position for paging)."""
+    names = {"id", "column_id", "position", *fields}
+    query = select(*[_CARD_COLUMNS[n].label(n) for n in sorted(names)]).select_from(DesignDemand)
+    if "assigned_to_name" in names:
+        query = query.outerjoin(TeamMember, TeamMember.id == DesignDemand.assigned_to_id)
+    if "client_name" in names:
+        query = query.outerjoin(Client, Client.id == DesignDemand.client_id)
+    return query
+
+
+def _card_to_dict(row, fields: list[str]) -> dict:
+    return {f: getattr(row, f) for f in fields}
+
+
 # ========== Demands CRUD ==========
 
 async def create_demand(db: AsyncSession, data: DesignDemandCreate, user_id: int) -> dict:
     demand = DesignDemand(**data.model_dump(), created_by_id=user_id)
     if not demand.column_id:
         result = await db.execute(
-            select(DesignColumn).where(DesignColumn.name == "Demandas Diárias").limit(1)
+            select(DesignColumn).where(DesignColumn.name == INTAKE_COLUMN).limit(1)
         )
         col = result.scalar_one_or_none()
         if col:
@@ -155,13 +205,17 @@ async def get_all_demands(
     db: AsyncSession,
     client_id: int | None = None,
     assigned_to_id: int | None = None,
+    fields: list[str] | None = None,
 ) -> list[dict]:
-    query = select(DesignDemand).order_by(DesignDemand.position)
+    base = _card_select(fields) if fields else select(DesignDemand)
+    query = base.order_by(DesignDemand.position)
     if client_id:
         query = query.where(DesignDemand.client_id == client_id)
     if assigned_to_id:
         query = query.where(DesignDemand.assigned_to_id == assigned_to_id)
     result = await db.execute(query)
+    if fields:
+        return [_card_to_dict(row, fields) for row in result.all()]
     demands = result.scalars().all()
     return [await _enrich_demand(db, d) for d in demands]
 
@@ -262,36 +316,135 @@ async def delete_demand(db: AsyncSession, demand_id: int) -> None:
     if not demand:
         raise HTTPException(status_code=404, detail="Demanda de design não encontrada")
     await db.execute(sa_delete(DesignHistory).where(DesignHistory.demand_id == demand_id))
+    archived = archive_table(DesignHistory.__table__)
+    await db.execute(sa_delete(archived).where(archived.c.demand_id == demand_id))
     await db.execute(sa_delete(DesignPayment).where(DesignPayment.demand_id == demand_id))
+    files = await db.execute(
+        select(DesignAttachment.blob_sha256, DesignAttachment.file_path)
+        .where(DesignAttachment.demand_id == demand_id)
+    )
+    attachments = files.all()
     await db.flush()
     await db.delete(demand)
+    await db.flush()
+    unused = await release_blobs(db, [a.blob_sha256 for a in attachments if a.blob_sha256])
     await db.commit()
+    await run_in_threadpool(
+        _discard, *unused, *(a.file_path for a in attachments if not a.blob_sha256)
+    )
+
+
+BOARD_PAGE_SIZE = 30
+
+
+def _board_scope(query, filters: DesignBoardFilters | None, assigned_to_id: int | None):
+    """Board filters chosen by the user, plus the colaborador restriction (assigned_to_id)."""
+    if assigned_to_id:
+        query = query.where(DesignDemand.assigned_to_id == assigned_to_id)
+    if not filters:
+        return query
+    if filters.client_id:
+        query = query.where(DesignDemand.client_id == filters.client_id)
+    if filters.assigned_to_id:
+        query = query.where(DesignDemand.assigned_to_id == filters.assigned_to_id)
+    if filters.demand_type:
+        query = query.where(DesignDemand.demand_type == filters.demand_type)
+    return query
 
 
 async def get_kanban_board(
     db: AsyncSession,
-    client_id: int | None = None,
+    filters: DesignBoardFilters | None = None,
     assigned_to_id: int | None = None,
+    limit: int = BOARD_PAGE_SIZE,
+    fields: list[str] | None = None,
 ) -> dict:
+    """First `limit` cards of every column, plus per-column totals and cursors."""
     columns = await get_all_columns(db)
-    query = select(DesignDemand).order_by(DesignDemand.position)
-    if client_id:
-        query = query.where(DesignDemand.client_id == client_id)
-    if assigned_to_id:
-        query = query.where(DesignDemand.assigned_to_id == assigned_to_id)
-    result = await db.execute(query)
-    demands = result.scalars().all()
+
+    position = func.coalesce(DesignDemand.position, 0)
+    ranked = _board_scope(
+        select(
+            DesignDemand.id,
+            func.row_number().over(
+                partition_by=DesignDemand.column_id, order_by=(position, DesignDemand.id)
+            ).label("rank"),
+            func.count().over(partition_by=DesignDemand.column_id).label("column_total"),
+        ),
+        filters, assigned_to_id,
+    ).subquery()
+    base = _card_select(fields) if fields else select(DesignDemand)
+    result = await db.execute(
+        base.add_columns(ranked.c.column_total)
+        .join(ranked, ranked.c.id == DesignDemand.id)
+        .where(ranked.c.rank <= limit)
+        .order_by(DesignDemand.column_id, position, DesignDemand.id)
+    )
 
     board: dict[str, list] = {}
+    totals: dict[str, int] = {}
+    cursors: dict[str, str | None] = {}
     for col in columns:
         board[str(col["id"])] = []
-    for demand in demands:
-        enriched = await _enrich_demand(db, demand)
-        col_key = str(demand.column_id) if demand.column_id else "unassigned"
+        totals[str(col["id"])] = 0
+        cursors[str(col["id"])] = None
+    for row in result.all():
+        if fields:
+            card, item = _card_to_dict(row, fields), row
+        else:
+            item = row[0]
+            card = await _enrich_demand(db, item)
+        col_key = str(item.column_id) if item.column_id else "unassigned"
         if col_key not in board:
             board[col_key] = []
-        board[col_key].append(enriched)
-    return {"columns": columns, "demands": board}
+        board[col_key].append(card)
+        totals[col_key] = row.column_total
+        cursors[col_key] = (
+            encode_cursor(item.position, item.id)
+            if row.column_total > len(board[col_key]) else None
+        )
+    return {"columns": columns, "demands": board, "totals": totals, "cursors": cursors}
+
+
+async def get_board_column_page(
+    db: AsyncSession,
+    column_id: int,
+    cursor: str | None = None,
+    limit: int = BOARD_PAGE_SIZE,
+    filters: DesignBoardFilters | None = None,
+    assigned_to_id: int | None = None,
+    fields: list[str] | None = None,
+) -> dict:
+    """Next page of a board column, keyset-paginated on (position, id)."""
+    position = func.coalesce(DesignDemand.position, 0)
+    base = _card_select(fields) if fields else select(DesignDemand)
+    query = _board_scope(
+        base.where(DesignDemand.column_id == column_id), filters, assigned_to_id
+    )
+    total_res = await db.execute(
+        _board_scope(
+            select(func.count(DesignDemand.id)).where(DesignDemand.column_id == column_id),
+            filters, assigned_to_id,
+        )
+    )
+    if cursor:
+        query = query.where(tuple_(position, DesignDemand.id) > tuple_(*decode_cursor(cursor)))
+    result = await db.execute(query.order_by(position, DesignDemand.id).limit(limit + 1))
+    items = list(result.all() if fields else result.scalars().all())
+    has_more = len(items) > limit
+    items = items[:limit]
+    if fields:
+        cards = [_card_to_dict(row, fields) for row in items]
+    else:
+        cards = [await _enrich_demand(db, d) for d in items]
+    return {
+        "column_id": column_id,
+        "demands": cards,
+        "total": total_res.scalar() or 0,
+        "next_cursor": (
+            encode_cursor(items[-1].position, items[-1].id) if has_more else None
+        ),
+    }
 
 
 # ========== Comments ==========
@@ -333,50 +486,150 @@ async def create_comment(
 
 # ========== History ==========
 
-async def get_demand_history(db: AsyncSession, demand_id: int) -> list:
+async def get_demand_history(db: AsyncSession, demand_id: int) -> list[dict]:
+    """History across live and archived partitions, bounded by the demand's creation."""
+    created_at = await db.scalar(
+        select(DesignDemand.created_at).where(DesignDemand.id == demand_id)
+    )
+    return await fetch_history(db, DesignHistory.__table__, demand_id, since=created_at)
+
+
+# ========== Attachments ==========
+# Content is stored once per SHA-256 in BLOB_DIR (design_blobs counts the attachments
+# using it); the file goes when the last reference is released.
+
+def _discard(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _store_upload(src) -> tuple[str, int, str]:
+    """Copy an upload to a temp file in BLOB_DIR in UPLOAD_CHUNK_SIZE chunks, hashing it
+    on the way (blocking: run it in a thread). The size limit is checked as data
+    arrives. Returns (temp path, size, sha256)."""
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_DIR, suffix=".part")
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(status_code=400, detail="Arquivo excede 50MB")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    return tmp_path, size, digest.hexdigest()
+
+
+def _place_blob(tmp_path: str, file_path: str) -> None:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    os.replace(tmp_path, file_path)
+
+
+async def release_blobs(db: AsyncSession, hashes: list[str]) -> list[str]:
+    """Drop one reference per hash (repeats count) without committing; the attachments
+    must already be deleted. Returns the files of blobs left unreferenced, to remove
+    once the caller has committed."""
+    counts = Counter(h for h in hashes if h)
+    if not counts:
+        return []
+    await db.execute(
+        update(DesignBlob)
+        .where(DesignBlob.sha256.in_(list(counts)))
+        .values(ref_count=DesignBlob.ref_count - case(counts, value=DesignBlob.sha256))
+    )
     result = await db.execute(
-        select(DesignHistory)
-        .where(DesignHistory.demand_id == demand_id)
-        .order_by(DesignHistory.created_at)
+        sa_delete(DesignBlob)
+        .where(DesignBlob.sha256.in_(list(counts)), DesignBlob.ref_count <= 0)
+        .returning(DesignBlob.file_path)
     )
     return list(result.scalars().all())
 
 
-# ========== Attachments ==========
+async def _check_attachment_target(
+    db: AsyncSession, demand_id: int, file_type: str | None
+) -> None:
+    result = await db.execute(select(DesignDemand.id).where(DesignDemand.id == demand_id))
+    if not result.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="Demanda não encontrada")
+    if file_type and file_type not in ALLOWED_TYPES:
+        raise HTTPException(status_code=400, detail=f"Tipo de arquivo não permitido: {file_type}")
+
 
 async def upload_attachment(
     db: AsyncSession, demand_id: int, file: UploadFile, user_id: int
 ) -> dict:
-    # Validate demand exists
-    result = await db.execute(select(DesignDemand).where(DesignDemand.id == demand_id))
-    demand = result.scalar_one_or_none()
-    if not demand:
-        raise HTTPException(status_code=404, detail="Demanda não encontrada")
-
-    if file.content_type and file.content_type not in ALLOWED_TYPES:
-        raise HTTPException(status_code=400, detail=f"Tipo de arquivo não permitido: {file.content_type}")
-
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="Arquivo excede 50MB")
+    await _check_attachment_target(db, demand_id, file.content_type)
+
+    tmp_path, file_size, sha256 = await run_in_threadpool(_store_upload, file.file)
+    try:
+        # A unique path per blob: a file being removed after its last release can't
+        # clash with the same content uploaded again meanwhile
+        stmt = insert(DesignBlob).values(
+            sha256=sha256,
+            file_path=os.path.join(BLOB_DIR, sha256[:2], f"{sha256}-{uuid.uuid4().hex[:8]}"),
+            file_size=file_size,
+            ref_count=1,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DesignBlob.sha256],
+            set_={"ref_count": DesignBlob.ref_count + 1},
+        ).returning(DesignBlob.file_path, literal_column("xmax = 0").label("created"))
+        blob = (await db.execute(stmt)).one()
+        if blob.created:
+            await run_in_threadpool(_place_blob, tmp_path, blob.file_path)
+    finally:
+        await run_in_threadpool(_discard, tmp_path)
 
-    # Save to disk
-    demand_dir = os.path.join(UPLOAD_DIR, str(demand_id))
-    os.makedirs(demand_dir, exist_ok=True)
+    attachment = DesignAttachment(
+        demand_id=demand_id,
+        filename=file.filename or sha256,
+        file_path=blob.file_path,
+        file_type=file.content_type,
+        file_size=file_size,
+        blob_sha256=sha256,
+        uploaded_by_id=user_id,
+    )
+    db.add(attachment)
+    try:
+        await db.commit()
+    except Exception:
+        if blob.created:
+            await run_in_threadpool(_discard, blob.file_path)
+        raise
+    await db.refresh(attachment)
+    return {c.key: getattr(attachment, c.key) for c in DesignAttachment.__table__.columns}
 
-    ext = os.path.splitext(file.filename or "file")[1]
-    safe_name = f"{uuid.uuid4().hex}{ext}"
-    file_path = os.path.join(demand_dir, safe_name)
 
-    with open(file_path, "wb") as f:
-        f.write(content)
+async def link_attachment(
+    db: AsyncSession, demand_id: int, data: DesignAttachmentLink, user_id: int
+) -> dict:
+    """Attach content already stored, by hash, without uploading it again (404 when unknown)."""
+    await _check_attachment_target(db, demand_id, data.file_type)
+    result = await db.execute(
+        update(DesignBlob)
+        .where(DesignBlob.sha256 == data.sha256)
+        .values(ref_count=DesignBlob.ref_count + 1)
+        .returning(DesignBlob.file_path, DesignBlob.file_size)
+    )
+    blob = result.one_or_none()
+    if not blob:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
 
     attachment = DesignAttachment(
         demand_id=demand_id,
-        filename=file.filename or safe_name,
-        file_path=file_path,
-        file_type=file.content_type,
-        file_size=len(content),
+        filename=data.filename,
+        file_path=blob.file_path,
+        file_type=data.file_type,
+        file_size=blob.file_size,
+        blob_sha256=data.sha256,
         uploaded_by_id=user_id,
     )
     db.add(attachment)
@@ -404,11 +657,15 @@ async def delete_attachment(db: AsyncSession, attachment_id: int) -> None:
     attachment = result.scalar_one_or_none()
     if not attachment:
         raise HTTPException(status_code=404, detail="Anexo não encontrado")
-    # Remove file from disk
-    if os.path.exists(attachment.file_path):
-        os.remove(attachment.file_path)
     await db.delete(attachment)
+    await db.flush()
+    if attachment.blob_sha256:
+        unused = await release_blobs(db, [attachment.blob_sha256])
+    else:
+        unused = [attachment.file_path]
     await db.commit()
+    # Files go only once their rows are gone for good
+    await run_in_threadpool(_discard, *unused)
 
 
 # ========== Payments ==========
@@ -1,11 +1,16 @@
 from datetime import datetime, date, timezone
-from sqlalchemy import String, Text, Float, DateTime, Date, Integer, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    String, Text, Float, DateTime, Date, Integer, ForeignKey, JSON, Index, UniqueConstraint
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 
 
 class MonthlyFinancials(Base):
     __tablename__ = "monthly_financials"
+    __table_args__ = (
+        Index("uq_monthly_financials_month_year", "month", "year", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     month: Mapped[int] = mapped_column(Integer)
@@ -40,3 +45,47 @@ class ExtraExpense(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
+
+
+class FinancialMonthClose(Base):
+    """Frozen admin dashboard of a closed month (totals; grouped rows below)."""
+    __tablename__ = "financial_month_closes"
+    __table_args__ = (UniqueConstraint("month", "year", name="uq_financial_month_closes_month_year"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    month: Mapped[int] = mapped_column(Integer)
+    year: Mapped[int] = mapped_column(Integer)
+    total_receivable: Mapped[float] = mapped_column(Float)
+    total_received: Mapped[float] = mapped_column(Float, nullable=True)
+    total_operational_cost: Mapped[float] = mapped_column(Float)
+    tax_amount: Mapped[float] = mapped_column(Float, nullable=True)
+    marketing_amount: Mapped[float] = mapped_column(Float, nullable=True)
+    total_extras: Mapped[float] = mapped_column(Float)
+    net_profit: Mapped[float] = mapped_column(Float, nullable=True)
+    closed_by_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    closed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+    rows = relationship(
+        "FinancialCloseRow", cascade="all, delete-orphan", order_by="FinancialCloseRow.id"
+    )
+
+
+class FinancialCloseRow(Base):
+    """One by_client / by_member / by_squad / by_role entry of a closed month."""
+    __tablename__ = "financial_close_rows"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    close_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("financial_month_closes.id", ondelete="CASCADE"), index=True
+    )
+    dimension: Mapped[str] = mapped_column(String(20))  # client | member | squad | role
+    ref_id: Mapped[int] = mapped_column(Integer, nullable=True)  # client/member/squad id
+    name: Mapped[str] = mapped_column(String(255))
+    role_title: Mapped[str] = mapped_column(String(255), nullable=True)
+    total_monthly: Mapped[float] = mapped_column(Float)
+    total_proportional: Mapped[float] = mapped_column(Float)
+    allocations: Mapped[list] = mapped_column(JSON, nullable=True)
@@ -1,15 +1,16 @@
 from datetime import date
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.core.database import get_db
 from app.core.security import require_role, get_current_user
 from app.modules.auth.models import User, UserRole
-from app.modules.team.models import TeamMember
 from app.modules.financial import schemas, services
+from app.shared.scope import get_user_scope
 
 router = APIRouter(prefix="/financial", tags=["Financeiro"])
 
+MAX_RANGE_MONTHS = 36
+
 
 @router.get("/dashboard", response_model=schemas.FinancialDashboard)
 async def financial_dashboard(
@@ -25,16 +26,43 @@ async def financial_dashboard(
     member_id_filter: int | None = None
 
     if current_user.role != UserRole.ADMIN:
-        # Find this user's TeamMember record
-        member_res = await db.execute(
-            select(TeamMember).where(TeamMember.user_id == current_user.id)
-        )
-        member = member_res.scalar_one_or_none()
-        member_id_filter = member.id if member else -1  # -1 = no team member linked
+        scope = await get_user_scope(db, current_user)
+        member_id_filter = scope["member_id"] or -1  # -1 = no team member linked
 
     return await services.get_financial_dashboard(db, m, y, member_id_filter=member_id_filter)
 
 
+@router.get("/range", response_model=schemas.FinancialRange)
+async def financial_range(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="Data final anterior à inicial")
+    if (date_to.year - date_from.year) * 12 + date_to.month - date_from.month >= MAX_RANGE_MONTHS:
+        raise HTTPException(
+            status_code=400, detail=f"Intervalo máximo de {MAX_RANGE_MONTHS} meses"
+        )
+
+    member_id_filter: int | None = None
+    if current_user.role != UserRole.ADMIN:
+        scope = await get_user_scope(db, current_user)
+        member_id_filter = scope["member_id"] or -1  # -1 = no team member linked
+
+    return await services.get_financial_range(db, date_from, date_to, member_id_filter)
+
+
+@router.post("/forecast", response_model=schemas.FinancialForecast)
+async def financial_forecast(
+    data: schemas.ForecastRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    return await services.get_forecast(db, data)
+
+
 @router.patch("/monthly/{month}/{year}", response_model=schemas.MonthlyFinancialsResponse)
 async def update_monthly_financials(
     month: int,
@@ -46,6 +74,47 @@ async def update_monthly_financials(
     return await services.upsert_monthly_financials(db, month, year, data)
 
 
+# === Month close ===
+@router.post("/close/{month}/{year}", response_model=schemas.FinancialMonthCloseResponse, status_code=201)
+async def close_month(
+    month: int,
+    year: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    return await services.close_month(db, month, year, current_user.id)
+
+
+@router.post("/close/{month}/{year}/recompute", response_model=schemas.FinancialMonthCloseResponse)
+async def recompute_month(
+    month: int,
+    year: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    return await services.recompute_month(db, month, year, current_user.id)
+
+
+@router.get("/close/{month}/{year}/diff", response_model=schemas.FinancialCloseDiff)
+async def diff_month(
+    month: int,
+    year: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    return await services.diff_month(db, month, year)
+
+
+@router.delete("/close/{month}/{year}", status_code=204)
+async def reopen_month(
+    month: int,
+    year: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    await services.reopen_month(db, month, year)
+
+
 @router.get("/extras", response_model=list[schemas.ExtraExpenseResponse])
 async def get_extra_expenses(
     month: int = Query(...),
@@ -1,5 +1,5 @@
-from datetime import date
-from pydantic import BaseModel
+from datetime import date, datetime
+from pydantic import BaseModel, Field
 
 
 class AllocationCost(BaseModel):
@@ -98,6 +98,8 @@ class FinancialDashboard(BaseModel):
     month: int
     year: int
     is_personal: bool = False
+    is_closed: bool = False
+    closed_at: datetime | None = None
     total_receivable: float
     total_received: float | None
     total_operational_cost: float
@@ -110,3 +112,121 @@ class FinancialDashboard(BaseModel):
     by_member: list[MemberCostSummary]
     by_squad: list[SquadCostSummary]
     by_role: list[RoleCostSummary]
+
+
+class FinancialMonthCloseResponse(BaseModel):
+    id: int
+    month: int
+    year: int
+    total_operational_cost: float
+    net_profit: float | None
+    closed_by_id: int | None
+    closed_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class CloseDiffTotal(BaseModel):
+    field: str
+    snapshot: float | None
+    current: float | None
+    delta: float | None
+
+
+class CloseDiffRow(BaseModel):
+    dimension: str
+    ref_id: int | str | None
+    name: str
+    snapshot_proportional: float
+    current_proportional: float
+    delta: float
+
+
+class FinancialCloseDiff(BaseModel):
+    month: int
+    year: int
+    closed_at: datetime
+    has_changes: bool
+    totals: list[CloseDiffTotal]
+    rows: list[CloseDiffRow]
+
+
+class ClientMonthTotal(BaseModel):
+    client_id: int
+    client_name: str
+    total_monthly: float
+    total_proportional: float
+
+
+class MemberMonthTotal(BaseModel):
+    member_id: int
+    member_name: str
+    role_title: str | None
+    total_monthly: float
+    total_proportional: float
+
+
+class MonthCosts(BaseModel):
+    month: int
+    year: int
+    total_operational_cost: float
+    by_client: list[ClientMonthTotal]
+    by_member: list[MemberMonthTotal]
+    by_squad: list[SquadCostSummary]
+    by_role: list[RoleCostSummary]
+
+
+class FinancialRange(BaseModel):
+    is_personal: bool = False
+    months: list[MonthCosts]
+
+
+# Forecast (what-if overrides are evaluated in memory, never persisted)
+class ForecastClientEnd(BaseModel):
+    client_id: int
+    end_date: date
+
+
+class ForecastAllocationEnd(BaseModel):
+    allocation_id: int
+    end_date: date
+
+
+class ForecastNewClient(BaseModel):
+    monthly_value: float
+    start_date: date
+    end_date: date | None = None
+    min_contract_months: int | None = None
+
+
+class ForecastNewAllocation(BaseModel):
+    client_id: int | None = None  # existing client; its (overridden) end date caps the allocation
+    monthly_value: float
+    start_date: date
+    end_date: date | None = None
+
+
+class ForecastRequest(BaseModel):
+    months: int = Field(6, ge=3, le=12)
+    design_run_rate_months: int = Field(3, ge=1, le=12)
+    end_clients: list[ForecastClientEnd] = []
+    end_allocations: list[ForecastAllocationEnd] = []
+    add_clients: list[ForecastNewClient] = []
+    add_allocations: list[ForecastNewAllocation] = []
+
+
+class ForecastMonth(BaseModel):
+    month: int
+    year: int
+    receivable: float
+    allocation_cost: float
+    design_cost: float
+    cost: float
+    margin: float
+    baseline_margin: float
+
+
+class FinancialForecast(BaseModel):
+    has_overrides: bool
+    design_run_rate: float
+    months: list[ForecastMonth]
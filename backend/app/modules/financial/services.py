@@ -1,16 +1,36 @@
 import calendar
-from datetime import date
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import Date, Numeric, case, cast, literal, literal_column, select, func, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from app.core.concurrency import rows, run_concurrently, scalars, snapshot_rows
 from app.modules.team.models import TeamAllocation, TeamMember, Squad
 from app.modules.clients.models import Client, ClientStatus
-from app.modules.financial.models import MonthlyFinancials, ExtraExpense
-from app.modules.financial.schemas import ExtraExpenseCreate, ExtraExpenseUpdate, MonthlyFinancialsUpdate
+from app.modules.financial.models import (
+    MonthlyFinancials, ExtraExpense, FinancialMonthClose, FinancialCloseRow,
+)
+from app.modules.financial.schemas import (
+    ExtraExpenseCreate, ExtraExpenseUpdate, MonthlyFinancialsUpdate, ForecastRequest,
+)
+from app.modules.design.models import DesignPayment
 
 CALC_DAYS = 30  # Always use 30 days for proportional calculations
 
 
+def _prorate(monthly_value: float, active_days: int) -> float:
+    """monthly_value * active_days / 30 in exact decimal arithmetic, rounded half-up to
+    cents (what Postgres numeric does, so the SQL expression below agrees to the cent).
+    """
+    value = Decimal(str(monthly_value)) * active_days / CALC_DAYS
+    return float(value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
 def calculate_proportional_value(
     monthly_value: float,
     start_date: date,
@@ -38,7 +58,7 @@ def calculate_proportional_value(
     if active_days >= days_in_cal:
         proportional = round(monthly_value, 2)
     else:
-        proportional = round((monthly_value / CALC_DAYS) * active_days, 2)
+        proportional = _prorate(monthly_value, active_days)
 
     return {
         "days_in_month": days_in_cal,   # actual calendar days (28, 30, 31)
@@ -47,34 +67,298 @@ def calculate_proportional_value(
     }
 
 
-async def get_or_create_monthly_financials(
+def proportional_matrix(
+    monthly_values: np.ndarray,
+    start_dates: np.ndarray,
+    end_dates: np.ndarray,
+    months: list[tuple[int, int]],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized `calculate_proportional_value` for N allocations x M months.
+    Dates are datetime64[D] arrays (NaT end = open-ended). Returns (active_days, proportional).
+    """
+    month_start = np.array([f"{y:04d}-{m:02d}-01" for m, y in months], dtype="datetime64[D]")
+    days_in_cal = np.array([calendar.monthrange(y, m)[1] for m, y in months])
+    month_end = month_start + (days_in_cal - 1)
+
+    ends = np.where(np.isnat(end_dates), np.datetime64("9999-12-31"), end_dates)
+    effective_start = np.maximum(start_dates[:, None], month_start[None, :])
+    effective_end = np.minimum(ends[:, None], month_end[None, :])
+    active_days = np.clip((effective_end - effective_start).astype(int) + 1, 0, None)
+
+    values = monthly_values[:, None]
+    raw = np.where(
+        active_days >= days_in_cal[None, :],
+        values,
+        values / CALC_DAYS * active_days,
+    )
+    proportional = raw.round(2)
+    # Float rounding can go either way on half-cent ties: settle those exactly
+    scaled = raw * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i, j in zip(*np.nonzero(ties)):
+        proportional[i, j] = _prorate(float(monthly_values[i]), int(active_days[i, j]))
+    return active_days, proportional
+
+
+def proportional_sql(monthly_value, start_date, end_date, month: int, year: int):
+    """SQL version of `calculate_proportional_value` (LEAST/GREATEST date arithmetic).
+    Returns (active_days, proportional_value) column expressions.
+    """
+    days_in_cal = calendar.monthrange(year, month)[1]
+    month_start = literal(date(year, month, 1), Date)
+    month_end = literal(date(year, month, days_in_cal), Date)
+    effective_start = func.greatest(start_date, month_start)
+    effective_end = func.least(func.coalesce(end_date, month_end), month_end)
+    active_days = func.greatest(effective_end - effective_start + 1, 0)
+    proportional = case(
+        (active_days >= days_in_cal, func.round(monthly_value, 2)),
+        else_=func.round(cast(monthly_value * active_days, Numeric) / CALC_DAYS, 2),
+    )
+    return active_days, proportional
+
+
+# === Month close ===
+_CLOSE_TOTALS = (
+    "total_receivable", "total_received", "total_operational_cost",
+    "tax_amount", "marketing_amount", "total_extras", "net_profit",
+)
+
+
+async def _get_month_close(
     db: AsyncSession, month: int, year: int
-) -> MonthlyFinancials:
+) -> FinancialMonthClose | None:
+    result = await db.execute(
+        select(FinancialMonthClose)
+        .where(FinancialMonthClose.month == month, FinancialMonthClose.year == year)
+        .options(selectinload(FinancialMonthClose.rows))
+    )
+    return result.scalar_one_or_none()
+
+
+async def _ensure_month_open(db: AsyncSession, month: int, year: int) -> None:
+    closed = await db.scalar(
+        select(FinancialMonthClose.id).where(
+            FinancialMonthClose.month == month, FinancialMonthClose.year == year
+        )
+    )
+    if closed:
+        raise HTTPException(status_code=409, detail="Mês fechado: reabra o mês para editar")
+
+
+def _build_close(data: dict, user_id: int | None) -> FinancialMonthClose:
+    rows = [
+        FinancialCloseRow(
+            dimension="client", ref_id=c["client_id"], name=c["client_name"],
+            total_monthly=c["total_monthly"], total_proportional=c["total_proportional"],
+            allocations=jsonable_encoder(c["allocations"]),
+        )
+        for c in data["by_client"]
+    ] + [
+        FinancialCloseRow(
+            dimension="member", ref_id=m["member_id"], name=m["member_name"],
+            role_title=m["role_title"], total_monthly=m["total_monthly"],
+            total_proportional=m["total_proportional"],
+            allocations=jsonable_encoder(m["allocations"]),
+        )
+        for m in data["by_member"]
+    ] + [
+        FinancialCloseRow(
+            dimension="squad", ref_id=sq["squad_id"], name=sq["squad_name"],
+            total_monthly=sq["total_monthly"], total_proportional=sq["total_proportional"],
+        )
+        for sq in data["by_squad"]
+    ] + [
+        FinancialCloseRow(
+            dimension="role", name=r["role_title"],
+            total_monthly=r["total_monthly"], total_proportional=r["total_proportional"],
+        )
+        for r in data["by_role"]
+    ]
+    return FinancialMonthClose(
+        month=data["month"],
+        year=data["year"],
+        closed_by_id=user_id,
+        rows=rows,
+        **{k: data[k] for k in _CLOSE_TOTALS},
+    )
+
+
+def _close_rows(close: FinancialMonthClose) -> dict[str, list[dict]]:
+    grouped = {"by_client": [], "by_member": [], "by_squad": [], "by_role": []}
+    for row in close.rows:
+        totals = {"total_monthly": row.total_monthly, "total_proportional": row.total_proportional}
+        if row.dimension == "client":
+            grouped["by_client"].append({
+                "client_id": row.ref_id, "client_name": row.name,
+                **totals, "allocations": row.allocations or [],
+            })
+        elif row.dimension == "member":
+            grouped["by_member"].append({
+                "member_id": row.ref_id, "member_name": row.name, "role_title": row.role_title,
+                **totals, "allocations": row.allocations or [],
+            })
+        elif row.dimension == "squad":
+            grouped["by_squad"].append({"squad_id": row.ref_id, "squad_name": row.name, **totals})
+        else:
+            grouped["by_role"].append({"role_title": row.name, **totals})
+    return grouped
+
+
+async def _close_to_dashboard(db: AsyncSession, close: FinancialMonthClose) -> dict:
+    # Extras are frozen too (edits are blocked), so listing them live matches total_extras
+    extras = await get_extra_expenses(db, close.month, close.year)
+    return {
+        "month": close.month,
+        "year": close.year,
+        "is_personal": False,
+        "is_closed": True,
+        "closed_at": close.closed_at,
+        **{k: getattr(close, k) for k in _CLOSE_TOTALS},
+        "extra_expenses": extras,
+        **_close_rows(close),
+    }
+
+
+async def close_month(
+    db: AsyncSession, month: int, year: int, user_id: int
+) -> FinancialMonthClose:
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="Mês inválido")
+    today = date.today()
+    if (year, month) >= (today.year, today.month):
+        raise HTTPException(status_code=400, detail="Só é possível fechar meses anteriores ao atual")
+    if await _get_month_close(db, month, year):
+        raise HTTPException(status_code=409, detail="Mês já está fechado")
+    data = await _compute_dashboard(db, month, year)
+    close = _build_close(data, user_id)
+    db.add(close)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Closed concurrently (unique month/year)
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Mês já está fechado")
+    await db.refresh(close)
+    return close
+
+
+async def reopen_month(db: AsyncSession, month: int, year: int) -> None:
+    close = await _get_month_close(db, month, year)
+    if not close:
+        raise HTTPException(status_code=404, detail="Mês não está fechado")
+    await db.delete(close)
+    await db.commit()
+
+
+async def recompute_month(
+    db: AsyncSession, month: int, year: int, user_id: int
+) -> FinancialMonthClose:
+    """Replace a closed month's snapshot with a fresh computation, atomically."""
+    close = await _get_month_close(db, month, year)
+    if not close:
+        raise HTTPException(status_code=404, detail="Mês não está fechado")
+    data = await _compute_dashboard(db, month, year)
+    await db.delete(close)
+    await db.flush()
+    new_close = _build_close(data, user_id)
+    db.add(new_close)
+    await db.commit()
+    await db.refresh(new_close)
+    return new_close
+
+
+def _row_key(dimension: str, item: dict):
+    return {
+        "by_client": lambda: item["client_id"],
+        "by_member": lambda: item["member_id"],
+        "by_squad": lambda: item["squad_id"],
+        "by_role": lambda: item["role_title"],
+    }[dimension]()
+
+
+def _row_name(dimension: str, item: dict) -> str:
+    field = {"by_client": "client_name", "by_member": "member_name",
+             "by_squad": "squad_name", "by_role": "role_title"}[dimension]
+    return item[field]
+
+
+async def diff_month(db: AsyncSession, month: int, year: int) -> dict:
+    """Compare a closed month's snapshot with a fresh recomputation (only changes listed)."""
+    close = await _get_month_close(db, month, year)
+    if not close:
+        raise HTTPException(status_code=404, detail="Mês não está fechado")
+    current = await _compute_dashboard(db, month, year)
+
+    totals = []
+    for field in _CLOSE_TOTALS:
+        before, after = getattr(close, field), current[field]
+        if before != after:
+            delta = round(after - before, 2) if before is not None and after is not None else None
+            totals.append({"field": field, "snapshot": before, "current": after, "delta": delta})
+
+    changed_rows = []
+    snapshot_rows = _close_rows(close)
+    for dimension in ("by_client", "by_member", "by_squad", "by_role"):
+        before = {_row_key(dimension, r): r for r in snapshot_rows[dimension]}
+        after = {_row_key(dimension, r): r for r in current[dimension]}
+        for key in dict.fromkeys([*before, *after]):
+            b, a = before.get(key), after.get(key)
+            b_value = b["total_proportional"] if b else 0.0
+            a_value = a["total_proportional"] if a else 0.0
+            if round(a_value - b_value, 2) == 0 and (b is None) == (a is None):
+                continue
+            changed_rows.append({
+                "dimension": dimension.removeprefix("by_"),
+                "ref_id": key if dimension != "by_role" else None,
+                "name": _row_name(dimension, a or b),
+                "snapshot_proportional": b_value,
+                "current_proportional": a_value,
+                "delta": round(a_value - b_value, 2),
+            })
+
+    return {
+        "month": month,
+        "year": year,
+        "closed_at": close.closed_at,
+        "has_changes": bool(totals or changed_rows),
+        "totals": totals,
+        "rows": changed_rows,
+    }
+
+
+async def get_monthly_financials(
+    db: AsyncSession, month: int, year: int
+) -> MonthlyFinancials | None:
+    """Read-only lookup; a month without a row simply has no figures yet."""
     result = await db.execute(
         select(MonthlyFinancials).where(
             MonthlyFinancials.month == month,
             MonthlyFinancials.year == year,
         )
     )
-    mf = result.scalar_one_or_none()
-    if not mf:
-        mf = MonthlyFinancials(month=month, year=year)
-        db.add(mf)
-        await db.commit()
-        await db.refresh(mf)
-    return mf
+    return result.scalar_one_or_none()
 
 
 async def upsert_monthly_financials(
     db: AsyncSession, month: int, year: int, data: MonthlyFinancialsUpdate
 ) -> MonthlyFinancials:
-    mf = await get_or_create_monthly_financials(db, month, year)
+    await _ensure_month_open(db, month, year)
     update_dict = data.model_dump(exclude_unset=True)
-    for k, v in update_dict.items():
-        setattr(mf, k, v)
+    # Atomic create: concurrent requests for a new month can't produce duplicates
+    inserted_id = await db.scalar(
+        insert(MonthlyFinancials)
+        .values(month=month, year=year, **update_dict)
+        .on_conflict_do_nothing(index_elements=["month", "year"])
+        .returning(MonthlyFinancials.id)
+    )
+    if inserted_id is None and update_dict:
+        await db.execute(
+            update(MonthlyFinancials)
+            .where(MonthlyFinancials.month == month, MonthlyFinancials.year == year)
+            .values(**update_dict)
+        )
     await db.commit()
-    await db.refresh(mf)
-    return mf
+    return await get_monthly_financials(db, month, year)
 
 
 async def get_extra_expenses(
@@ -92,6 +376,7 @@ async def get_extra_expenses(
 async def create_extra_expense(
     db: AsyncSession, data: ExtraExpenseCreate, user_id: int
 ) -> ExtraExpense:
+    await _ensure_month_open(db, data.month, data.year)
     expense = ExtraExpense(**data.model_dump(), created_by_id=user_id)
     db.add(expense)
     await db.commit()
@@ -108,6 +393,7 @@ async def update_extra_expense(
     expense = result.scalar_one_or_none()
     if not expense:
         raise HTTPException(status_code=404, detail="Lançamento não encontrado")
+    await _ensure_month_open(db, expense.month, expense.year)
     update_dict = data.model_dump(exclude_unset=True)
     for k, v in update_dict.items():
         setattr(expense, k, v)
@@ -123,6 +409,7 @@ async def delete_extra_expense(db: AsyncSession, expense_id: int) -> None:
     expense = result.scalar_one_or_none()
     if not expense:
         raise HTTPException(status_code=404, detail="Lançamento não encontrado")
+    await _ensure_month_open(db, expense.month, expense.year)
     await db.delete(expense)
     await db.commit()
 
@@ -138,160 +425,211 @@ async def get_financial_dashboard(
     member_id_filter=None  → admin view (all data, full P&L)
     member_id_filter=<id>  → personal view (own allocations only, no company P&L)
     member_id_filter=-1    → user not linked to a team member (return empty)
+    Closed months are served from their snapshot in the admin view.
+    """
+    if member_id_filter is None:
+        close = await _get_month_close(db, month, year)
+        if close:
+            return await _close_to_dashboard(db, close)
+    return await _compute_dashboard(db, month, year, member_id_filter)
+
+
+def _allocation_cost_columns(month: int, year: int):
+    """Per-allocation columns with the month's proration computed in SQL."""
+    active_days, proportional = proportional_sql(
+        TeamAllocation.monthly_value, TeamAllocation.start_date, TeamAllocation.end_date,
+        month, year,
+    )
+    return active_days, proportional, select(
+        TeamAllocation.id.label("allocation_id"),
+        TeamMember.id.label("member_id"),
+        TeamMember.name.label("member_name"),
+        Client.id.label("client_id"),
+        Client.name.label("client_name"),
+        TeamAllocation.monthly_value,
+        TeamAllocation.start_date,
+        TeamAllocation.end_date,
+        active_days.label("active_days"),
+        proportional.label("proportional_value"),
+    ).join(TeamMember, TeamAllocation.member_id == TeamMember.id).join(
+        Client, TeamAllocation.client_id == Client.id
+    )
+
+
+def _allocation_cost(row, days_in_month: int) -> dict:
+    return {
+        "allocation_id": row.allocation_id,
+        "member_id": row.member_id,
+        "member_name": row.member_name,
+        "client_id": row.client_id,
+        "client_name": row.client_name,
+        "monthly_value": float(row.monthly_value),
+        "start_date": row.start_date,
+        "end_date": row.end_date,
+        "days_in_month": days_in_month,
+        "active_days": row.active_days,
+        "proportional_value": float(row.proportional_value),
+    }
+
+
+async def _compute_dashboard(
+    db: AsyncSession,
+    month: int,
+    year: int,
+    member_id_filter: int | None = None,
+) -> dict:
+    """Live dashboard computed from the current allocations.
+    Proration and the client/member/squad/role totals are computed by Postgres.
     """
     is_personal = member_id_filter is not None
+    days_in_month = calendar.monthrange(year, month)[1]
 
-    q = (
-        select(TeamAllocation, TeamMember, Client, Squad)
+    _, proportional, detail_q = _allocation_cost_columns(month, year)
+    # Range overlap on the GiST-indexed period (same rows as active_days > 0)
+    in_month = TeamAllocation.overlapping(
+        date(year, month, 1), date(year, month, days_in_month)
+    )
+    detail_q = detail_q.where(in_month)
+
+    # Inline literals: grouping expressions must match the select list textually
+    squad_name = func.coalesce(Squad.name, literal_column("'Sem Squad'"))
+    role = func.coalesce(TeamMember.role_title, literal_column("'Sem Cargo'"))
+    totals_q = (
+        select(
+            func.grouping(Client.id, TeamMember.id, Squad.id, role).label("grouping"),
+            Client.id.label("client_id"), Client.name.label("client_name"),
+            TeamMember.id.label("member_id"), TeamMember.name.label("member_name"),
+            TeamMember.role_title,
+            Squad.id.label("squad_id"), squad_name.label("squad_name"),
+            role.label("role"),
+            func.sum(TeamAllocation.monthly_value).label("total_monthly"),
+            func.sum(proportional).label("total_proportional"),
+        )
+        .select_from(TeamAllocation)
         .join(TeamMember, TeamAllocation.member_id == TeamMember.id)
         .join(Client, TeamAllocation.client_id == Client.id)
         .outerjoin(Squad, TeamMember.squad_id == Squad.id)
+        .where(in_month)
+        .group_by(func.grouping_sets(
+            tuple_(Client.id, Client.name),
+            tuple_(TeamMember.id, TeamMember.name, TeamMember.role_title),
+            tuple_(Squad.id, squad_name),
+            tuple_(role),
+            tuple_(),
+        ))
     )
     if is_personal:
-        q = q.where(TeamAllocation.member_id == member_id_filter)
+        detail_q = detail_q.where(TeamAllocation.member_id == member_id_filter)
+        totals_q = totals_q.where(TeamAllocation.member_id == member_id_filter)
 
-    result = await db.execute(q)
-    rows = result.all()
+    # Reads run in parallel on their own sessions; the allocation rows and their totals
+    # share one snapshot so every row has its client/member group
+    if not is_personal:
+        active_q = select(Client).where(
+            Client.monthly_value.isnot(None),
+            Client.status.in_([ClientStatus.ACTIVE, ClientStatus.ONBOARDING]),
+        )
+        (detail_rows, total_rows), active_clients, extras, mf = await run_concurrently(
+            snapshot_rows(detail_q, totals_q), scalars(active_q),
+            lambda session: get_extra_expenses(session, month, year),
+            lambda session: get_monthly_financials(session, month, year),
+        )
+    else:
+        # Personal view: sum of member's currently active allocation monthly values
+        today = date.today()
+        active_alloc_q = select(TeamAllocation).where(
+            TeamAllocation.member_id == member_id_filter,
+            TeamAllocation.overlapping(today),
+        )
+        (detail_rows, total_rows), active_allocs = await run_concurrently(
+            snapshot_rows(detail_q, totals_q), scalars(active_alloc_q)
+        )
 
     by_client: dict[int, dict] = {}
     by_member: dict[int, dict] = {}
-    by_squad: dict = {}
-    by_role: dict[str, dict] = {}
+    by_squad: list[dict] = []
+    by_role: list[dict] = []
     total_cost = 0.0
 
-    for allocation, member, client, squad in rows:
-        calc = calculate_proportional_value(
-            float(allocation.monthly_value),
-            allocation.start_date,
-            allocation.end_date,
-            month,
-            year,
-        )
-        if calc["active_days"] == 0:
-            continue
-
-        alloc_data = {
-            "allocation_id": allocation.id,
-            "member_id": member.id,
-            "member_name": member.name,
-            "client_id": client.id,
-            "client_name": client.name,
-            "monthly_value": float(allocation.monthly_value),
-            "start_date": allocation.start_date,
-            "end_date": allocation.end_date,
-            **calc,
+    # grouping() bitmask over (client, member, squad, role): 0 bits = grouped columns
+    for row in total_rows:
+        totals = {
+            "total_monthly": float(row.total_monthly or 0),
+            "total_proportional": float(row.total_proportional or 0),
         }
-        total_cost += calc["proportional_value"]
-
-        if client.id not in by_client:
-            by_client[client.id] = {
-                "client_id": client.id,
-                "client_name": client.name,
-                "total_monthly": 0.0,
-                "total_proportional": 0.0,
-                "allocations": [],
+        if row.grouping == 0b0111:
+            by_client[row.client_id] = {
+                "client_id": row.client_id, "client_name": row.client_name,
+                **totals, "allocations": [],
             }
-        by_client[client.id]["total_monthly"] += float(allocation.monthly_value)
-        by_client[client.id]["total_proportional"] += calc["proportional_value"]
-        by_client[client.id]["allocations"].append(alloc_data)
-
-        if member.id not in by_member:
-            by_member[member.id] = {
-                "member_id": member.id,
-                "member_name": member.name,
-                "role_title": member.role_title,
-                "total_monthly": 0.0,
-                "total_proportional": 0.0,
-                "allocations": [],
+        elif row.grouping == 0b1011:
+            by_member[row.member_id] = {
+                "member_id": row.member_id, "member_name": row.member_name,
+                "role_title": row.role_title, **totals, "allocations": [],
             }
-        by_member[member.id]["total_monthly"] += float(allocation.monthly_value)
-        by_member[member.id]["total_proportional"] += calc["proportional_value"]
-        by_member[member.id]["allocations"].append(alloc_data)
-
-        # Squad and role aggregates only for admin view
-        if not is_personal:
-            squad_key = squad.id if squad else 0
-            squad_name = squad.name if squad else "Sem Squad"
-            if squad_key not in by_squad:
-                by_squad[squad_key] = {
-                    "squad_id": squad.id if squad else None,
-                    "squad_name": squad_name,
-                    "total_monthly": 0.0,
-                    "total_proportional": 0.0,
-                }
-            by_squad[squad_key]["total_monthly"] += float(allocation.monthly_value)
-            by_squad[squad_key]["total_proportional"] += calc["proportional_value"]
-
-            role = member.role_title or "Sem Cargo"
-            if role not in by_role:
-                by_role[role] = {
-                    "role_title": role,
-                    "total_monthly": 0.0,
-                    "total_proportional": 0.0,
-                }
-            by_role[role]["total_monthly"] += float(allocation.monthly_value)
-            by_role[role]["total_proportional"] += calc["proportional_value"]
+        elif row.grouping == 0b1101:
+            by_squad.append({"squad_id": row.squad_id, "squad_name": row.squad_name, **totals})
+        elif row.grouping == 0b1110:
+            by_role.append({"role_title": row.role, **totals})
+        else:
+            total_cost = totals["total_proportional"]
+
+    for row in detail_rows:
+        alloc_data = _allocation_cost(row, days_in_month)
+        by_client[row.client_id]["allocations"].append(alloc_data)
+        by_member[row.member_id]["allocations"].append(alloc_data)
 
-    def sort_desc(d: dict):
-        return sorted(d.values(), key=lambda x: x["total_proportional"], reverse=True)
+    def sort_desc(items):
+        return sorted(items, key=lambda x: x["total_proportional"], reverse=True)
 
     if not is_personal:
         # Admin: full company P&L
-        active_result = await db.execute(
-            select(Client).where(
-                Client.monthly_value.isnot(None),
-                Client.status.in_([ClientStatus.ACTIVE, ClientStatus.ONBOARDING]),
-            )
-        )
-        active_clients = list(active_result.scalars().all())
         total_receivable = round(
             sum(float(c.monthly_value) for c in active_clients if c.monthly_value), 2
         )
-
-        mf = await get_or_create_monthly_financials(db, month, year)
-        extras = await get_extra_expenses(db, month, year)
         total_extras = round(sum(float(e.amount) for e in extras), 2)
 
+        # No monthly row yet → no figures entered (nothing is created on read)
+        total_received = mf.total_received if mf else None
+        tax_amount = mf.tax_amount if mf else None
+        marketing_amount = mf.marketing_amount if mf else None
+
         net_profit = None
-        if mf.total_received is not None:
+        if total_received is not None:
             expenses = round(
-                total_cost + (mf.tax_amount or 0) + (mf.marketing_amount or 0) + total_extras, 2
+                total_cost + (tax_amount or 0) + (marketing_amount or 0) + total_extras, 2
             )
-            net_profit = round(mf.total_received - expenses, 2)
+            net_profit = round(total_received - expenses, 2)
 
         return {
             "month": month,
             "year": year,
             "is_personal": False,
+            "is_closed": False,
+            "closed_at": None,
             "total_receivable": total_receivable,
-            "total_received": mf.total_received,
+            "total_received": total_received,
             "total_operational_cost": round(total_cost, 2),
-            "tax_amount": mf.tax_amount,
-            "marketing_amount": mf.marketing_amount,
+            "tax_amount": tax_amount,
+            "marketing_amount": marketing_amount,
             "total_extras": total_extras,
             "net_profit": net_profit,
             "extra_expenses": extras,
-            "by_client": sort_desc(by_client),
-            "by_member": sort_desc(by_member),
+            "by_client": sort_desc(by_client.values()),
+            "by_member": sort_desc(by_member.values()),
             "by_squad": sort_desc(by_squad),
             "by_role": sort_desc(by_role),
         }
     else:
-        # Personal view: sum of member's currently active allocation monthly values
-        today = date.today()
-        active_alloc_res = await db.execute(
-            select(TeamAllocation).where(
-                TeamAllocation.member_id == member_id_filter,
-                or_(TeamAllocation.end_date.is_(None), TeamAllocation.end_date >= today),
-            )
-        )
-        active_allocs = active_alloc_res.scalars().all()
+        # Personal view
         total_receivable = round(sum(float(a.monthly_value) for a in active_allocs), 2)
 
         return {
             "month": month,
             "year": year,
             "is_personal": True,
+            "is_closed": False,
+            "closed_at": None,
             "total_receivable": total_receivable,
             "total_received": None,
             "total_operational_cost": round(total_cost, 2),
@@ -300,8 +638,8 @@ async def get_financial_dashboard(
             "total_extras": 0.0,
             "net_profit": None,
             "extra_expenses": [],
-            "by_client": sort_desc(by_client),
-            "by_member": sort_desc(by_member),
+            "by_client": sort_desc(by_client.values()),
+            "by_member": sort_desc(by_member.values()),
             "by_squad": [],
             "by_role": [],
         }
@@ -310,43 +648,23 @@ async def get_financial_dashboard(
 async def get_client_costs(
     db: AsyncSession, client_id: int, month: int, year: int
 ) -> dict:
-    result = await db.execute(
-        select(TeamAllocation, TeamMember, Client)
-        .join(TeamMember, TeamAllocation.member_id == TeamMember.id)
-        .join(Client, TeamAllocation.client_id == Client.id)
-        .where(TeamAllocation.client_id == client_id)
-    )
-    rows = result.all()
+    _, _, query = _allocation_cost_columns(month, year)
+    result = await db.execute(query.where(TeamAllocation.client_id == client_id))
+    days_in_month = calendar.monthrange(year, month)[1]
 
     allocations = []
     total_monthly = 0.0
     total_proportional = 0.0
     client_name = ""
 
-    for allocation, member, client in rows:
-        client_name = client.name
-        calc = calculate_proportional_value(
-            float(allocation.monthly_value),
-            allocation.start_date,
-            allocation.end_date,
-            month,
-            year,
-        )
-        if calc["active_days"] == 0:
+    for row in result.all():
+        client_name = row.client_name
+        if row.active_days == 0:
             continue
-        total_monthly += float(allocation.monthly_value)
-        total_proportional += calc["proportional_value"]
-        allocations.append({
-            "allocation_id": allocation.id,
-            "member_id": member.id,
-            "member_name": member.name,
-            "client_id": client.id,
-            "client_name": client.name,
-            "monthly_value": float(allocation.monthly_value),
-            "start_date": allocation.start_date,
-            "end_date": allocation.end_date,
-            **calc,
-        })
+        alloc = _allocation_cost(row, days_in_month)
+        total_monthly += alloc["monthly_value"]
+        total_proportional += alloc["proportional_value"]
+        allocations.append(alloc)
 
     return {
         "client_id": client_id,
@@ -355,3 +673,268 @@ async def get_client_costs(
         "total_proportional": round(total_proportional, 2),
         "allocations": allocations,
     }
+
+
+def _months_between(date_from: date, date_to: date) -> list[tuple[int, int]]:
+    months = []
+    m, y = date_from.month, date_from.year
+    while (y, m) <= (date_to.year, date_to.month):
+        months.append((m, y))
+        m, y = (1, y + 1) if m == 12 else (m + 1, y)
+    return months
+
+
+def _group_totals(
+    keys: list, active: np.ndarray, values: np.ndarray, proportional: np.ndarray
+) -> tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+    """Per distinct key and month: (active allocation count, monthly sum, proportional sum)."""
+    index = {k: i for i, k in enumerate(dict.fromkeys(keys))}
+    codes = np.array([index[k] for k in keys], dtype=int)
+    counted = active > 0
+    shape = (len(index), active.shape[1])
+    count, monthly, prop = np.zeros(shape, int), np.zeros(shape), np.zeros(shape)
+    np.add.at(count, codes, counted.astype(int))
+    np.add.at(monthly, codes, np.where(counted, values[:, None], 0.0))
+    np.add.at(prop, codes, np.where(counted, proportional, 0.0))
+    return list(index), count, monthly, prop
+
+
+async def get_financial_range(
+    db: AsyncSession,
+    date_from: date,
+    date_to: date,
+    member_id_filter: int | None = None,
+) -> dict:
+    """Per-month grouped costs for every month in [date_from, date_to].
+    Allocations are loaded once and prorated for all months in one NumPy pass.
+    member_id_filter follows get_financial_dashboard (None = admin, -1 = unlinked).
+    """
+    is_personal = member_id_filter is not None
+    months = _months_between(date_from, date_to)
+
+    q = (
+        select(
+            TeamAllocation.monthly_value, TeamAllocation.start_date, TeamAllocation.end_date,
+            Client.id.label("client_id"), Client.name.label("client_name"),
+            TeamMember.id.label("member_id"), TeamMember.name.label("member_name"),
+            TeamMember.role_title, Squad.id.label("squad_id"), Squad.name.label("squad_name"),
+        )
+        .join(TeamMember, TeamAllocation.member_id == TeamMember.id)
+        .join(Client, TeamAllocation.client_id == Client.id)
+        .outerjoin(Squad, TeamMember.squad_id == Squad.id)
+        .where(TeamAllocation.overlapping(
+            date_from.replace(day=1),
+            date_to.replace(day=calendar.monthrange(date_to.year, date_to.month)[1]),
+        ))
+    )
+    if is_personal:
+        q = q.where(TeamAllocation.member_id == member_id_filter)
+    alloc_rows = (await db.execute(q)).all()
+
+    values = np.array([float(r.monthly_value or 0) for r in alloc_rows])
+    starts = np.array([r.start_date for r in alloc_rows], dtype="datetime64[D]")
+    ends = np.array([r.end_date for r in alloc_rows], dtype="datetime64[D]")
+    active, proportional = proportional_matrix(values, starts, ends, months)
+
+    groups = {
+        "by_client": (
+            [(r.client_id, r.client_name) for r in alloc_rows],
+            lambda k: {"client_id": k[0], "client_name": k[1]},
+        ),
+        "by_member": (
+            [(r.member_id, r.member_name, r.role_title) for r in alloc_rows],
+            lambda k: {"member_id": k[0], "member_name": k[1], "role_title": k[2]},
+        ),
+    }
+    # Squad and role aggregates only for admin view
+    if not is_personal:
+        groups["by_squad"] = (
+            [(r.squad_id, r.squad_name or "Sem Squad") for r in alloc_rows],
+            lambda k: {"squad_id": k[0], "squad_name": k[1]},
+        )
+        groups["by_role"] = (
+            [r.role_title or "Sem Cargo" for r in alloc_rows],
+            lambda k: {"role_title": k},
+        )
+
+    totals = {
+        name: (describe, *_group_totals(keys, active, values, proportional))
+        for name, (keys, describe) in groups.items()
+    }
+    month_totals = np.where(active > 0, proportional, 0.0).sum(axis=0)
+
+    result = []
+    for i, (m, y) in enumerate(months):
+        entry = {
+            "month": m,
+            "year": y,
+            "total_operational_cost": round(float(month_totals[i]), 2),
+            "by_squad": [],
+            "by_role": [],
+        }
+        for name, (describe, keys, count, monthly, prop) in totals.items():
+            items = [
+                {
+                    **describe(key),
+                    "total_monthly": round(float(monthly[k, i]), 2),
+                    "total_proportional": round(float(prop[k, i]), 2),
+                }
+                for k, key in enumerate(keys)
+                if count[k, i]
+            ]
+            entry[name] = sorted(items, key=lambda x: x["total_proportional"], reverse=True)
+        result.append(entry)
+    return {"is_personal": is_personal, "months": result}
+
+
+def _add_months(d: date, months: int) -> date:
+    total = d.year * 12 + d.month - 1 + months
+    year, month = divmod(total, 12)
+    return date(year, month + 1, min(d.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def _contract_end(
+    start_date: date | None, end_date: date | None, min_contract_months: int | None
+) -> date | None:
+    """A client pays at least until the end of its minimum contract term."""
+    if end_date and start_date and min_contract_months:
+        min_end = _add_months(start_date, min_contract_months) - timedelta(days=1)
+        return max(end_date, min_end)
+    return end_date
+
+
+def _to_arrays(items: list[tuple[float, date | None, date | None]]):
+    values = np.array([v for v, _, _ in items], dtype=float)
+    starts = np.array([s or date.min for _, s, _ in items], dtype="datetime64[D]")
+    ends = np.array([e for _, _, e in items], dtype="datetime64[D]")
+    return values, starts, ends
+
+
+def _project(
+    months: list[tuple[int, int]],
+    clients: list[tuple[float, date | None, date | None]],
+    allocations: list[tuple[float, date | None, date | None]],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-month (receivable, allocation cost) with the same proration as the dashboard."""
+    _, receivable = proportional_matrix(*_to_arrays(clients), months)
+    _, cost = proportional_matrix(*_to_arrays(allocations), months)
+    return receivable.sum(axis=0), cost.sum(axis=0)
+
+
+async def get_forecast(db: AsyncSession, data: ForecastRequest) -> dict:
+    """Project receivable, cost and margin for the next `data.months` months.
+    Clients follow monthly_value/start/end (extended to min_contract_months),
+    allocations their own dates capped at that same client end (dropped for clients
+    outside the receivable without an end date), and design cost the
+    average of recent payments. Overrides are applied in memory only.
+    """
+    today = date.today()
+    first = _add_months(today.replace(day=1), 1)
+    starts = [_add_months(first, i) for i in range(data.months)]
+    months = [(d.month, d.year) for d in starts]
+    run_rate_from = _add_months(today.replace(day=1), -data.design_run_rate_months)
+
+    client_q = select(
+        Client.id, Client.monthly_value, Client.start_date, Client.end_date,
+        Client.min_contract_months,
+    ).where(
+        Client.monthly_value.isnot(None),
+        Client.status.in_([ClientStatus.ACTIVE, ClientStatus.ONBOARDING]),
+    )
+    alloc_q = select(
+        TeamAllocation.id, TeamAllocation.client_id, TeamAllocation.monthly_value,
+        TeamAllocation.start_date, TeamAllocation.end_date,
+        Client.start_date.label("client_start"), Client.end_date.label("client_end"),
+        Client.min_contract_months.label("client_min_months"),
+    ).join(Client, Client.id == TeamAllocation.client_id).where(TeamAllocation.overlapping(first))
+    period = DesignPayment.year * 12 + DesignPayment.month
+    design_q = select(func.coalesce(func.sum(DesignPayment.value), 0)).where(
+        period >= run_rate_from.year * 12 + run_rate_from.month,
+        period < today.year * 12 + today.month,
+    )
+    client_rows, alloc_rows, design_total = await run_concurrently(
+        rows(client_q), rows(alloc_q), lambda session: session.scalar(design_q)
+    )
+    design_run_rate = round(float(design_total) / data.design_run_rate_months, 2)
+
+    clients = {
+        c.id: [float(c.monthly_value), c.start_date, c.end_date, c.min_contract_months]
+        for c in client_rows
+    }
+    allocations = {
+        a.id: [a.client_id, float(a.monthly_value or 0), a.start_date, a.end_date]
+        for a in alloc_rows
+    }
+    # Allocated clients outside the receivable (inactive/churned): their contract end
+    other_ends = {
+        a.client_id: _contract_end(a.client_start, a.client_end, a.client_min_months)
+        for a in alloc_rows if a.client_id not in clients
+    }
+
+    def scenario(apply_overrides: bool):
+        client_map = {k: list(v) for k, v in clients.items()}
+        alloc_map = {k: list(v) for k, v in allocations.items()}
+        extra_clients, extra_allocs = [], []
+        if apply_overrides:
+            for end in data.end_clients:
+                if end.client_id not in client_map:
+                    raise HTTPException(
+                        status_code=400, detail=f"Cliente {end.client_id} não está ativo"
+                    )
+                client_map[end.client_id][2] = end.end_date
+            for end in data.end_allocations:
+                if end.allocation_id not in alloc_map:
+                    raise HTTPException(
+                        status_code=400, detail=f"Alocação {end.allocation_id} não encontrada"
+                    )
+                alloc_map[end.allocation_id][3] = end.end_date
+            extra_clients = [
+                (c.monthly_value, c.start_date, _contract_end(c.start_date, c.end_date, c.min_contract_months))
+                for c in data.add_clients
+            ]
+            extra_allocs = [
+                [a.client_id, a.monthly_value, a.start_date, a.end_date]
+                for a in data.add_allocations
+            ]
+
+        client_items = [
+            (value, start, _contract_end(start, end, min_months))
+            for value, start, end, min_months in client_map.values()
+        ] + extra_clients
+        alloc_items = []
+        for client_id, value, start, end in [*alloc_map.values(), *extra_allocs]:
+            # Team work on a client stops when its contract ends (same end as its revenue)
+            if client_id in client_map:
+                _, c_start, c_end, c_min_months = client_map[client_id]
+                client_end = _contract_end(c_start, c_end, c_min_months)
+            elif client_id in other_ends:
+                client_end = other_ends[client_id]
+                if client_end is None:
+                    continue  # no revenue and no end date: no projected cost either
+            else:
+                client_end = None
+            if client_end and (end is None or client_end < end):
+                end = client_end
+            alloc_items.append((value, start, end))
+        return _project(months, client_items, alloc_items)
+
+    has_overrides = bool(
+        data.end_clients or data.end_allocations or data.add_clients or data.add_allocations
+    )
+    base_receivable, base_cost = scenario(False)
+    receivable, alloc_cost = scenario(True) if has_overrides else (base_receivable, base_cost)
+
+    result = []
+    for i, (m, y) in enumerate(months):
+        cost = float(alloc_cost[i]) + design_run_rate
+        result.append({
+            "month": m,
+            "year": y,
+            "receivable": round(float(receivable[i]), 2),
+            "allocation_cost": round(float(alloc_cost[i]), 2),
+            "design_cost": design_run_rate,
+            "cost": round(cost, 2),
+            "margin": round(float(receivable[i]) - cost, 2),
+            "baseline_margin": round(float(base_receivable[i] - base_cost[i]) - design_run_rate, 2),
+        })
+    return {"has_overrides": has_overrides, "design_run_rate": design_run_rate, "months": result}
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.security import require_role
+from app.modules.auth.models import User
+from app.modules.jobs import schemas, services
+
+router = APIRouter(prefix="/jobs", tags=["Tarefas"])
+
+
+@router.get("/{job_id}", response_model=schemas.JobResponse)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    return await services.get_job(db, job_id)
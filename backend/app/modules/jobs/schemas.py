@@ -0,0 +1,17 @@
+from datetime import datetime
+from pydantic import BaseModel
+from app.modules.jobs.models import JobStatus
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    target_id: int | None
+    status: JobStatus
+    progress: dict = {}
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
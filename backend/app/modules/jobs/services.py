@@ -0,0 +1,131 @@
+"""Background jobs persisted in background_jobs.
+
+A job is enqueued by the request that needs it and started right after the response
+(FastAPI background task). A scheduled sweep picks up jobs that never started or
+whose worker died mid-run, so handlers must be safe to re-run from the start.
+"""
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.modules.jobs.models import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# handler(db, job_id, target_id)
+JobHandler = Callable[[AsyncSession, int, int | None], Awaitable[None]]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def register_handler(kind: str, handler: JobHandler) -> None:
+    _handlers[kind] = handler
+
+
+async def enqueue_job(
+    db: AsyncSession, kind: str, target_id: int | None, user_id: int | None
+) -> BackgroundJob:
+    """Create a pending job, or return the one already queued/running for the same target."""
+    active = select(BackgroundJob).where(
+        BackgroundJob.kind == kind,
+        BackgroundJob.target_id == target_id,
+        BackgroundJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+    )
+    job = (await db.execute(active)).scalars().first()
+    if job:
+        return job
+    job = BackgroundJob(kind=kind, target_id=target_id, created_by_id=user_id, progress={})
+    db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request queued it first (uq_background_jobs_active)
+        await db.rollback()
+        job = (await db.execute(active)).scalars().first()
+        if job:
+            return job
+        raise
+    await db.refresh(job)
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: int) -> BackgroundJob:
+    result = await db.execute(select(BackgroundJob).where(BackgroundJob.id == job_id))
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return job
+
+
+def progress_update(job_id: int, progress: dict):
+    """UPDATE for a handler to run in the same transaction as the work it reports."""
+    return (
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(progress=progress, updated_at=datetime.now(timezone.utc))
+    )
+
+
+async def run_job(job_id: int) -> None:
+    """Claim and run a job; no-op when it is done or another worker holds it."""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    async with AsyncSessionLocal() as db:
+        claimed = await db.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id == job_id,
+                or_(
+                    BackgroundJob.status == JobStatus.PENDING,
+                    (BackgroundJob.status == JobStatus.RUNNING) & (BackgroundJob.updated_at < stale),
+                ),
+            )
+            .values(status=JobStatus.RUNNING, started_at=now, updated_at=now)
+            .returning(BackgroundJob.kind, BackgroundJob.target_id)
+        )
+        job = claimed.first()
+        await db.commit()
+        if not job:
+            return
+        try:
+            await _handlers[job.kind](db, job_id, job.target_id)
+        except Exception as exc:
+            await db.rollback()
+            logger.exception("Background job %s (%s) failed", job_id, job.kind)
+            status, error = JobStatus.FAILED, str(exc)[:2000]
+        else:
+            status, error = JobStatus.DONE, None
+        finished = datetime.now(timezone.utc)
+        await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id)
+            .values(status=status, error=error, finished_at=finished, updated_at=finished)
+        )
+        await db.commit()
+
+
+async def resume_jobs() -> None:
+    """Scheduled sweep: run jobs that were never started or whose worker stopped."""
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(BackgroundJob.id)
+            .where(
+                or_(
+                    (BackgroundJob.status == JobStatus.PENDING)
+                    & (BackgroundJob.created_at < now - timedelta(seconds=settings.JOBS_SWEEP_SECONDS)),
+                    (BackgroundJob.status == JobStatus.RUNNING)
+                    & (BackgroundJob.updated_at < now - timedelta(seconds=settings.JOB_STALE_SECONDS)),
+                ),
+            )
+            .order_by(BackgroundJob.id)
+        )
+        job_ids = list(result.scalars().all())
+    for job_id in job_ids:
+        await run_job(job_id)
@@ -1,8 +1,10 @@
 import enum
 from datetime import datetime, date, timezone
 from sqlalchemy import (
-    String, Enum, DateTime, Date, Integer, ForeignKey, Numeric, Text
+    String, Enum, DateTime, Date, Integer, ForeignKey, Numeric, Text, Index, Computed,
+    cast, func,
 )
+from sqlalchemy.dialects.postgresql import DATERANGE, ExcludeConstraint, Range
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 
@@ -72,8 +74,29 @@ class TeamMember(Base):
     )
 
 
+ACTIVE_RANGE_SQL = (
+    "CASE WHEN end_date IS NULL OR end_date >= start_date "
+    "THEN daterange(start_date, end_date, '[]') ELSE 'empty'::daterange END"
+)
+
+
+def date_range(start, end=None):
+    """Inclusive daterange from dates or date columns (end=None: open-ended)."""
+    def bound(value):
+        return cast(value, Date) if value is None or isinstance(value, date) else value
+    return func.daterange(bound(start), bound(end), "[]", type_=DATERANGE)
+
+
 class TeamAllocation(Base):
     __tablename__ = "team_allocations"
+    __table_args__ = (
+        Index("ix_team_allocations_active_range", "active_range", postgresql_using="gist"),
+        # A member can't be allocated twice to the same client over overlapping periods
+        ExcludeConstraint(
+            ("member_id", "="), ("client_id", "="), ("active_range", "&&"),
+            name="ex_team_allocations_member_client_overlap", using="gist",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     member_id: Mapped[int] = mapped_column(
@@ -87,9 +110,24 @@ class TeamAllocation(Base):
     )
     start_date: Mapped[date] = mapped_column(Date)
     end_date: Mapped[date] = mapped_column(Date, nullable=True)
+    # Inclusive [start_date, end_date]; empty when the dates are inverted
+    active_range: Mapped[Range[date]] = mapped_column(
+        DATERANGE,
+        Computed(ACTIVE_RANGE_SQL, persisted=True),
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
 
     member = relationship("TeamMember", back_populates="allocations")
     client = relationship("Client", back_populates="allocations")
+
+    @classmethod
+    def overlapping(cls, start: date, end: date | None = None):
+        """Active on at least one day of [start, end] (end=None: open-ended)."""
+        return cls.active_range.overlaps(date_range(start, end))
+
+    @classmethod
+    def active_on(cls, day: date):
+        return cls.active_range.contains(cast(day, Date))
+
@@ -1,3 +1,4 @@
+from datetime import date
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
@@ -65,6 +66,15 @@ async def list_members(
     return await services.get_all_members(db, squad_id, status, current_user)
 
 
+@router.get("/capacity", response_model=list[schemas.MemberCapacity])
+async def member_capacity(
+    squad_id: int | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin", "gerente")),
+):
+    return await services.get_member_capacity(db, squad_id, current_user)
+
+
 @router.get("/members/{member_id}", response_model=schemas.TeamMemberDetail)
 async def get_member(
     member_id: int,
@@ -116,10 +126,12 @@ async def create_allocation(
 async def list_allocations(
     client_id: int | None = Query(None),
     member_id: int | None = Query(None),
+    active_on: date | None = Query(None),
+    squad_id: int | None = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await services.get_allocations(db, client_id, member_id)
+    return await services.get_allocations(db, client_id, member_id, active_on, squad_id)
 
 
 @router.patch("/allocations/{allocation_id}", response_model=schemas.AllocationResponse)
@@ -67,6 +67,19 @@ class TeamMemberDetail(TeamMemberResponse):
     allocations: list = []
 
 
+class MemberCapacity(BaseModel):
+    member_id: int
+    member_name: str
+    role_title: str | None = None
+    squad_id: int | None = None
+    open_demands: int = 0
+    open_by_priority: dict[str, int] = {}
+    overdue_demands: int = 0
+    active_allocations: int = 0
+    allocation_value: float = 0
+    design_in_progress: int = 0
+
+
 # Allocation
 class AllocationCreate(BaseModel):
     member_id: int
@@ -76,9 +89,19 @@ class AllocationCreate(BaseModel):
     end_date: date | None = None
 
 
+class BulkAllocationItem(BaseModel):
+    index: int
+    member_id: int
+    client_id: int
+    created: bool
+    allocation_id: int | None = None
+    reason: str | None = None
+
+
 class BulkAllocationResult(BaseModel):
     created: int
     skipped: int
+    items: list[BulkAllocationItem] = []
 
 
 class AllocationUpdate(BaseModel):
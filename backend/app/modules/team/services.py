@@ -1,14 +1,28 @@
+from datetime import date, datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete as sa_delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import (
+    Date, Integer, column, exists, func, select, values, delete as sa_delete,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.orm import aliased, selectinload
 from fastapi import HTTPException
-from app.modules.team.models import Squad, TeamMember, TeamAllocation, MemberSquad
+from app.modules.team.models import (
+    Squad, TeamMember, TeamAllocation, MemberSquad, MemberStatus, date_range,
+)
 from app.modules.team.schemas import (
     SquadCreate, SquadUpdate,
     TeamMemberCreate, TeamMemberUpdate,
     AllocationCreate, AllocationUpdate,
 )
+from app.core.cache import cache_get, cache_set
+from app.core.concurrency import rows, run_concurrently
+from app.core.config import get_settings
 from app.modules.clients.models import Client
+from app.modules.demands.models import Demand, DemandPriority, DemandStatus
+from app.modules.design.models import INTAKE_COLUMN, DesignColumn, DesignDemand
+from app.shared.scope import get_user_scope, invalidate_user_scopes
+
+settings = get_settings()
 
 
 # === Squad ===
@@ -16,6 +30,7 @@ async def create_squad(db: AsyncSession, data: SquadCreate) -> Squad:
     squad = Squad(**data.model_dump())
     db.add(squad)
     await db.commit()
+    await invalidate_user_scopes()
     await db.refresh(squad)
     return squad
 
@@ -47,6 +62,7 @@ async def update_squad(db: AsyncSession, squad_id: int, data: SquadUpdate) -> Sq
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(squad, field, value)
     await db.commit()
+    await invalidate_user_scopes()
     await db.refresh(squad)
     return squad
 
@@ -55,14 +71,37 @@ async def delete_squad(db: AsyncSession, squad_id: int) -> None:
     squad = await get_squad_by_id(db, squad_id)
     await db.delete(squad)
     await db.commit()
+    await invalidate_user_scopes()
 
 
 # === Team Member helpers ===
-async def _get_squad_ids_for_member(db: AsyncSession, member_id: int) -> list[int]:
+def _squad_ids_subquery():
+    """member_id → array of squad ids, to join onto member queries (no per-member lookups)."""
+    return (
+        select(
+            MemberSquad.member_id,
+            func.array_agg(aggregate_order_by(MemberSquad.squad_id, MemberSquad.squad_id))
+            .label("squad_ids"),
+        )
+        .group_by(MemberSquad.member_id)
+        .subquery()
+    )
+
+
+async def _get_member_with_squads(
+    db: AsyncSession, member_id: int, *options
+) -> tuple[TeamMember, list[int]]:
+    squads = _squad_ids_subquery()
     result = await db.execute(
-        select(MemberSquad.squad_id).where(MemberSquad.member_id == member_id)
+        select(TeamMember, squads.c.squad_ids)
+        .outerjoin(squads, squads.c.member_id == TeamMember.id)
+        .where(TeamMember.id == member_id)
+        .options(*options)
     )
-    return [row[0] for row in result.all()]
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="Membro não encontrado")
+    return row[0], list(row.squad_ids or [])
 
 
 async def _save_squad_assignments(
@@ -95,6 +134,7 @@ async def create_member(db: AsyncSession, data: TeamMemberCreate) -> dict:
     effective_ids = squad_ids if squad_ids else ([primary_squad] if primary_squad else [])
     await _save_squad_assignments(db, member.id, effective_ids)
     await db.commit()
+    await invalidate_user_scopes()
     await db.refresh(member)
     return _member_to_dict(member, effective_ids)
 
@@ -107,30 +147,26 @@ async def get_all_members(
 ) -> list[dict]:
     from app.modules.auth.models import UserRole
 
-    query = select(TeamMember).order_by(TeamMember.name)
+    squads = _squad_ids_subquery()
+    query = (
+        select(TeamMember, squads.c.squad_ids)
+        .outerjoin(squads, squads.c.member_id == TeamMember.id)
+        .order_by(TeamMember.name)
+    )
 
     # Gerente: filter to own squad only
     if current_user and current_user.role == UserRole.GERENTE:
-        my_member_res = await db.execute(
-            select(TeamMember).where(TeamMember.user_id == current_user.id)
-        )
-        my_member = my_member_res.scalar_one_or_none()
-        if my_member and my_member.squad_id:
-            # Show all members who share any squad assignment with gerente's squad
-            squad_member_ids = await db.execute(
-                select(MemberSquad.member_id).where(
-                    MemberSquad.squad_id == my_member.squad_id
-                )
-            )
-            ids = [r[0] for r in squad_member_ids.all()]
-            # Also include members with squad_id == gerente's squad (legacy)
-            query = query.where(
-                (TeamMember.squad_id == my_member.squad_id) |
-                (TeamMember.id.in_(ids))
+        scope = await get_user_scope(db, current_user)
+        if scope["squad_id"]:
+            # Members assigned to the gerente's squad (or with it as legacy squad_id)
+            shares_squad = exists().where(
+                MemberSquad.member_id == TeamMember.id,
+                MemberSquad.squad_id == scope["squad_id"],
             )
-        elif my_member:
+            query = query.where((TeamMember.squad_id == scope["squad_id"]) | shares_squad)
+        elif scope["member_id"]:
             # No squad, only see themselves
-            query = query.where(TeamMember.id == my_member.id)
+            query = query.where(TeamMember.id == scope["member_id"])
         else:
             # User not linked to any member: return empty
             return []
@@ -141,13 +177,7 @@ async def get_all_members(
         query = query.where(TeamMember.status == status)
 
     result = await db.execute(query)
-    members = result.scalars().all()
-
-    out = []
-    for m in members:
-        sids = await _get_squad_ids_for_member(db, m.id)
-        out.append(_member_to_dict(m, sids))
-    return out
+    return [_member_to_dict(m, list(sids or [])) for m, sids in result.all()]
 
 
 async def get_member_by_id(db: AsyncSession, member_id: int) -> TeamMember:
@@ -163,8 +193,9 @@ async def get_member_by_id(db: AsyncSession, member_id: int) -> TeamMember:
 
 
 async def get_member_detail(db: AsyncSession, member_id: int) -> dict:
-    member = await get_member_by_id(db, member_id)
-    sids = await _get_squad_ids_for_member(db, member_id)
+    member, sids = await _get_member_with_squads(
+        db, member_id, selectinload(TeamMember.allocations), selectinload(TeamMember.squad)
+    )
     return {
         **_member_to_dict(member, sids),
         "squad_name": member.squad.name if member.squad else None,
@@ -175,7 +206,7 @@ async def get_member_detail(db: AsyncSession, member_id: int) -> dict:
 async def update_member(
     db: AsyncSession, member_id: int, data: TeamMemberUpdate
 ) -> dict:
-    member = await get_member_by_id(db, member_id)
+    member, current_sids = await _get_member_with_squads(db, member_id)
     update_data = data.model_dump(exclude_unset=True)
     squad_ids = update_data.pop("squad_ids", None)
 
@@ -188,8 +219,9 @@ async def update_member(
     for field, value in update_data.items():
         setattr(member, field, value)
     await db.commit()
+    await invalidate_user_scopes()
     await db.refresh(member)
-    effective_sids = squad_ids if squad_ids is not None else await _get_squad_ids_for_member(db, member_id)
+    effective_sids = squad_ids if squad_ids is not None else current_sids
     return _member_to_dict(member, effective_sids)
 
 
@@ -197,63 +229,223 @@ async def delete_member(db: AsyncSession, member_id: int) -> None:
     member = await get_member_by_id(db, member_id)
     await db.delete(member)
     await db.commit()
+    await invalidate_user_scopes()
+
+
+# === Capacity ===
+CAPACITY_NAMESPACE = "team_capacity"
+
+
+async def get_member_capacity(
+    db: AsyncSession, squad_id: int | None = None, current_user=None
+) -> list[dict]:
+    """Workload of every active member: open demands by priority, overdue demands,
+    active allocations and design pieces in progress. One grouped query per source,
+    run concurrently, and cached for TEAM_CAPACITY_CACHE_SECONDS.
+
+    Gerentes only see their own squad (themselves when they have none), as in
+    get_all_members.
+    """
+    from app.modules.auth.models import UserRole
+
+    squad_ids = [squad_id] if squad_id else []
+    member_id = None
+    if current_user and current_user.role == UserRole.GERENTE:
+        scope = await get_user_scope(db, current_user)
+        if scope["squad_id"]:
+            # A squad filter can't reach beyond the gerente's own squad
+            if squad_id and squad_id != scope["squad_id"]:
+                return []
+            squad_ids = [scope["squad_id"]]
+        elif scope["member_id"]:
+            squad_ids, member_id = [], scope["member_id"]
+        else:
+            return []
+
+    key = f"{CAPACITY_NAMESPACE}:{','.join(map(str, sorted(squad_ids))) or 'all'}:{member_id or 'all'}"
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
+
+    member_filter = [TeamMember.status == MemberStatus.ACTIVE]
+    if squad_ids:
+        in_squad = exists().where(
+            MemberSquad.member_id == TeamMember.id, MemberSquad.squad_id.in_(squad_ids)
+        )
+        member_filter.append(TeamMember.squad_id.in_(squad_ids) | in_squad)
+    if member_id:
+        member_filter.append(TeamMember.id == member_id)
+    member_ids = select(TeamMember.id).where(*member_filter)
+
+    now = datetime.now(timezone.utc)
+    is_open = Demand.status != DemandStatus.DONE
+    demands_q = (
+        select(
+            Demand.assigned_to_id.label("member_id"),
+            func.count().label("open_demands"),
+            *[
+                func.count().filter(Demand.priority == p).label(p.value)
+                for p in DemandPriority
+            ],
+            func.count().filter(Demand.due_date < now).label("overdue_demands"),
+        )
+        .where(is_open, Demand.assigned_to_id.in_(member_ids))
+        .group_by(Demand.assigned_to_id)
+    )
+    allocations_q = (
+        select(
+            TeamAllocation.member_id,
+            func.count().label("active_allocations"),
+            func.coalesce(func.sum(TeamAllocation.monthly_value), 0).label("allocation_value"),
+        )
+        .where(TeamAllocation.active_on(now.date()), TeamAllocation.member_id.in_(member_ids))
+        .group_by(TeamAllocation.member_id)
+    )
+    # Started pieces only: out of the intake column and not completed yet
+    design_q = (
+        select(DesignDemand.assigned_to_id.label("member_id"), func.count().label("in_progress"))
+        .join(DesignColumn, DesignColumn.id == DesignDemand.column_id)
+        .where(
+            DesignColumn.name != INTAKE_COLUMN,
+            DesignDemand.completed_at.is_(None),
+            DesignDemand.approved_at.is_(None),
+            DesignDemand.assigned_to_id.in_(member_ids),
+        )
+        .group_by(DesignDemand.assigned_to_id)
+    )
+    members, demand_rows, allocation_rows, design_rows = await run_concurrently(
+        rows(
+            select(TeamMember.id, TeamMember.name, TeamMember.role_title, TeamMember.squad_id)
+            .where(*member_filter)
+            .order_by(TeamMember.name)
+        ),
+        rows(demands_q), rows(allocations_q), rows(design_q),
+    )
+
+    demands = {r.member_id: r for r in demand_rows}
+    allocations = {r.member_id: r for r in allocation_rows}
+    design = {r.member_id: r.in_progress for r in design_rows}
+    capacity = []
+    for m in members:
+        d, a = demands.get(m.id), allocations.get(m.id)
+        capacity.append({
+            "member_id": m.id,
+            "member_name": m.name,
+            "role_title": m.role_title,
+            "squad_id": m.squad_id,
+            "open_demands": d.open_demands if d else 0,
+            "open_by_priority": {
+                p.value: getattr(d, p.value) if d else 0 for p in DemandPriority
+            },
+            "overdue_demands": d.overdue_demands if d else 0,
+            "active_allocations": a.active_allocations if a else 0,
+            "allocation_value": float(a.allocation_value) if a else 0.0,
+            "design_in_progress": design.get(m.id, 0),
+        })
+    await cache_set(key, capacity, settings.TEAM_CAPACITY_CACHE_SECONDS)
+    return capacity
 
 
 # === Allocation ===
-async def create_allocation(db: AsyncSession, data: AllocationCreate) -> dict:
-    existing_member = await db.execute(
-        select(TeamAllocation).where(
-            TeamAllocation.member_id == data.member_id,
-            TeamAllocation.client_id == data.client_id,
+def _allocation_select():
+    """Allocation columns plus member/client names in one joined select."""
+    return (
+        select(
+            *(c for c in TeamAllocation.__table__.columns if c.key != "active_range"),
+            func.coalesce(TeamMember.name, "").label("member_name"),
+            func.coalesce(Client.name, "").label("client_name"),
         )
+        .outerjoin(TeamMember, TeamMember.id == TeamAllocation.member_id)
+        .outerjoin(Client, Client.id == TeamAllocation.client_id)
+    )
+
+
+async def _get_allocation_dict(db: AsyncSession, allocation_id: int) -> dict:
+    result = await db.execute(_allocation_select().where(TeamAllocation.id == allocation_id))
+    return dict(result.one()._mapping)
+
+
+async def _check_allocation_period(
+    db: AsyncSession,
+    member_id: int,
+    client_id: int,
+    start_date: date,
+    end_date: date | None,
+    exclude_id: int | None = None,
+) -> None:
+    """400 unless the member is free on this client for the period and no other member
+    with the same role is allocated to it at the same time."""
+    if end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="Data final anterior à data inicial")
+    overlapping = [
+        TeamAllocation.client_id == client_id,
+        TeamAllocation.overlapping(start_date, end_date),
+    ]
+    if exclude_id is not None:
+        overlapping.append(TeamAllocation.id != exclude_id)
+
+    holder = aliased(TeamMember)
+    result = await db.execute(
+        select(
+            TeamMember.role_title,
+            exists().where(TeamAllocation.member_id == member_id, *overlapping)
+            .label("already_allocated"),
+            exists().where(
+                TeamAllocation.member_id != member_id,
+                holder.id == TeamAllocation.member_id,
+                holder.role_title == TeamMember.role_title,
+                *overlapping,
+            ).label("role_taken"),
+        ).where(TeamMember.id == member_id)
     )
-    if existing_member.scalar_one_or_none():
+    check = result.one_or_none()
+    if check and check.already_allocated:
         raise HTTPException(
             status_code=400,
             detail="Este colaborador ja esta alocado neste cliente"
         )
+    if check and check.role_title and check.role_taken:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ja existe um '{check.role_title}' alocado neste cliente"
+        )
 
-    member_result = await db.execute(
-        select(TeamMember).where(TeamMember.id == data.member_id)
+
+async def create_allocation(db: AsyncSession, data: AllocationCreate) -> dict:
+    await _check_allocation_period(
+        db, data.member_id, data.client_id, data.start_date, data.end_date
     )
-    member = member_result.scalar_one_or_none()
-    if member and member.role_title:
-        same_role_ids_result = await db.execute(
-            select(TeamMember.id).where(TeamMember.role_title == member.role_title)
-        )
-        same_role_ids = [row[0] for row in same_role_ids_result.all()]
-        existing_role = await db.execute(
-            select(TeamAllocation).where(
-                TeamAllocation.client_id == data.client_id,
-                TeamAllocation.member_id.in_(same_role_ids),
-            )
-        )
-        if existing_role.scalar_one_or_none():
-            raise HTTPException(
-                status_code=400,
-                detail=f"Ja existe um '{member.role_title}' alocado neste cliente"
-            )
 
     allocation = TeamAllocation(**data.model_dump())
     db.add(allocation)
     await db.commit()
-    await db.refresh(allocation)
-    return await _enrich_allocation(db, allocation)
+    await invalidate_user_scopes()
+    return await _get_allocation_dict(db, allocation.id)
 
 
 async def get_allocations(
     db: AsyncSession,
     client_id: int | None = None,
     member_id: int | None = None,
+    active_on: date | None = None,
+    squad_id: int | None = None,
 ) -> list[dict]:
-    query = select(TeamAllocation)
+    query = _allocation_select().order_by(TeamAllocation.id)
     if client_id:
         query = query.where(TeamAllocation.client_id == client_id)
     if member_id:
         query = query.where(TeamAllocation.member_id == member_id)
+    if active_on:
+        query = query.where(TeamAllocation.active_on(active_on))
+    if squad_id:
+        # Legacy squad_id or any squad assignment of the member
+        in_squad = exists().where(
+            MemberSquad.member_id == TeamAllocation.member_id,
+            MemberSquad.squad_id == squad_id,
+        )
+        query = query.where((TeamMember.squad_id == squad_id) | in_squad)
     result = await db.execute(query)
-    allocations = result.scalars().all()
-    return [await _enrich_allocation(db, a) for a in allocations]
+    return [dict(row._mapping) for row in result.all()]
 
 
 async def update_allocation(
@@ -265,11 +457,19 @@ async def update_allocation(
     allocation = result.scalar_one_or_none()
     if not allocation:
         raise HTTPException(status_code=404, detail="Alocação não encontrada")
-    for field, value in data.model_dump(exclude_unset=True).items():
+    update_data = data.model_dump(exclude_unset=True)
+    if "start_date" in update_data or "end_date" in update_data:
+        await _check_allocation_period(
+            db, allocation.member_id, allocation.client_id,
+            update_data.get("start_date") or allocation.start_date,
+            update_data.get("end_date", allocation.end_date),
+            exclude_id=allocation_id,
+        )
+    for field, value in update_data.items():
         setattr(allocation, field, value)
     await db.commit()
-    await db.refresh(allocation)
-    return await _enrich_allocation(db, allocation)
+    await invalidate_user_scopes()
+    return await _get_allocation_dict(db, allocation_id)
 
 
 async def delete_allocation(db: AsyncSession, allocation_id: int) -> None:
@@ -281,42 +481,113 @@ async def delete_allocation(db: AsyncSession, allocation_id: int) -> None:
         raise HTTPException(status_code=404, detail="Alocação não encontrada")
     await db.delete(allocation)
     await db.commit()
+    await invalidate_user_scopes()
 
 
-async def _enrich_allocation(db: AsyncSession, allocation: TeamAllocation) -> dict:
-    member = await db.execute(
-        select(TeamMember).where(TeamMember.id == allocation.member_id)
-    )
-    client = await db.execute(
-        select(Client).where(Client.id == allocation.client_id)
-    )
-    m = member.scalar_one_or_none()
-    c = client.scalar_one_or_none()
-    return {
-        **{col.key: getattr(allocation, col.key) for col in TeamAllocation.__table__.columns},
-        "member_name": m.name if m else "",
-        "client_name": c.name if c else "",
-    }
+def _ranges_overlap(a: tuple[date, date | None], b: tuple[date, date | None]) -> bool:
+    return (b[1] is None or a[0] <= b[1]) and (a[1] is None or b[0] <= a[1])
 
 
 async def bulk_create_allocations(db: AsyncSession, items: list[AllocationCreate]) -> dict:
-    """Create multiple allocations, skipping duplicates (same member + client)."""
-    created = 0
-    skipped = 0
-    today = __import__('datetime').date.today()
-    for item in items:
-        existing = await db.execute(
-            select(TeamAllocation).where(
-                TeamAllocation.member_id == item.member_id,
-                TeamAllocation.client_id == item.client_id,
+    """Create many allocations at once. Items that overlap an allocation of the same
+    member + client (in the database or earlier in the batch), role conflicts or point
+    to missing members/clients are skipped with a reason.
+    """
+    results = [
+        {"index": i, "member_id": item.member_id, "client_id": item.client_id,
+         "created": False, "allocation_id": None, "reason": None}
+        for i, item in enumerate(items)
+    ]
+    for item, res in zip(items, results):
+        if item.end_date and item.end_date < item.start_date:
+            res["reason"] = "Data final anterior à data inicial"
+    candidates = [i for i, res in enumerate(results) if res["reason"] is None]
+    if not candidates:
+        return {"created": 0, "skipped": len(results), "items": results}
+
+    # One pass over the whole batch: member role, client existence, overlaps and role conflicts
+    batch = values(
+        column("idx", Integer), column("member_id", Integer), column("client_id", Integer),
+        column("start_date", Date), column("end_date", Date),
+        name="batch",
+    ).data([
+        (i, items[i].member_id, items[i].client_id, items[i].start_date, items[i].end_date)
+        for i in candidates
+    ])
+    batch_range = date_range(batch.c.start_date, batch.c.end_date)
+    holder = aliased(TeamMember)
+    already_allocated = exists().where(
+        TeamAllocation.member_id == batch.c.member_id,
+        TeamAllocation.client_id == batch.c.client_id,
+        TeamAllocation.active_range.overlaps(batch_range),
+    )
+    role_taken = exists().where(
+        TeamAllocation.client_id == batch.c.client_id,
+        TeamAllocation.member_id != batch.c.member_id,
+        TeamAllocation.active_range.overlaps(batch_range),
+        holder.id == TeamAllocation.member_id,
+        holder.role_title == TeamMember.role_title,
+    )
+    checks = await db.execute(
+        select(
+            batch.c.idx,
+            TeamMember.id.label("member_found"),
+            TeamMember.role_title,
+            Client.id.label("client_found"),
+            already_allocated.label("already_allocated"),
+            role_taken.label("role_taken"),
+        )
+        .select_from(batch)
+        .outerjoin(TeamMember, TeamMember.id == batch.c.member_id)
+        .outerjoin(Client, Client.id == batch.c.client_id)
+    )
+
+    to_insert = []
+    claimed_pairs: dict[tuple[int, int], list] = {}
+    claimed_roles: dict[tuple[int, str], list] = {}
+    for check in sorted(checks.all(), key=lambda row: row.idx):
+        item, res = items[check.idx], results[check.idx]
+        period = (item.start_date, item.end_date)
+        pair = claimed_pairs.setdefault((item.member_id, item.client_id), [])
+        role = claimed_roles.setdefault((item.client_id, check.role_title), [])
+        if check.member_found is None:
+            res["reason"] = "Colaborador não encontrado"
+        elif check.client_found is None:
+            res["reason"] = "Cliente não encontrado"
+        elif check.already_allocated or any(_ranges_overlap(period, p) for p in pair):
+            res["reason"] = "Este colaborador ja esta alocado neste cliente"
+        elif check.role_title and (
+            check.role_taken or any(_ranges_overlap(period, p) for p in role)
+        ):
+            res["reason"] = f"Ja existe um '{check.role_title}' alocado neste cliente"
+        else:
+            pair.append(period)
+            role.append(period)
+            to_insert.append(item.model_dump())
+
+    if to_insert:
+        # A concurrent import may have inserted an overlapping allocation meanwhile:
+        # the exclusion constraint makes DO NOTHING skip it
+        inserted = await db.execute(
+            pg_insert(TeamAllocation)
+            .values(to_insert)
+            .on_conflict_do_nothing()
+            .returning(
+                TeamAllocation.id, TeamAllocation.member_id, TeamAllocation.client_id,
+                TeamAllocation.start_date,
             )
         )
-        if existing.scalar_one_or_none():
-            skipped += 1
-            continue
-        alloc = TeamAllocation(**item.model_dump())
-        db.add(alloc)
-        created += 1
-    if created > 0:
+        created_ids = {(r.member_id, r.client_id, r.start_date): r.id for r in inserted.all()}
         await db.commit()
-    return {"created": created, "skipped": skipped}
+        await invalidate_user_scopes()
+        for item, res in zip(items, results):
+            if res["reason"] is None:
+                res["allocation_id"] = created_ids.get(
+                    (item.member_id, item.client_id, item.start_date)
+                )
+                res["created"] = res["allocation_id"] is not None
+                if not res["created"]:
+                    res["reason"] = "Este colaborador ja esta alocado neste cliente"
+
+    created = sum(1 for res in results if res["created"])
+    return {"created": created, "skipped": len(results) - created, "items": results}
@@ -1,14 +1,18 @@
-from datetime import datetime, timezone, date
+from datetime import datetime, timezone, date, timedelta
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_, false
+from app.core.concurrency import one, run_concurrently, scalar
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.modules.auth.models import User, UserRole
 from app.modules.clients.models import Client, ClientStatus
-from app.modules.team.models import TeamMember, MemberStatus, Squad, TeamAllocation
+from app.modules.team.models import TeamMember, MemberStatus, Squad
 from app.modules.demands.models import Demand, DemandStatus
 from app.modules.meetings.models import ClientMeeting
+from app.shared.scope import get_user_scope
+from app.shared.health import get_churn_risk
+from app.shared.snapshots import get_trends
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -37,21 +41,9 @@ async def get_stats(
     my_member_id: int | None = None
 
     if not is_admin:
-        member_res = await db.execute(
-            select(TeamMember).where(TeamMember.user_id == current_user.id)
-        )
-        my_member = member_res.scalar_one_or_none()
-        if my_member:
-            my_member_id = my_member.id
-            alloc_res = await db.execute(
-                select(TeamAllocation.client_id).where(
-                    TeamAllocation.member_id == my_member.id,
-                    or_(TeamAllocation.end_date.is_(None), TeamAllocation.end_date >= today),
-                ).distinct()
-            )
-            my_client_ids = [row[0] for row in alloc_res.all()]
-        else:
-            my_client_ids = []
+        scope = await get_user_scope(db, current_user)
+        my_member_id = scope["member_id"]
+        my_client_ids = scope["client_ids"]
 
     # ── Helper: add client scope ──────────────────────────────
     def with_client_scope(q):
@@ -80,104 +72,111 @@ async def get_stats(
             return q.where(false())
         return q.where(ClientMeeting.client_id.in_(my_client_ids))
 
-    # ── Clients ──────────────────────────────────────────────
-    clients_total = await db.execute(
-        with_client_scope(select(func.count(Client.id)))
-    )
-    clients_active = await db.execute(
-        with_client_scope(select(func.count(Client.id)).where(Client.status == ClientStatus.ACTIVE))
-    )
-    clients_onboarding = await db.execute(
-        with_client_scope(select(func.count(Client.id)).where(Client.status == ClientStatus.ONBOARDING))
-    )
-    clients_churned = await db.execute(
-        with_client_scope(select(func.count(Client.id)).where(Client.status == ClientStatus.CHURNED))
-    )
-    clients_inactive = await db.execute(
-        with_client_scope(select(func.count(Client.id)).where(Client.status == ClientStatus.INACTIVE))
-    )
+    # ── Clients (one pass with per-status filters) ──────────────
+    def client_count(status: ClientStatus):
+        return func.count(Client.id).filter(Client.status == status)
 
-    recv_q = select(func.coalesce(func.sum(Client.monthly_value), 0)).where(
-        Client.status.in_([ClientStatus.ACTIVE, ClientStatus.ONBOARDING]),
-        Client.monthly_value.isnot(None),
-    )
-    recv_q = with_client_scope(recv_q)
-    receivable_res = await db.execute(recv_q)
-    total_receivable = float(receivable_res.scalar() or 0)
+    clients_q = with_client_scope(select(
+        func.count(Client.id).label("total"),
+        client_count(ClientStatus.ACTIVE).label("active"),
+        client_count(ClientStatus.ONBOARDING).label("onboarding"),
+        client_count(ClientStatus.CHURNED).label("churned"),
+        client_count(ClientStatus.INACTIVE).label("inactive"),
+        func.coalesce(func.sum(Client.monthly_value).filter(
+            Client.status.in_([ClientStatus.ACTIVE, ClientStatus.ONBOARDING]),
+        ), 0).label("receivable"),
+    ))
 
     # ── Team (always global) ──────────────────────────────────
-    members_active = await db.execute(
-        select(func.count(TeamMember.id)).where(TeamMember.status == MemberStatus.ACTIVE)
+    members_q = select(
+        func.count(TeamMember.id).filter(TeamMember.status == MemberStatus.ACTIVE).label("active"),
+        func.count(TeamMember.id).label("total"),
     )
-    members_total = await db.execute(select(func.count(TeamMember.id)))
-    squads_total = await db.execute(select(func.count(Squad.id)))
+    squads_q = select(func.count(Squad.id))
 
     # ── Demands (filtered by period: created_at in date range) ───────────────
-    demands_backlog = await db.execute(
-        with_demand_scope(select(func.count(Demand.id)).where(
-            Demand.status == DemandStatus.BACKLOG,
-            Demand.created_at >= period_start, Demand.created_at <= period_end,
-        ))
-    )
-    demands_todo = await db.execute(
-        with_demand_scope(select(func.count(Demand.id)).where(
-            Demand.status == DemandStatus.TODO,
-            Demand.created_at >= period_start, Demand.created_at <= period_end,
-        ))
-    )
-    demands_in_progress = await db.execute(
-        with_demand_scope(select(func.count(Demand.id)).where(
-            Demand.status == DemandStatus.IN_PROGRESS,
-            Demand.created_at >= period_start, Demand.created_at <= period_end,
-        ))
-    )
-    demands_in_review = await db.execute(
-        with_demand_scope(select(func.count(Demand.id)).where(
-            Demand.status == DemandStatus.IN_REVIEW,
-            Demand.created_at >= period_start, Demand.created_at <= period_end,
-        ))
-    )
-    demands_done = await db.execute(
-        with_demand_scope(select(func.count(Demand.id)).where(
-            Demand.status == DemandStatus.DONE,
-            Demand.created_at >= period_start, Demand.created_at <= period_end,
-        ))
-    )
-    demands_overdue = await db.execute(
-        with_demand_scope(
-            select(func.count(Demand.id)).where(
-                Demand.status != DemandStatus.DONE,
-                Demand.due_date.isnot(None),
-                Demand.due_date < today,
-            )
+    def demand_count(status: DemandStatus):
+        return func.count(Demand.id).filter(Demand.status == status)
+
+    demands_q = with_demand_scope(select(
+        demand_count(DemandStatus.BACKLOG).label("backlog"),
+        demand_count(DemandStatus.TODO).label("todo"),
+        demand_count(DemandStatus.IN_PROGRESS).label("in_progress"),
+        demand_count(DemandStatus.IN_REVIEW).label("in_review"),
+        demand_count(DemandStatus.DONE).label("done"),
+    ).where(Demand.created_at >= period_start, Demand.created_at <= period_end))
+    overdue_q = with_demand_scope(
+        select(func.count(Demand.id)).where(
+            Demand.status != DemandStatus.DONE,
+            Demand.due_date.isnot(None),
+            Demand.due_date < today,
         )
     )
 
     # ── Meetings ─────────────────────────────────────────────
-    meetings_this_month = await db.execute(
-        with_meeting_scope(
-            select(func.count(ClientMeeting.id)).where(
-                ClientMeeting.created_at >= period_start,
-                ClientMeeting.created_at <= period_end,
-            )
+    meetings_q = with_meeting_scope(
+        select(func.count(ClientMeeting.id)).where(
+            ClientMeeting.created_at >= period_start,
+            ClientMeeting.created_at <= period_end,
+        )
+    )
+
+    # Independent reads: run them in parallel on their own sessions
+    clients, members, squads_total, demands, demands_overdue, meetings_this_month = (
+        await run_concurrently(
+            one(clients_q), one(members_q), scalar(squads_q),
+            one(demands_q), scalar(overdue_q), scalar(meetings_q),
         )
     )
 
     return {
-        "clients_total": clients_total.scalar() or 0,
-        "clients_active": clients_active.scalar() or 0,
-        "clients_onboarding": clients_onboarding.scalar() or 0,
-        "clients_churned": clients_churned.scalar() or 0,
-        "clients_inactive": clients_inactive.scalar() or 0,
-        "total_receivable": total_receivable,
-        "members_active": members_active.scalar() or 0,
-        "members_total": members_total.scalar() or 0,
-        "squads_total": squads_total.scalar() or 0,
-        "demands_backlog": demands_backlog.scalar() or 0,
-        "demands_todo": demands_todo.scalar() or 0,
-        "demands_in_progress": demands_in_progress.scalar() or 0,
-        "demands_in_review": demands_in_review.scalar() or 0,
-        "demands_done": demands_done.scalar() or 0,
-        "demands_overdue": demands_overdue.scalar() or 0,
-        "meetings_this_month": meetings_this_month.scalar() or 0,
+        "clients_total": clients.total or 0,
+        "clients_active": clients.active or 0,
+        "clients_onboarding": clients.onboarding or 0,
+        "clients_churned": clients.churned or 0,
+        "clients_inactive": clients.inactive or 0,
+        "total_receivable": float(clients.receivable or 0),
+        "members_active": members.active or 0,
+        "members_total": members.total or 0,
+        "squads_total": squads_total or 0,
+        "demands_backlog": demands.backlog or 0,
+        "demands_todo": demands.todo or 0,
+        "demands_in_progress": demands.in_progress or 0,
+        "demands_in_review": demands.in_review or 0,
+        "demands_done": demands.done or 0,
+        "demands_overdue": demands_overdue or 0,
+        "meetings_this_month": meetings_this_month or 0,
     }
+
+
+@router.get("/trends")
+async def get_dashboard_trends(
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Daily series read from dashboard_snapshots (default: last 365 days)."""
+    if date_to is None:
+        date_to = date.today()
+    if date_from is None:
+        date_from = date_to - timedelta(days=365)
+    client_ids = member_id = None
+    if current_user.role != UserRole.ADMIN:
+        # Same scope as get_stats
+        scope = await get_user_scope(db, current_user)
+        client_ids, member_id = scope["client_ids"], scope["member_id"]
+    return await get_trends(db, date_from, date_to, client_ids, member_id)
+
+
+@router.get("/churn-risk")
+async def get_dashboard_churn_risk(
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Clients ranked by the stored churn-risk score (refreshed nightly)."""
+    client_ids = None
+    if current_user.role != UserRole.ADMIN:
+        client_ids = (await get_user_scope(db, current_user))["client_ids"]
+    return await get_churn_risk(db, client_ids, limit)
@@ -0,0 +1,16 @@
+import hashlib
+import json
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def etag_response(request: Request, data) -> Response:
+    """JSON response with a content ETag; 304 when the client already has this version."""
+    body = json.dumps(jsonable_encoder(data), separators=(",", ":"), sort_keys=True)
+    etag = f'W/"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=JSONResponse.media_type, headers=headers)
@@ -0,0 +1,33 @@
+from collections.abc import Iterable
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+CARD_PRESET = "card"
+
+
+def parse_fields(
+    fields: str | None, allowed: Iterable[str], card_fields: Iterable[str]
+) -> list[str] | None:
+    """Parse a sparse fieldset (`fields=id,title,...`, `fields=card` or presets mixed
+    with names, e.g. `fields=card,client_name`). Returns None when the full
+    representation was requested.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    allowed = set(allowed)
+    unknown = [f for f in requested if f != CARD_PRESET and f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Campos inválidos: {', '.join(unknown)}"
+        )
+    expanded: list[str] = []
+    for name in requested:
+        expanded.extend(card_fields if name == CARD_PRESET else [name])
+    return list(dict.fromkeys(expanded))
+
+
+def sparse_response(data) -> JSONResponse:
+    """Serialize sparse payloads as-is (they don't match the full response model)."""
+    return JSONResponse(jsonable_encoder(data))
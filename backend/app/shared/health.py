@@ -0,0 +1,231 @@
+"""Client health history and churn-risk scoring.
+
+Health readings come from meetings (0-10). The series averages them per day and
+adds rolling 7/30/90-day means and a 30-day slope, all with window functions.
+The churn-risk job scores every client in one pass and stores the result in
+client_risk_scores so dashboards can sort by risk without recomputing.
+"""
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import (
+    Date, DateTime, Float, ForeignKey, Integer, cast, func, literal, select,
+    delete as sa_delete,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import AsyncSessionLocal, Base
+from app.modules.clients.models import Client, ClientStatus
+from app.modules.demands.models import Demand, DemandStatus
+from app.modules.meetings.models import ClientMeeting
+
+_EPOCH = date(1970, 1, 1)
+SLOPE_WINDOW_DAYS = 30
+RISK_SLOPE_DAYS = 90
+
+# Churn-risk weights (sum to 1); each component is normalized to 0..1
+RISK_WEIGHTS = {
+    "health_slope": 0.35,
+    "contract_end": 0.25,
+    "overdue_ratio": 0.20,
+    "meeting_recency": 0.20,
+}
+HEALTH_DROP_FULL_RISK = 2.0      # points lost per 30 days
+CONTRACT_END_HORIZON_DAYS = 90
+MEETING_GRACE_DAYS = 14
+MEETING_FULL_RISK_DAYS = 60
+
+
+class ClientRiskScore(Base):
+    __tablename__ = "client_risk_scores"
+
+    client_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True
+    )
+    risk_score: Mapped[float] = mapped_column(Float, index=True)  # 0-100
+    health_score: Mapped[float] = mapped_column(Float, nullable=True)
+    health_slope: Mapped[float] = mapped_column(Float, nullable=True)  # points per day
+    days_to_contract_end: Mapped[int] = mapped_column(Integer, nullable=True)
+    overdue_ratio: Mapped[float] = mapped_column(Float, default=0)
+    days_since_meeting: Mapped[int] = mapped_column(Integer, nullable=True)
+    scored_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+def _day_number(day):
+    return day - cast(literal(_EPOCH), Date)
+
+
+async def get_health_series(db: AsyncSession, client_id: int, days: int = 180) -> list[dict]:
+    """Daily health of a client over the last `days` days (days with readings only).
+    Windows look back past the requested range so the first points are complete.
+    """
+    day = cast(ClientMeeting.created_at, Date)
+    daily = (
+        select(day.label("day"), func.avg(ClientMeeting.health_score).label("health_score"))
+        .where(ClientMeeting.client_id == client_id, ClientMeeting.health_score.isnot(None))
+        .group_by(day)
+        .subquery()
+    )
+    day_num = _day_number(daily.c.day)
+
+    def rolling(fn, days_back: int):
+        return fn.over(order_by=day_num, range_=(-(days_back - 1), 0))
+
+    windowed = select(
+        daily.c.day,
+        daily.c.health_score,
+        rolling(func.avg(daily.c.health_score), 7).label("avg_7d"),
+        rolling(func.avg(daily.c.health_score), 30).label("avg_30d"),
+        rolling(func.avg(daily.c.health_score), 90).label("avg_90d"),
+        rolling(func.regr_slope(daily.c.health_score, day_num), SLOPE_WINDOW_DAYS)
+        .label("slope_30d"),
+    ).subquery()
+    result = await db.execute(
+        select(windowed)
+        .where(windowed.c.day >= date.today() - timedelta(days=days))
+        .order_by(windowed.c.day)
+    )
+    return [
+        {
+            "day": row.day,
+            "health_score": round(float(row.health_score), 2),
+            "avg_7d": round(float(row.avg_7d), 2),
+            "avg_30d": round(float(row.avg_30d), 2),
+            "avg_90d": round(float(row.avg_90d), 2),
+            # NULL until the window has readings on two different days
+            "slope_30d": round(float(row.slope_30d), 4) if row.slope_30d is not None else None,
+        }
+        for row in result.all()
+    ]
+
+
+def _clamp(value: float) -> float:
+    return max(0.0, min(1.0, value))
+
+
+def _risk_score(features: dict) -> float:
+    slope = features["health_slope"]
+    to_end = features["days_to_contract_end"]
+    since_meeting = features["days_since_meeting"]
+    components = {
+        "health_slope": _clamp(-(slope or 0) * 30 / HEALTH_DROP_FULL_RISK),
+        "contract_end": (
+            0.0 if to_end is None else _clamp(1 - to_end / CONTRACT_END_HORIZON_DAYS)
+        ),
+        "overdue_ratio": features["overdue_ratio"],
+        "meeting_recency": (
+            1.0 if since_meeting is None
+            else _clamp(
+                (since_meeting - MEETING_GRACE_DAYS)
+                / (MEETING_FULL_RISK_DAYS - MEETING_GRACE_DAYS)
+            )
+        ),
+    }
+    return round(100 * sum(RISK_WEIGHTS[k] * v for k, v in components.items()), 1)
+
+
+async def score_clients(db: AsyncSession) -> int:
+    """Score churn risk of every non-inactive client in one pass. Returns clients scored."""
+    now = datetime.now(timezone.utc)
+    today = now.date()
+
+    meeting_day = _day_number(cast(ClientMeeting.created_at, Date))
+    health = (
+        select(
+            ClientMeeting.client_id,
+            func.regr_slope(ClientMeeting.health_score, meeting_day).label("slope"),
+        )
+        .where(
+            ClientMeeting.health_score.isnot(None),
+            ClientMeeting.created_at >= now - timedelta(days=RISK_SLOPE_DAYS),
+        )
+        .group_by(ClientMeeting.client_id)
+        .subquery()
+    )
+    meetings = (
+        select(ClientMeeting.client_id, func.max(ClientMeeting.created_at).label("last_meeting"))
+        .group_by(ClientMeeting.client_id)
+        .subquery()
+    )
+    demands = (
+        select(
+            Demand.client_id,
+            func.count().label("open"),
+            func.count().filter(Demand.due_date < now).label("overdue"),
+        )
+        .where(Demand.status != DemandStatus.DONE)
+        .group_by(Demand.client_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            Client.id, Client.end_date, Client.health_score,
+            health.c.slope, meetings.c.last_meeting, demands.c.open, demands.c.overdue,
+        )
+        .outerjoin(health, health.c.client_id == Client.id)
+        .outerjoin(meetings, meetings.c.client_id == Client.id)
+        .outerjoin(demands, demands.c.client_id == Client.id)
+        .where(Client.status != ClientStatus.INACTIVE)
+    )
+
+    rows = []
+    for row in result.all():
+        features = {
+            "health_slope": float(row.slope) if row.slope is not None else None,
+            "days_to_contract_end": (row.end_date - today).days if row.end_date else None,
+            "overdue_ratio": (row.overdue / row.open) if row.open else 0.0,
+            "days_since_meeting": (now - row.last_meeting).days if row.last_meeting else None,
+        }
+        rows.append({
+            "client_id": row.id,
+            "risk_score": _risk_score(features),
+            "health_score": row.health_score,
+            **features,
+            "scored_at": now,
+        })
+
+    # Clients that became inactive drop out of the ranking
+    await db.execute(
+        sa_delete(ClientRiskScore).where(
+            ClientRiskScore.client_id.not_in([r["client_id"] for r in rows])
+        )
+    )
+    if rows:
+        stmt = insert(ClientRiskScore).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["client_id"],
+            set_={k: stmt.excluded[k] for k in rows[0] if k != "client_id"},
+        )
+        await db.execute(stmt)
+    await db.commit()
+    return len(rows)
+
+
+async def score_churn_risk() -> None:
+    """Scheduled job (nightly, at CHURN_RISK_SCORE_HOUR)."""
+    async with AsyncSessionLocal() as db:
+        await score_clients(db)
+
+
+async def get_churn_risk(
+    db: AsyncSession, client_ids: list[int] | None = None, limit: int = 50
+) -> list[dict]:
+    """Stored scores, riskiest first. client_ids=None means every client."""
+    query = (
+        select(ClientRiskScore, Client.name, Client.status)
+        .join(Client, Client.id == ClientRiskScore.client_id)
+        .order_by(ClientRiskScore.risk_score.desc(), Client.name)
+        .limit(limit)
+    )
+    if client_ids is not None:
+        query = query.where(ClientRiskScore.client_id.in_(client_ids))
+    result = await db.execute(query)
+    return [
+        {
+            **{c.key: getattr(score, c.key) for c in ClientRiskScore.__table__.columns},
+            "client_name": name,
+            "client_status": status.value,
+        }
+        for score, name, status in result.all()
+    ]
@@ -0,0 +1,14 @@
+from fastapi import HTTPException
+
+
+def encode_cursor(position: int | None, item_id: int) -> str:
+    """Keyset cursor for board columns ordered by (position, id)."""
+    return f"{position or 0}:{item_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        position, item_id = cursor.split(":", 1)
+        return int(position), int(item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
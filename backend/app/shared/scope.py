@@ -0,0 +1,79 @@
+"""Per-user scoping: which team member a user is, their squad and allocated clients.
+
+The rules are the ones each caller used before they were centralized: the member
+is linked by user_id; only the colaborador board filter falls back to matching
+by email (board_member_id). A gerente's scope is their member's squad_id.
+
+Resolved once per user and cached; any change to members, allocations, squads or
+users bumps the generation and drops every cached scope.
+"""
+from datetime import date
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import bump_generation, cache_get, cache_set, get_generation
+from app.core.config import get_settings
+from app.modules.auth.models import User
+from app.modules.team.models import TeamAllocation, TeamMember
+
+settings = get_settings()
+
+SCOPE_NAMESPACE = "user_scope"
+SCOPE_VERSION = 2
+
+
+async def _resolve_scope(db: AsyncSession, user: User, today: date) -> dict:
+    result = await db.execute(
+        select(TeamMember.id, TeamMember.squad_id).where(TeamMember.user_id == user.id)
+    )
+    member = result.first()
+    board_member_id = member.id if member else None
+    if not member and user.email:
+        # Members created before their login exist are linked by email only
+        result = await db.execute(
+            select(TeamMember.id).where(TeamMember.email == user.email).limit(1)
+        )
+        board_member_id = result.scalar()
+    if not member:
+        return {
+            "member_id": None, "board_member_id": board_member_id,
+            "squad_id": None, "client_ids": [],
+        }
+
+    clients = await db.execute(
+        select(TeamAllocation.client_id).where(
+            TeamAllocation.member_id == member.id,
+            TeamAllocation.overlapping(today),
+        ).distinct()
+    )
+    return {
+        "member_id": member.id,
+        "board_member_id": member.id,
+        "squad_id": member.squad_id,
+        "client_ids": sorted(row[0] for row in clients.all()),
+    }
+
+
+async def get_user_scope(db: AsyncSession, user: User) -> dict:
+    """{"member_id", "board_member_id", "squad_id", "client_ids"} for a user
+    (client_ids = active allocations of member_id)."""
+    today = date.today()
+    generation = await get_generation(SCOPE_NAMESPACE)
+    # The date is part of the key because allocations expire by end_date;
+    # SCOPE_VERSION changes with the shape of the cached dict
+    key = f"{SCOPE_NAMESPACE}:{SCOPE_VERSION}:{generation}:{user.id}:{today.isoformat()}"
+    scope = await cache_get(key)
+    if scope is None:
+        scope = await _resolve_scope(db, user, today)
+        await cache_set(key, scope, settings.USER_SCOPE_CACHE_SECONDS)
+    return scope
+
+
+async def get_colaborador_member_id(db: AsyncSession, user: User) -> int | None:
+    """Member id used to restrict boards/lists for the colaborador role (None = no filter)."""
+    if user.role != "colaborador":
+        return None
+    return (await get_user_scope(db, user))["board_member_id"]
+
+
+async def invalidate_user_scopes() -> None:
+    await bump_generation(SCOPE_NAMESPACE)
@@ -0,0 +1,252 @@
+"""Daily dashboard snapshots backing /dashboard/trends.
+
+One row per (day, client, assigned member); client_id 0 holds demands without a
+client and member_id 0 unassigned demands. The member split lets a scoped trend
+use the same demand predicate as get_stats (assigned to me OR on my clients).
+Client status and monthly value live on the member_id 0 row of each client.
+
+Demand counts that can be derived from timestamps (open, overdue, created,
+completed) are recomputed for any day on re-run. Point-in-time values (client
+status, monthly value, open demands by status) only exist "now", so they are
+captured when the rollup runs for the current day and kept as-is when an older
+day is recomputed; days captured before the member split keep them on member 0.
+
+Days are local dates (date.today()), like the rest of the app.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from sqlalchemy import (
+    Date, DateTime, Integer, Numeric, String, and_, func, or_, select, true, update,
+    delete as sa_delete,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, Base
+from app.modules.clients.models import Client, ClientStatus
+from app.modules.demands.models import Demand, DemandStatus
+
+settings = get_settings()
+
+NO_CLIENT = 0
+NO_MEMBER = 0
+# computed_at of rows written before the member split; the job re-derives those days
+STALE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_DERIVED = ("demands_open", "demands_overdue", "demands_created", "demands_completed")
+_OPEN_STATUSES = {
+    DemandStatus.BACKLOG: "demands_backlog",
+    DemandStatus.TODO: "demands_todo",
+    DemandStatus.IN_PROGRESS: "demands_in_progress",
+    DemandStatus.IN_REVIEW: "demands_in_review",
+}
+
+
+class DashboardSnapshot(Base):
+    __tablename__ = "dashboard_snapshots"
+
+    snapshot_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    # No FK: snapshots outlive deleted clients
+    client_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    member_id: Mapped[int] = mapped_column(Integer, primary_key=True, default=NO_MEMBER)
+    # Point-in-time (captured on the day itself)
+    client_status: Mapped[str] = mapped_column(String(20), nullable=True)
+    monthly_value: Mapped[float] = mapped_column(Numeric(10, 2), nullable=True)
+    demands_backlog: Mapped[int] = mapped_column(Integer, nullable=True)
+    demands_todo: Mapped[int] = mapped_column(Integer, nullable=True)
+    demands_in_progress: Mapped[int] = mapped_column(Integer, nullable=True)
+    demands_in_review: Mapped[int] = mapped_column(Integer, nullable=True)
+    # Derived from timestamps (recomputable for any day)
+    demands_open: Mapped[int] = mapped_column(Integer, default=0)
+    demands_overdue: Mapped[int] = mapped_column(Integer, default=0)
+    demands_created: Mapped[int] = mapped_column(Integer, default=0)
+    demands_completed: Mapped[int] = mapped_column(Integer, default=0)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+def _day_start(day: date) -> datetime:
+    """Local midnight of a day, as an aware datetime."""
+    return datetime.combine(day, time.min).astimezone()
+
+
+async def _derived_counts(
+    db: AsyncSession, day: date, as_of: datetime
+) -> dict[tuple[int, int], dict]:
+    day_start = _day_start(day)
+    is_open = and_(
+        Demand.created_at < as_of,
+        or_(
+            Demand.completed_at >= as_of,
+            and_(Demand.completed_at.is_(None), Demand.status != DemandStatus.DONE),
+        ),
+    )
+    client_key = func.coalesce(Demand.client_id, NO_CLIENT)
+    member_key = func.coalesce(Demand.assigned_to_id, NO_MEMBER)
+    result = await db.execute(
+        select(
+            client_key.label("client_id"),
+            member_key.label("member_id"),
+            func.count().filter(is_open).label("demands_open"),
+            func.count().filter(is_open, Demand.due_date < as_of).label("demands_overdue"),
+            func.count().filter(Demand.created_at >= day_start).label("demands_created"),
+            func.count().filter(
+                Demand.completed_at >= day_start, Demand.completed_at < as_of
+            ).label("demands_completed"),
+        )
+        .where(
+            Demand.created_at < as_of,
+            or_(Demand.completed_at.is_(None), Demand.completed_at >= day_start),
+        )
+        .group_by(client_key, member_key)
+    )
+    return {
+        (row.client_id, row.member_id): {k: getattr(row, k) for k in _DERIVED}
+        for row in result.all()
+    }
+
+
+async def _current_state(db: AsyncSession) -> dict[tuple[int, int], dict]:
+    rows: dict[tuple[int, int], dict] = {}
+    clients = await db.execute(select(Client.id, Client.status, Client.monthly_value))
+    for client_id, status, monthly_value in clients.all():
+        rows[client_id, NO_MEMBER] = {
+            "client_status": status.value if status else None,
+            "monthly_value": monthly_value,
+            **{col: 0 for col in _OPEN_STATUSES.values()},
+        }
+    client_key = func.coalesce(Demand.client_id, NO_CLIENT)
+    member_key = func.coalesce(Demand.assigned_to_id, NO_MEMBER)
+    by_status = await db.execute(
+        select(client_key, member_key, Demand.status, func.count(Demand.id))
+        .where(Demand.status.in_(list(_OPEN_STATUSES)))
+        .group_by(client_key, member_key, Demand.status)
+    )
+    for client_id, member_id, status, count in by_status.all():
+        row = rows.setdefault((client_id, member_id), {
+            "client_status": None,
+            "monthly_value": None,
+            **{col: 0 for col in _OPEN_STATUSES.values()},
+        })
+        row[_OPEN_STATUSES[status]] = count
+    return rows
+
+
+async def rollup_day(db: AsyncSession, day: date) -> int:
+    """(Re)compute the snapshot rows of one day; safe to run repeatedly. Returns rows written."""
+    now = datetime.now(timezone.utc)
+    today = date.today()
+    if day > today:
+        return 0
+    as_of = min(_day_start(day + timedelta(days=1)), now)
+
+    derived = await _derived_counts(db, day, as_of)
+    if day == today:
+        current = await _current_state(db)
+        await db.execute(sa_delete(DashboardSnapshot).where(DashboardSnapshot.snapshot_date == day))
+    else:
+        current = {}
+        # Reset derived counts so clients without demands anymore don't keep stale values
+        await db.execute(
+            update(DashboardSnapshot)
+            .where(DashboardSnapshot.snapshot_date == day)
+            .values({**{col: 0 for col in _DERIVED}, "computed_at": now})
+        )
+
+    # Every row needs the same keys for the multi-row INSERT
+    empty_state = {
+        "client_status": None, "monthly_value": None,
+        **{col: 0 for col in _OPEN_STATUSES.values()},
+    } if day == today else {}
+    rows = []
+    for client_id, member_id in derived.keys() | current.keys():
+        key = client_id, member_id
+        rows.append({
+            "snapshot_date": day,
+            "client_id": client_id,
+            "member_id": member_id,
+            **{col: 0 for col in _DERIVED},
+            **empty_state,
+            **derived.get(key, {}),
+            **current.get(key, {}),
+            "computed_at": now,
+        })
+    if rows:
+        stmt = insert(DashboardSnapshot).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["snapshot_date", "client_id", "member_id"],
+            set_={col: stmt.excluded[col] for col in (*_DERIVED, "computed_at")},
+        )
+        await db.execute(stmt)
+    await db.commit()
+    return len(rows)
+
+
+async def rollup_dashboard_snapshots() -> None:
+    """Scheduled job: recompute from the last snapshotted day (it may be partial) up to today.
+    The first run backfills SNAPSHOT_BACKFILL_DAYS of derived counts; days written
+    before the member split are re-derived once.
+    """
+    today = date.today()
+    s = DashboardSnapshot
+    async with AsyncSessionLocal() as db:
+        stale = await db.scalar(select(func.min(s.snapshot_date)).where(s.computed_at == STALE))
+        last = await db.scalar(select(func.max(s.snapshot_date)))
+        day = stale or last or today - timedelta(days=settings.SNAPSHOT_BACKFILL_DAYS)
+        while day <= today:
+            await rollup_day(db, day)
+            day += timedelta(days=1)
+
+
+async def get_trends(
+    db: AsyncSession,
+    date_from: date,
+    date_to: date,
+    client_ids: list[int] | None = None,
+    member_id: int | None = None,
+) -> list[dict]:
+    """Daily totals read from snapshots only. client_ids=None means every client;
+    otherwise clients are limited to client_ids and demands to those assigned to
+    member_id or on client_ids, as in get_stats."""
+    s = DashboardSnapshot
+    client_scope = demand_scope = true()
+    if client_ids is not None:
+        client_scope = s.client_id.in_(client_ids)
+        demand_scope = or_(client_scope, s.member_id == member_id) if member_id else client_scope
+
+    def by_status(status: ClientStatus):
+        return func.count().filter(client_scope, s.client_status == status.value)
+
+    def demand_sum(col: str):
+        return func.sum(getattr(s, col)).filter(demand_scope).label(col)
+
+    query = (
+        select(
+            s.snapshot_date,
+            by_status(ClientStatus.ACTIVE).label("clients_active"),
+            by_status(ClientStatus.ONBOARDING).label("clients_onboarding"),
+            by_status(ClientStatus.CHURNED).label("clients_churned"),
+            by_status(ClientStatus.INACTIVE).label("clients_inactive"),
+            func.coalesce(
+                func.sum(s.monthly_value).filter(
+                    client_scope,
+                    s.client_status.in_([ClientStatus.ACTIVE.value, ClientStatus.ONBOARDING.value]),
+                ),
+                0,
+            ).label("total_receivable"),
+            # NULL on days that were only backfilled (no point-in-time capture)
+            *[demand_sum(col) for col in _OPEN_STATUSES.values()],
+            *[demand_sum(col) for col in _DERIVED],
+        )
+        .where(s.snapshot_date >= date_from, s.snapshot_date <= date_to)
+        .group_by(s.snapshot_date)
+        .order_by(s.snapshot_date)
+    )
+    result = await db.execute(query)
+    return [
+        {
+            **row._mapping,
+            "total_receivable": float(row.total_receivable),
+        }
+        for row in result.all()
+    ]
@@ -0,0 +1,49 @@
+"""Sparse fieldset parsing (?fields=) against the real demand and design board fields."""
+import pytest
+from fastapi import HTTPException
+from app.modules.demands import services as demand_services
+from app.modules.design import services as design_services
+from app.shared.fieldsets import parse_fields
+
+MODULES = pytest.mark.parametrize(
+    "services", [demand_services, design_services], ids=["demands", "design"]
+)
+
+
+def _parse(fields, services):
+    return parse_fields(fields, services.SPARSE_FIELDS, services.CARD_FIELDS)
+
+
+@MODULES
+def test_no_fields_means_full_representation(services):
+    assert _parse(None, services) is None
+    assert _parse("", services) is None
+
+
+@MODULES
+def test_card_preset(services):
+    assert _parse("card", services) == list(services.CARD_FIELDS)
+    assert set(services.CARD_FIELDS) <= set(services.SPARSE_FIELDS)
+
+
+@MODULES
+def test_card_preset_with_extra_fields(services):
+    extras = [f for f in services.SPARSE_FIELDS if f not in services.CARD_FIELDS]
+    assert "client_name" in extras
+    assert _parse("card,client_name", services) == [*services.CARD_FIELDS, "client_name"]
+    assert _parse(f"card,{','.join(extras)}", services) == [*services.CARD_FIELDS, *extras]
+    # Names already in the preset are not repeated
+    first = services.CARD_FIELDS[1]
+    assert _parse(f"{first}, card ,client_name", services) == [
+        first, *[f for f in services.CARD_FIELDS if f != first], "client_name",
+    ]
+
+
+@MODULES
+@pytest.mark.parametrize("unknown", ["description", "secret"])
+def test_unknown_fields_are_rejected(services, unknown):
+    # Text columns such as description are not part of the sparse representation
+    with pytest.raises(HTTPException) as exc:
+        _parse(f"card,{unknown}", services)
+    assert exc.value.status_code == 400
+    assert unknown in exc.value.detail
@@ -5,7 +5,7 @@ import { useParams, useRouter } from 'next/navigation';
 import AuthGuard from '@/components/layout/AuthGuard';
 import StatusBadge from '@/components/ui/StatusBadge';
 import Modal from '@/components/ui/Modal';
-import { clientsApi, teamApi, demandsApi, meetingsApi, designApi } from '@/services/api';
+import { clientsApi, teamApi, demandsApi, meetingsApi, designApi, jobsApi } from '@/services/api';
 import { useAuthStore } from '@/stores/authStore';
 import { useFinanceVisibilityStore } from '@/stores/financeVisibilityStore';
 import { ClientDetail, TeamMember, Demand, ClientMeeting } from '@/types';
@@ -147,11 +147,32 @@ export default function ClientDetailPage() {
 
   const handleDeleteClient = async () => {
     if (!confirm(`Excluir cliente "${client?.name}"? Esta ação não pode ser desfeita.`)) return;
+    let jobId: number;
     try {
-      await clientsApi.delete(clientId);
-      toast.success('Cliente excluído');
-      router.push('/clients');
-    } catch { toast.error('Erro ao excluir cliente'); }
+      const { data } = await clientsApi.delete(clientId);
+      jobId = data.id;
+    } catch { toast.error('Erro ao excluir cliente'); return; }
+    // The deletion runs as a background job: wait for it before leaving the page
+    const toastId = toast.loading('Exclusão em andamento...');
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 1500));
+      let job: { status: string; error: string | null };
+      try {
+        ({ data: job } = await jobsApi.get(jobId));
+      } catch {
+        toast.error('Não foi possível acompanhar a exclusão; ela continua em andamento', { id: toastId });
+        return;
+      }
+      if (job.status === 'done') {
+        toast.success('Cliente excluído', { id: toastId });
+        router.push('/clients');
+        return;
+      }
+      if (job.status === 'failed') {
+        toast.error(job.error || 'Erro ao excluir cliente', { id: toastId });
+        return;
+      }
+    }
   };
 
   const openEdit = () => {
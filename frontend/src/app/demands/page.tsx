@@ -48,6 +48,7 @@ const formatDeadline = (dueDateStr: string) => {
 export default function DemandsPage() {
   const [columns, setColumns] = useState<KanbanColumn[]>([]);
   const [allDemands, setAllDemands] = useState<Record<string, Demand[]>>({});
+  const [cursors, setCursors] = useState<Record<string, string | null>>({});
   const [clients, setClients] = useState<Client[]>([]);
   const [members, setMembers] = useState<TeamMember[]>([]);
   const [squads, setSquads] = useState<Squad[]>([]);
@@ -77,30 +78,60 @@ export default function DemandsPage() {
   });
   const [draggedDemand, setDraggedDemand] = useState<Demand | null>(null);
 
-  useEffect(() => { loadBoard(); }, []);
-
-  const loadBoard = async () => {
+  // Filters run on the server: columns are paginated, so cards not loaded yet must match too
+  const boardFilters = useMemo(() => ({
+    client_id: filterClient || undefined,
+    assigned_to_id: filterMember || undefined,
+    squad_id: filterSquad || undefined,
+    role_title: filterRole || undefined,
+    demand_type: filterType || undefined,
+    created_after: filterPeriod
+      ? new Date(Date.now() - Number(filterPeriod) * 24 * 3600000).toISOString()
+      : undefined,
+  }), [filterClient, filterMember, filterSquad, filterRole, filterType, filterPeriod]);
+
+  useEffect(() => { loadLookups(); }, []);
+  useEffect(() => { loadBoard(); }, [boardFilters]);
+
+  const loadLookups = async () => {
     try {
-      const [boardRes, clientsRes, membersRes, squadsRes] = await Promise.all([
-        demandsApi.getBoard(), clientsApi.getAll(), teamApi.getMembers(), teamApi.getSquads(),
+      const [clientsRes, membersRes, squadsRes] = await Promise.all([
+        clientsApi.getAll(), teamApi.getMembers(), teamApi.getSquads(),
       ]);
-      setColumns(boardRes.data.columns);
-      setAllDemands(boardRes.data.demands);
       setClients(clientsRes.data);
       setMembers(membersRes.data);
       setSquads(squadsRes.data);
     } catch { toast.error('Erro ao carregar board'); }
+  };
+
+  const loadBoard = async () => {
+    try {
+      const boardRes = await demandsApi.getBoard(boardFilters);
+      setColumns(boardRes.data.columns);
+      setAllDemands(boardRes.data.demands);
+      setCursors(boardRes.data.cursors || {});
+    } catch { toast.error('Erro ao carregar board'); }
     finally { setLoading(false); }
   };
 
+  const loadMore = async (columnId: number) => {
+    const key = String(columnId);
+    try {
+      const res = await demandsApi.getBoardColumn(columnId, { ...boardFilters, cursor: cursors[key] });
+      setAllDemands(prev => ({ ...prev, [key]: [...(prev[key] || []), ...res.data.demands] }));
+      setCursors(prev => ({ ...prev, [key]: res.data.next_cursor }));
+    } catch { toast.error('Erro ao carregar mais demandas'); }
+  };
+
   // Extract unique demand types and role titles for filters
   const demandTypes = useMemo(() => {
     const types = new Set<string>();
     Object.values(allDemands).flat().forEach(d => {
       if (d.demand_type) types.add(d.demand_type);
     });
+    if (filterType) types.add(filterType);
     return Array.from(types).sort();
-  }, [allDemands]);
+  }, [allDemands, filterType]);
 
   const roleTitles = useMemo(() => {
     const roles = new Set<string>();
@@ -108,33 +139,6 @@ export default function DemandsPage() {
     return Array.from(roles).sort();
   }, [members]);
 
-  // Filter demands per column
-  const filteredDemands = useMemo(() => {
-    const squadMemberIds = filterSquad
-      ? members.filter(m => m.squad_id === Number(filterSquad)).map(m => m.id)
-      : null;
-    const roleMemberIds = filterRole
-      ? members.filter(m => m.role_title === filterRole).map(m => m.id)
-      : null;
-    const periodStart = filterPeriod
-      ? new Date(Date.now() - Number(filterPeriod) * 24 * 3600000)
-      : null;
-
-    const filtered: Record<string, Demand[]> = {};
-    for (const [colId, colDemands] of Object.entries(allDemands)) {
-      filtered[colId] = colDemands.filter(d => {
-        if (filterClient && d.client_id !== Number(filterClient)) return false;
-        if (filterMember && d.assigned_to_id !== Number(filterMember)) return false;
-        if (filterType && d.demand_type !== filterType) return false;
-        if (squadMemberIds && (!d.assigned_to_id || !squadMemberIds.includes(d.assigned_to_id))) return false;
-        if (roleMemberIds && (!d.assigned_to_id || !roleMemberIds.includes(d.assigned_to_id))) return false;
-        if (periodStart && new Date(d.created_at) < periodStart) return false;
-        return true;
-      });
-    }
-    return filtered;
-  }, [allDemands, filterClient, filterSquad, filterMember, filterRole, filterType, filterPeriod, members]);
-
   const activeFilterCount = [filterClient, filterSquad, filterMember, filterRole, filterType, filterPeriod].filter(Boolean).length;
 
   const clearFilters = () => {
@@ -325,7 +329,7 @@ export default function DemandsPage() {
         ) : (
           <div className="flex gap-4 overflow-x-auto pb-4">
             {columns.map((column) => {
-              const colDemands = filteredDemands[String(column.id)] || [];
+              const colDemands = allDemands[String(column.id)] || [];
               return (
                 <div
                   key={column.id}
@@ -442,6 +446,14 @@ export default function DemandsPage() {
                         </div>
                       );
                     })}
+                    {cursors[String(column.id)] && (
+                      <button
+                        onClick={() => loadMore(column.id)}
+                        className="w-full text-xs text-gray-500 hover:text-primary-500 py-2 transition-colors"
+                      >
+                        Carregar mais
+                      </button>
+                    )}
                   </div>
                 </div>
               );
@@ -46,6 +46,7 @@ const getAvatarColor = (name: string): string => {
 export default function DesignPage() {
   const [columns, setColumns] = useState<DesignColumn[]>([]);
   const [allDemands, setAllDemands] = useState<Record<string, DesignDemand[]>>({});
+  const [cursors, setCursors] = useState<Record<string, string | null>>({});
   const [clients, setClients] = useState<Client[]>([]);
   const [members, setMembers] = useState<TeamMember[]>([]);
   const [loading, setLoading] = useState(true);
@@ -89,33 +90,44 @@ export default function DesignPage() {
   const [showRatesConfig, setShowRatesConfig] = useState(false);
   const [editingRates, setEditingRates] = useState<Record<number, { arte: string; video: string }>>({});
 
-  useEffect(() => { loadBoard(); }, []);
+  // Filters run on the server: columns are paginated, so cards not loaded yet must match too
+  const boardFilters = useMemo(() => ({
+    client_id: filterClient || undefined,
+    assigned_to_id: filterMember || undefined,
+    demand_type: filterType || undefined,
+  }), [filterClient, filterMember, filterType]);
 
-  const loadBoard = async () => {
+  useEffect(() => { loadLookups(); }, []);
+  useEffect(() => { loadBoard(); }, [boardFilters]);
+
+  const loadLookups = async () => {
     try {
-      const [boardRes, clientsRes, membersRes] = await Promise.all([
-        designApi.getBoard(), clientsApi.getAll(), teamApi.getMembers(),
+      const [clientsRes, membersRes] = await Promise.all([
+        clientsApi.getAll(), teamApi.getMembers(),
       ]);
-      setColumns(boardRes.data.columns);
-      setAllDemands(boardRes.data.demands);
       setClients(clientsRes.data);
       setMembers(membersRes.data);
     } catch { toast.error('Erro ao carregar board de design'); }
+  };
+
+  const loadBoard = async () => {
+    try {
+      const boardRes = await designApi.getBoard(boardFilters);
+      setColumns(boardRes.data.columns);
+      setAllDemands(boardRes.data.demands);
+      setCursors(boardRes.data.cursors || {});
+    } catch { toast.error('Erro ao carregar board de design'); }
     finally { setLoading(false); }
   };
 
-  const filteredDemands = useMemo(() => {
-    const filtered: Record<string, DesignDemand[]> = {};
-    for (const [colId, colDemands] of Object.entries(allDemands)) {
-      filtered[colId] = colDemands.filter(d => {
-        if (filterClient && d.client_id !== Number(filterClient)) return false;
-        if (filterMember && d.assigned_to_id !== Number(filterMember)) return false;
-        if (filterType && d.demand_type !== filterType) return false;
-        return true;
-      });
-    }
-    return filtered;
-  }, [allDemands, filterClient, filterMember, filterType]);
+  const loadMore = async (columnId: number) => {
+    const key = String(columnId);
+    try {
+      const res = await designApi.getBoardColumn(columnId, { ...boardFilters, cursor: cursors[key] });
+      setAllDemands(prev => ({ ...prev, [key]: [...(prev[key] || []), ...res.data.demands] }));
+      setCursors(prev => ({ ...prev, [key]: res.data.next_cursor }));
+    } catch { toast.error('Erro ao carregar mais demandas'); }
+  };
 
   const activeFilterCount = [filterClient, filterMember, filterType].filter(Boolean).length;
   const clearFilters = () => { setFilterClient(''); setFilterMember(''); setFilterType(''); };
@@ -370,7 +382,7 @@ export default function DesignPage() {
         ) : (
           <div className="flex gap-4 overflow-x-auto pb-4">
             {columns.map((column) => {
-              const colDemands = filteredDemands[String(column.id)] || [];
+              const colDemands = allDemands[String(column.id)] || [];
               return (
                 <div
                   key={column.id}
@@ -464,6 +476,14 @@ export default function DesignPage() {
                         </div>
                       );
                     })}
+                    {cursors[String(column.id)] && (
+                      <button
+                        onClick={() => loadMore(column.id)}
+                        className="w-full text-xs text-gray-500 hover:text-primary-500 py-2 transition-colors"
+                      >
+                        Carregar mais
+                      </button>
+                    )}
                   </div>
                 </div>
               );
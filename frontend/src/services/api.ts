@@ -84,6 +84,11 @@ export const clientsApi = {
   delete: (id: number) => api.delete(`/clients/${id}`),
 };
 
+// Background jobs (e.g. client deletion)
+export const jobsApi = {
+  get: (id: number) => api.get(`/jobs/${id}`),
+};
+
 // Team
 export const teamApi = {
   getSquads: () => api.get('/team/squads'),
@@ -105,6 +110,8 @@ export const teamApi = {
 // Demands
 export const demandsApi = {
   getBoard: (params?: any) => api.get('/demands/board', { params }),
+  getBoardColumn: (columnId: number, params?: any) =>
+    api.get(`/demands/board/columns/${columnId}`, { params }),
   getColumns: () => api.get('/demands/columns'),
   createColumn: (data: any) => api.post('/demands/columns', data),
   updateColumn: (id: number, data: any) => api.patch(`/demands/columns/${id}`, data),
@@ -149,6 +156,8 @@ export const financialApi = {
 // Design
 export const designApi = {
   getBoard: (params?: any) => api.get('/design/board', { params }),
+  getBoardColumn: (columnId: number, params?: any) =>
+    api.get(`/design/board/columns/${columnId}`, { params }),
   getColumns: () => api.get('/design/columns'),
   createColumn: (data: any) => api.post('/design/columns', data),
   updateColumn: (id: number, data: any) => api.patch(`/design/columns/${id}`, data),